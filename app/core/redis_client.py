@@ -1,4 +1,154 @@
+"""
+Shared Redis client.
+
+The connection pool is bounded (REDIS_MAX_CONNECTIONS); a command that finds
+every connection busy waits at most REDIS_POOL_TIMEOUT_SECONDS for one.
+Connect and read timeouts bound each command, and connections idle for
+REDIS_HEALTH_CHECK_INTERVAL are PINGed before reuse.
+
+Commands and pipelines go through a circuit breaker. After
+REDIS_BREAKER_FAILURES consecutive connection errors or timeouts it opens,
+and for REDIS_BREAKER_RESET_SECONDS every call fails at once with
+RedisUnavailable instead of waiting out its own timeout. RedisUnavailable is
+a redis ConnectionError, so callers that already fall back on Redis errors
+(SQL for unread badges, the local session store, ...) keep doing so. Then a
+single call is let through as a probe, and its outcome closes or reopens the
+circuit. Pub/sub connections are not covered; the chat hub retries those
+itself.
+
+pool_stats() and redis_breaker.state are reported by /health.
+"""
+
+import asyncio
+import time
+
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
 from app.core.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+class RedisUnavailable(ConnectionError):
+    """Redis calls are short-circuited while the breaker is open"""
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed or open."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = None, reset_seconds: float = None):
+        self.failure_threshold = failure_threshold or settings.REDIS_BREAKER_FAILURES
+        self.reset_seconds = settings.REDIS_BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self):
+        """Raise RedisUnavailable unless the call may go to Redis"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        raise RedisUnavailable("Redis is unavailable (circuit open)")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                print(f"Redis circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release_probe(self):
+        """The probe ended without telling us anything about Redis (e.g. it was cancelled)"""
+        self._probing = False
+
+async def guarded(breaker: CircuitBreaker, call):
+    breaker.before_call()
+    try:
+        result = await call()
+    except (ConnectionError, TimeoutError, asyncio.TimeoutError):
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Command errors (WRONGTYPE, ...) still prove Redis answered; cancellations prove nothing
+        breaker.release_probe()
+        raise
+    breaker.record_success()
+    return result
+
+class GuardedPipeline(Pipeline):
+    def __init__(self, *args, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+
+    async def execute(self, raise_on_error: bool = True):
+        if not self.command_stack and not self.watching:
+            return []
+        return await guarded(self.breaker, lambda: super(GuardedPipeline, self).execute(raise_on_error))
+
+class GuardedRedis(redis.Redis):
+    """Redis client whose commands and pipelines go through a circuit breaker"""
+
+    def __init__(self, *args, breaker: CircuitBreaker = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker or CircuitBreaker()
+
+    async def execute_command(self, *args, **options):
+        return await guarded(self.breaker, lambda: super(GuardedRedis, self).execute_command(*args, **options))
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> GuardedPipeline:
+        return GuardedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint, breaker=self.breaker
+        )
+
+def build_pool(url: str) -> redis.BlockingConnectionPool:
+    return redis.BlockingConnectionPool.from_url(
+        url,
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
+    )
+
+def pool_stats(client: redis.Redis = None) -> dict:
+    """Connections in use and idle against the pool's limit"""
+    pool = (client or redis_client).connection_pool
+    in_use = len(getattr(pool, "_in_use_connections", ()))
+    idle = len(getattr(pool, "_available_connections", ()))
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "idle": idle,
+        "utilization": round(in_use / pool.max_connections, 3) if pool.max_connections else 0.0
+    }
+
+async def ping_redis(client: redis.Redis = None, timeout: float = None) -> bool:
+    """True if Redis answers a PING within the timeout"""
+    timeout = settings.REDIS_SOCKET_TIMEOUT_SECONDS if timeout is None else timeout
+    try:
+        return bool(await asyncio.wait_for((client or redis_client).ping(), timeout))
+    except (RedisError, asyncio.TimeoutError):
+        return False
+
+redis_breaker = CircuitBreaker()
+redis_client = GuardedRedis(connection_pool=build_pool(settings.REDIS_URL), breaker=redis_breaker)
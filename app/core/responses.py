@@ -0,0 +1,144 @@
+"""
+Response encoding: orjson, streamed lists and compression.
+
+JSON bodies are rendered with orjson (main.py makes ORJSONResponse the
+default response class).
+
+List endpoints that can grow large (provider search, reviews, chat history)
+return await stream_list(): items are validated and encoded one at a time as the
+body is sent, instead of building every model and then one big string.
+Clients get the usual JSON array, or NDJSON (one item per line) when they
+send "Accept: application/x-ndjson". The first two chunks are encoded in the
+threadpool (to tell a short list from a streamed one) and StreamingResponse
+runs the rest there too, so encoding never blocks the event loop.
+
+CompressionMiddleware compresses responses above COMPRESSION_MIN_BYTES. It
+uses Brotli when the client accepts it and the optional brotli package is
+installed, and gzip otherwise. Streamed chunks are flushed through the
+compressor as they are produced, so compression does not hold back the first
+bytes. Bodies that are already encoded (the precompressed catalog) are
+passed through.
+"""
+
+import itertools
+from typing import Any, Callable, Iterable, Iterator, Optional, Type
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are gzip-compressed only
+    brotli = None
+
+NDJSON = "application/x-ndjson"
+
+Encoder = Callable[[Any], bytes]
+
+def model_encoder(model: Type[BaseModel]) -> Encoder:
+    """Validate an item (dict, row or object) against a response model and return its JSON"""
+    adapter = TypeAdapter(model)
+    return lambda item: adapter.dump_json(adapter.validate_python(item, from_attributes=True))
+
+def _chunked(parts: Iterable[bytes], chunk_bytes: int) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+def json_array_chunks(items: Iterable[Any], encode: Encoder = orjson.dumps,
+                      chunk_bytes: Optional[int] = None) -> Iterator[bytes]:
+    def parts():
+        yield b"["
+        for n, item in enumerate(items):
+            if n:
+                yield b","
+            yield encode(item)
+        yield b"]"
+    return _chunked(parts(), chunk_bytes or settings.STREAM_CHUNK_BYTES)
+
+def ndjson_chunks(items: Iterable[Any], encode: Encoder = orjson.dumps,
+                  chunk_bytes: Optional[int] = None) -> Iterator[bytes]:
+    return _chunked((encode(item) + b"\n" for item in items), chunk_bytes or settings.STREAM_CHUNK_BYTES)
+
+def _peek(chunks: Iterator[bytes]):
+    return next(chunks, b""), next(chunks, None)
+
+async def stream_list(request: Request, items: Iterable[Any], model: Optional[Type[BaseModel]] = None) -> Response:
+    """
+    Stream items as a JSON array, or as NDJSON if the client asked for it. A
+    list that fits in one chunk is sent as a plain response instead, with a
+    Content-Length (and uncompressed, if it is under COMPRESSION_MIN_BYTES).
+    """
+    encode = model_encoder(model) if model is not None else orjson.dumps
+    if NDJSON in request.headers.get("accept", ""):
+        chunks, media_type = ndjson_chunks(items, encode), NDJSON
+    else:
+        chunks, media_type = json_array_chunks(items, encode), "application/json"
+    first, second = await run_in_threadpool(_peek, chunks)
+    if second is None:
+        return Response(first, media_type=media_type)
+    return StreamingResponse(itertools.chain((first, second), chunks), media_type=media_type)
+
+class FlushingGZipResponder(GZipResponder):
+    """gzip that flushes after each streamed chunk, so clients can use it straight away"""
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if not more_body:
+            return super().apply_compression(body, more_body=False)
+        self.gzip_file.write(body)
+        self.gzip_file.flush()
+        body = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return body
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+class CompressionMiddleware(GZipMiddleware):
+    """Brotli or gzip, whichever the client accepts (Brotli only if installed)."""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None, compresslevel: Optional[int] = None,
+                 brotli_quality: Optional[int] = None):
+        super().__init__(
+            app,
+            minimum_size=settings.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size,
+            compresslevel=compresslevel or settings.GZIP_LEVEL
+        )
+        self.brotli_quality = brotli_quality if brotli_quality is not None else settings.BROTLI_QUALITY
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = Headers(scope=scope).get("Accept-Encoding", "")
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = FlushingGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,20 +1,145 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from fastapi import Request, Response
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
 from app.core.config import settings
 
-# Update the database URL to use a more complete database
-SQLALCHEMY_DATABASE_URL = f"sqlite:///./service_matching_complete.db"
+# Backend is selected through settings.DATABASE_URL (SQLite by default, Postgres in production)
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def build_engine(url: str, echo: bool = None):
+    """Create an engine with the connection options appropriate for the backend."""
+    echo = settings.DATABASE_ECHO if echo is None else echo
+    if is_sqlite_url(url):
+        return create_engine(url, connect_args={"check_same_thread": False}, echo=echo)
+    return create_engine(
+        url,
+        echo=echo,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True
+    )
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+
+# Geography columns are only mapped when the primary database can host them
+POSTGIS_ENABLED = settings.ENABLE_POSTGIS and engine.dialect.name == "postgresql"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    echo=True  # Set to False in production
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Indexes replaced by a differently defined one under a new name; ensure_schema() drops them
+RETIRED_INDEXES = {
+    "chat_messages": ("ix_chat_messages_client_msg_id",),  # Idempotency key now includes the client
+    "reviews": ("ix_reviews_provider_id_id",),  # Pages now follow created_at, which an edited review bumps
+}
+
+def is_postgres(bind=None) -> bool:
+    """True when the given engine/session bind (default: primary engine) talks to Postgres."""
+    bind = bind if bind is not None else engine
+    return bind.dialect.name == "postgresql"
+
+def postgis_enabled(bind=None) -> bool:
+    return POSTGIS_ENABLED and is_postgres(bind)
+
+def dialect_insert(bind=None):
+    """insert() construct with ON CONFLICT support for the bound backend (Postgres or SQLite)"""
+    return postgresql.insert if is_postgres(bind) else sqlite.insert
+
+def is_connection_error(error: Exception) -> bool:
+    """The database could not be reached (as opposed to a statement it rejected); worth retrying later"""
+    return isinstance(error, (OperationalError, DisconnectionError)) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+def ensure_schema(bind=None):
+    """
+    Bring existing tables up to date with the models.
+
+    create_all() only creates missing tables; this adds columns and indexes that
+    were introduced after a table was first created, so existing SQLite files
+    and Postgres databases keep working without a manual rebuild.
+    """
+    bind = bind if bind is not None else engine
+    if postgis_enabled(bind):
+        with bind.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+
+    Base.metadata.create_all(bind=bind)
+
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for name in RETIRED_INDEXES.get(table.name, ()):
+                if name in existing_indexes:
+                    conn.execute(text(f"DROP INDEX {name}"))
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn, checkfirst=True)
+
+class ReplicaRouter:
+    """
+    Hands out sessions on read replicas in round-robin order.
+
+    A client that has just written (review, chat message) carries a short-lived
+    cookie and is served from the primary until replicas have caught up, so it
+    always reads its own writes.
+    """
+
+    STICKY_COOKIE = "db_primary_until"
+
+    def __init__(self, primary_sessionmaker, replica_urls=(), stickiness_seconds: int = 10):
+        self.primary_sessionmaker = primary_sessionmaker
+        self.stickiness_seconds = stickiness_seconds
+        self.configure(replica_urls)
+
+    def configure(self, replica_urls):
+        self.replica_engines = [build_engine(url) for url in replica_urls]
+        self.replica_sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+            for replica_engine in self.replica_engines
+        ]
+        self._next_replica = itertools.cycle(self.replica_sessionmakers)
+
+    def is_sticky(self, request: Request) -> bool:
+        try:
+            return float(request.cookies.get(self.STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def read_session(self, request: Request = None):
+        if not self.replica_sessionmakers or (request is not None and self.is_sticky(request)):
+            return self.primary_sessionmaker()
+        return next(self._next_replica)()
+
+    def mark_write(self, response: Response):
+        """Pin this client to the primary for the stickiness window."""
+        if not self.replica_sessionmakers:
+            return
+        until = time.time() + self.stickiness_seconds
+        response.set_cookie(
+            self.STICKY_COOKIE, f"{until:.3f}",
+            max_age=self.stickiness_seconds, httponly=True, samesite="lax"
+        )
+
+db_router = ReplicaRouter(SessionLocal, settings.DATABASE_REPLICA_URLS, settings.REPLICA_STICKINESS_SECONDS)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -22,3 +147,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency for read-only endpoints: a replica session unless the client just wrote
+def get_read_db(request: Request):
+    db = db_router.read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def mark_recent_write(response: Response):
+    db_router.mark_write(response)
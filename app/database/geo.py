@@ -0,0 +1,45 @@
+"""
+PostGIS helpers used when the database runs on Postgres with ENABLE_POSTGIS.
+
+The geography column is a generated column computed from latitude/longitude,
+so existing writes keep setting plain floats and Postgres maintains the point.
+"""
+
+from sqlalchemy import Column, Computed, Index, func
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import UserDefinedType
+
+METERS_PER_MILE = 1609.344
+
+class Geography(UserDefinedType):
+    """PostGIS geography(POINT, 4326) column type."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "geography(POINT, 4326)"
+
+def geography_column():
+    """Deferred, generated geography point built from the row's longitude/latitude."""
+    return deferred(Column(
+        Geography(),
+        Computed("ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography", persisted=True),
+        nullable=True
+    ))
+
+def geography_index(table_name: str):
+    return Index(f"ix_{table_name}_location_geog", "location_geog", postgresql_using="gist")
+
+def make_point(latitude: float, longitude: float):
+    return func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326).cast(Geography())
+
+def within_miles(geog_column, latitude: float, longitude: float, miles: float):
+    """ST_DWithin filter, answered from the GiST index."""
+    return func.ST_DWithin(geog_column, make_point(latitude, longitude), miles * METERS_PER_MILE)
+
+def distance_miles(geog_column, latitude: float, longitude: float):
+    return func.ST_Distance(geog_column, make_point(latitude, longitude)) / METERS_PER_MILE
+
+def nearest_first(geog_column, latitude: float, longitude: float):
+    """KNN ordering expression (<->) that lets Postgres walk the GiST index in distance order."""
+    return geog_column.op("<->")(make_point(latitude, longitude))
@@ -1,6 +1,12 @@
 from sqlalchemy.orm import relationship
 from app.models.user import User
 from app.models.service_provider import ServiceProvider, Review, ChatMessage
+from app.models.conversation import Conversation, UnreadTotal
+from app.models.provider_stats import ProviderStats
+from app.models.activity import ActivityEvent
+from app.models.service_request import ServiceRequest, RequestOffer
+from app.models.availability import ProviderHours, ProviderBooking
+from app.models.geocode import GeocodeEntry
 
 # Update relationships
 User.reviews = relationship("Review", back_populates="user")
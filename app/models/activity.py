@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class ActivityEvent(Base):
+    """
+    Append-only activity log behind the client dashboard feed.
+
+    Rows are never updated: everything the feed shows (description, ids to
+    link to) is written with the event, so a user's feed is one range scan of
+    ix_activity_events_user_feed with no joins.
+    """
+    __tablename__ = "activity_events"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Whose feed the event belongs to
+    event_type = Column(String, nullable=False)  # request_created, provider_matched, message_received, review_posted
+    description = Column(String, nullable=False)
+    details = Column(Text, nullable=True)  # JSON string of ids and fields the UI links to
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Leading user_id partitions the index per user; id orders the feed and is the page cursor
+        Index("ix_activity_events_user_feed", "user_id", "id"),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, SmallInteger, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class ProviderHours(Base):
+    """
+    One working-hours block of a provider's weekly calendar, e.g. Saturday
+    09:00-13:00 is (weekday=5, start_minute=540, end_minute=780). Times are
+    local wall-clock minutes (East Africa Time has no DST).
+    """
+    __tablename__ = "provider_hours"
+
+    provider_id = Column(Integer, ForeignKey("service_providers.id"), primary_key=True)
+    weekday = Column(SmallInteger, primary_key=True)  # 0 = Monday ... 6 = Sunday
+    start_minute = Column(SmallInteger, primary_key=True)  # Minutes after midnight
+    end_minute = Column(SmallInteger, nullable=False)
+
+class ProviderBooking(Base):
+    """
+    A time a provider is already taken, as [start_minute, end_minute) in local
+    minutes since the Unix epoch. Indexed in memory by
+    app.services.availability.AvailabilityIndex.
+    """
+    __tablename__ = "provider_bookings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider_id = Column(Integer, ForeignKey("service_providers.id"), nullable=False)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+    request_id = Column(Integer, ForeignKey("service_requests.id"), nullable=True)  # The job it is for, if any
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Loading upcoming bookings is a range scan
+        Index("ix_provider_bookings_end", "end_minute"),
+        Index("ix_provider_bookings_provider", "provider_id", "start_minute"),
+    )
@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database.database import Base
+
+class Conversation(Base):
+    """
+    One chat thread between a client and a provider.
+
+    last_message, last_message_time and the unread counters are denormalized
+    from chat_messages and kept current in the same transaction as every message
+    insert or read receipt, so inboxes never aggregate over messages.
+    """
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, nullable=False)  # Chat session the messages are stored under
+    client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("service_providers.id"), nullable=False)
+    request_id = Column(Integer, nullable=True)  # Service request the chat started from, if any
+    service_category = Column(String, nullable=True)
+
+    # Denormalized summary
+    last_message = Column(Text, nullable=True)
+    last_message_time = Column(DateTime(timezone=True), nullable=True)
+    last_sender_type = Column(String, nullable=True)  # 'user' or 'provider'
+    client_unread = Column(Integer, nullable=False, default=0, server_default="0")  # Provider messages the client has not read
+    provider_unread = Column(Integer, nullable=False, default=0, server_default="0")  # Client messages the provider has not read
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    client = relationship("User")
+    provider = relationship("ServiceProvider")
+
+    __table_args__ = (
+        UniqueConstraint("session_id", "client_id", "provider_id", name="uq_conversations_thread"),
+        Index("ix_conversations_client_inbox", "client_id", "last_message_time"),
+        Index("ix_conversations_provider_inbox", "provider_id", "last_message_time"),
+    )
+
+class UnreadTotal(Base):
+    """
+    Unread messages across all of one owner's conversations ('user' = client
+    user id, 'provider' = service provider id). Maintained alongside the
+    per-conversation counters so the dashboard badge is a primary-key lookup.
+    """
+    __tablename__ = "unread_totals"
+
+    owner_type = Column(String, primary_key=True)  # 'user' or 'provider'
+    owner_id = Column(Integer, primary_key=True)
+    unread = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
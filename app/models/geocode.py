@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Float
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class GeocodeEntry(Base):
+    """
+    Persistent cache of free-text address lookups (app.services.geocoding).
+
+    Keyed by the normalized text and the county it was looked up in, so the
+    same landmark typed by many users is resolved once. Misses are cached too
+    (latitude/longitude NULL) and are retried only when the gazetteer or the
+    matching rules change (the version column).
+    """
+    __tablename__ = "geocode_cache"
+
+    query = Column(String, primary_key=True)  # "<county>|<normalized text>"
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    county = Column(String, nullable=True)
+    sub_county = Column(String, nullable=True)
+    ward = Column(String, nullable=True)
+    matched = Column(String, nullable=True)  # The estate, landmark or area name that matched
+    level = Column(String, nullable=True)  # area, ward, sub_county or county
+    version = Column(String, nullable=False)  # Gazetteer and matcher version the answer came from
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
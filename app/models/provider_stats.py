@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class ProviderStats(Base):
+    """
+    Materialized dashboard counters for one provider.
+
+    Kept current by app.services.provider_stats hooks in the same transaction as
+    the message or request transition that changes them, and recomputed by
+    reconcile_provider_stats.py, so the dashboard reads one row by primary key.
+    """
+    __tablename__ = "provider_stats"
+
+    provider_id = Column(Integer, ForeignKey("service_providers.id"), primary_key=True)
+    new_requests = Column(Integer, nullable=False, default=0, server_default="0")  # Requests waiting for the provider's answer
+    active_chats = Column(Integer, nullable=False, default=0, server_default="0")  # Conversations whose last message is from the client
+    completed_jobs = Column(Integer, nullable=False, default=0, server_default="0")  # Requests the provider accepted and then completed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Boolean, Text, ForeignKey, Index, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.database.database import Base
+from app.database.database import Base, POSTGIS_ENABLED
+from app.database.geo import geography_column, geography_index
+from app.services.catalog import catalog, category_mask
 
 class ServiceProvider(Base):
     __tablename__ = "service_providers"
@@ -11,6 +13,7 @@ class ServiceProvider(Base):
     business_name = Column(String, nullable=True)
     email = Column(String, unique=True, index=True, nullable=False)
     phone = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True, nullable=True)  # The provider's login account
     
     # Location details (Kenya-specific administrative hierarchy)
     location = Column(String, nullable=True)  # Combined location string
@@ -29,6 +32,9 @@ class ServiceProvider(Base):
     longitude = Column(Float, nullable=True)
     full_address = Column(String, nullable=True)  # From map/geocoding
     manual_address = Column(Text, nullable=True)  # Manual address entry
+    if POSTGIS_ENABLED:
+        location_geog = geography_column()  # Generated from latitude/longitude
+        __table_args__ = (geography_index("service_providers"),)
     
     # Legacy location fields (for backward compatibility)
     address = Column(String, nullable=True)
@@ -41,6 +47,7 @@ class ServiceProvider(Base):
     services = Column(Text, nullable=True)  # JSON string of selected services
     categories = Column(String, nullable=True)  # JSON string of categories (legacy)
     specialties = Column(String, nullable=True)  # JSON string of specialties (legacy)
+    category_mask = Column(BigInteger, nullable=True)  # Catalog category bits of categories + services
     description = Column(Text, nullable=True)
     response_time = Column(String, default="within_week")  # same_day, within_48h, within_week
     availability = Column(String, default="same_day")  # For matching service compatibility
@@ -50,9 +57,15 @@ class ServiceProvider(Base):
     hourly_rate_max = Column(Float, nullable=True)  # KSH per hour
     pricing_notes = Column(Text, nullable=True)
     
-    # Ratings and reviews
+    # Ratings and reviews (maintained incrementally by app.services.ratings)
     average_rating = Column(Float, default=0.0)
     total_reviews = Column(Integer, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")  # Per-star histogram
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Status and verification
     is_active = Column(Boolean, default=True)
@@ -65,6 +78,15 @@ class ServiceProvider(Base):
     # Relationships
     reviews = relationship("Review", back_populates="provider")
 
+    @classmethod
+    def offers(cls, category: str):
+        """Filter for providers offering a category: one bit test for catalog categories"""
+        bit = catalog.category_bit(category)
+        if bit:
+            return cls.category_mask.op("&")(bit) != 0
+        # Not in the catalog (construction, sitters, ...): match the stored JSON text
+        return cls.categories.contains(category)
+
     def save_to_db(self, db):
         """Save provider to database"""
         try:
@@ -149,6 +171,11 @@ class ServiceProvider(Base):
             db.rollback()
             raise e
 
+@event.listens_for(ServiceProvider, "before_insert")
+@event.listens_for(ServiceProvider, "before_update")
+def _set_category_mask(mapper, connection, provider):
+    provider.category_mask = category_mask(provider.categories, provider.services)
+
 class Review(Base):
     __tablename__ = "reviews"
     
@@ -166,6 +193,10 @@ class Review(Base):
     # Relationships
     user = relationship("User", back_populates="reviews")  
     provider = relationship("ServiceProvider", back_populates="reviews")
+    
+    __table_args__ = (
+        Index("ix_reviews_provider_created_at_id", "provider_id", "created_at", "id"),  # Keyset pagination per provider
+    )
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -178,9 +209,18 @@ class ChatMessage(Base):
     sender_type = Column(String, nullable=False)  # 'user' or 'provider'
     message_text = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)  # Set when the recipient's socket received it
+    client_msg_id = Column(String, nullable=True)  # Idempotency key from the sender (write-behind dedupe)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User")
     provider = relationship("ServiceProvider")
+    
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),  # History pages and since-cursor sync
+        # Idempotency key is unique per thread (session, client, provider) and side, so clients only need locally unique ids
+        Index("ix_chat_messages_thread_client_msg_id", "session_id", "user_id", "provider_id", "sender_type",
+              "client_msg_id", unique=True),
+    )
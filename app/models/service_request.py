@@ -0,0 +1,71 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database.database import Base
+
+class ServiceRequest(Base):
+    """
+    A client's request for a service, moved through its lifecycle by
+    app.services.service_requests:
+
+        open -> offered -> accepted -> completed
+          \\________\\__________\\---> cancelled
+
+    Every transition is a compare-and-set UPDATE on status.
+    """
+    __tablename__ = "service_requests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    session_id = Column(String, nullable=True)  # Problem detection session the request came from, if any
+    category = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    urgency = Column(String, nullable=False, default="medium", server_default="medium")  # low, medium, high, emergency
+
+    # Where the job is (Kenyan administrative hierarchy plus map point)
+    county = Column(String, nullable=True)
+    sub_county = Column(String, nullable=True)
+    location = Column(String, nullable=True)  # Display string
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
+    status = Column(String, nullable=False, default="open", server_default="open")
+    accepted_provider_id = Column(Integer, ForeignKey("service_providers.id"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    offered_at = Column(DateTime(timezone=True), nullable=True)
+    accepted_at = Column(DateTime(timezone=True), nullable=True)
+    closed_at = Column(DateTime(timezone=True), nullable=True)  # Completed or cancelled
+    first_offer_ms = Column(Integer, nullable=True)  # Emergency dispatch: time from dispatch start to the first offer
+
+    # Relationships
+    client = relationship("User")
+    accepted_provider = relationship("ServiceProvider")
+
+    __table_args__ = (
+        Index("ix_service_requests_client", "client_id", "id"),
+        Index("ix_service_requests_status", "status", "category", "county"),
+    )
+
+class RequestOffer(Base):
+    """
+    One request offered to one provider. Rows are the providers' request inboxes:
+    ix_request_offers_provider_queue serves "my new requests, newest first".
+    """
+    __tablename__ = "request_offers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, ForeignKey("service_requests.id"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("service_providers.id"), nullable=False)
+    status = Column(String, nullable=False, default="new", server_default="new")  # new, accepted, declined, withdrawn, expired
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    responded_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    request = relationship("ServiceRequest")
+    provider = relationship("ServiceProvider")
+
+    __table_args__ = (
+        UniqueConstraint("request_id", "provider_id", name="uq_request_offers_request_provider"),
+        Index("ix_request_offers_provider_queue", "provider_id", "status", "id"),
+    )
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
 from sqlalchemy.sql import func
-from app.database.database import Base
+from app.database.database import Base, POSTGIS_ENABLED
+from app.database.geo import geography_column, geography_index
 
 class User(Base):
     __tablename__ = "users"
@@ -22,6 +23,9 @@ class User(Base):
     full_address = Column(String, nullable=True)  # From Google Maps
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    if POSTGIS_ENABLED:
+        location_geog = geography_column()  # Generated from latitude/longitude
+        __table_args__ = (geography_index("users"),)
     
     # Legacy location fields (for backward compatibility)
     city = Column(String, nullable=True)  # Maps to county
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+from app.core.responses import stream_list
 from app.database.database import get_db
-from app.models.user import User
-from app.services.auth import get_current_user
+from app.models.conversation import Conversation
+from app.models.service_provider import ChatMessage, ServiceProvider
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user, get_provider_from_user
+from app.services.chat import ChatHub, get_chat_hub
+from app.services.chat_writer import ChatWriter, get_chat_writer, post_message
+from app.services.conversations import get_or_create_conversation, inbox_query, mark_conversations_read
+from app.services.principals import Principal
+from app.services.unread import UnreadCounters, get_unread_counters, owner_for, pop_unread_deltas
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/conversations", tags=["conversations"])
@@ -18,6 +27,9 @@ class SendMessageRequest(BaseModel):
     conversation_id: int
     message: str
 
+class MarkReadRequest(BaseModel):
+    conversation_ids: Optional[List[int]] = None  # None marks every conversation read
+
 class MessageResponse(BaseModel):
     id: int
     sender_type: str  # 'client' or 'provider'
@@ -27,7 +39,7 @@ class MessageResponse(BaseModel):
     
 class ConversationResponse(BaseModel):
     id: int
-    request_id: int
+    request_id: Optional[int] = None
     client_id: int
     provider_id: int
     client_name: str
@@ -37,10 +49,48 @@ class ConversationResponse(BaseModel):
     last_message_time: datetime
     unread_count: int = 0
 
+def get_user_provider(db: Session, user: Principal) -> Optional[ServiceProvider]:
+    """Provider record for a provider account, or None for clients"""
+    if user.user_type != "provider":
+        return None
+    return get_provider_from_user(db, user)
+
+def load_conversation(db: Session, conversation_id: int, user: Principal) -> Tuple[Conversation, str]:
+    """Fetch a conversation the user takes part in, with the user's side ('user' or 'provider')"""
+    
+    conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    if conversation.client_id == user.id:
+        return conversation, "user"
+    
+    provider = get_user_provider(db, user)
+    if provider and provider.id == conversation.provider_id:
+        return conversation, "provider"
+    
+    raise HTTPException(status_code=403, detail="Not a participant in this conversation")
+
+@router.get("", response_model=List[ConversationResponse])
+async def list_conversations(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Inbox for the current user, most recent conversation first"""
+    
+    provider = get_user_provider(db, current_user)
+    if provider:
+        rows = inbox_query(db, provider_id=provider.id, limit=limit).all()
+    else:
+        rows = inbox_query(db, client_id=current_user.id, limit=limit).all()
+    
+    return [row._asdict() for row in rows]
+
 @router.post("/start")
 async def start_conversation(
     request: StartConversationRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Start a conversation between client and provider"""
@@ -48,78 +98,164 @@ async def start_conversation(
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Only clients can start conversations")
     
-    # Check if conversation already exists
-    # Implementation placeholder - check for existing conversation
+    provider = db.query(ServiceProvider).filter(ServiceProvider.id == request.provider_id).first()
+    if not provider:
+        raise HTTPException(status_code=404, detail="Service provider not found")
+    
+    service_request = db.query(ServiceRequest).filter(ServiceRequest.id == request.request_id).first()
+    if not service_request:
+        raise HTTPException(status_code=404, detail="Service request not found")
+    if service_request.client_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not your service request")
+    
+    # Only a provider the request went to can be brought into its conversation
+    offered = service_request.accepted_provider_id == provider.id or db.query(RequestOffer.id).filter(
+        RequestOffer.request_id == service_request.id,
+        RequestOffer.provider_id == provider.id
+    ).first() is not None
+    if not offered:
+        raise HTTPException(status_code=403, detail="This provider was not offered the request")
+    
+    # One conversation per client, provider and request; starting again returns the existing one
+    conversation = get_or_create_conversation(
+        db,
+        session_id=f"request-{request.request_id}",
+        client_id=current_user.id,
+        provider_id=provider.id,
+        request_id=service_request.id,
+        service_category=service_request.category
+    )
+    db.commit()
+    
+    return {
+        "id": conversation.id,
+        "request_id": conversation.request_id,
+        "client_id": conversation.client_id,
+        "provider_id": conversation.provider_id,
+        "created_at": conversation.created_at
+    }
+
+@router.get("/unread-count")
+async def get_unread_count(
+    per_conversation: bool = Query(False, description="Also return unread counts per conversation"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    counters: UnreadCounters = Depends(get_unread_counters)
+):
+    """Inbox badge for the current user, read from the unread counters (never counts messages)"""
     
-    # Create new conversation
-    # Implementation placeholder - create conversation record
+    owner_type, owner_id = owner_for(current_user, get_user_provider(db, current_user))
+    if not per_conversation:
+        return {"unread": await counters.badge(db, owner_type, owner_id)}
     
-    conversation = {
-        "id": 1,  # Placeholder
-        "request_id": request.request_id,
-        "client_id": current_user.id,
-        "provider_id": request.provider_id,
-        "created_at": datetime.utcnow()
+    counts = await counters.counts(db, owner_type, owner_id)
+    total = counts.pop("total", 0)
+    return {
+        "unread": total,
+        "conversations": {int(conversation_id): count for conversation_id, count in counts.items() if count > 0}
     }
+
+@router.post("/mark-read")
+async def mark_read(
+    request: MarkReadRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    counters: UnreadCounters = Depends(get_unread_counters)
+):
+    """Mark the given conversations (or all of them) read for the current user"""
+    
+    owner_type, owner_id = owner_for(current_user, get_user_provider(db, current_user))
+    read_counts = mark_conversations_read(db, owner_type, owner_id, request.conversation_ids)
+    db.commit()
+    await counters.apply(pop_unread_deltas(db))
     
-    return conversation
+    return {
+        "marked_read": sum(read_counts.values()),
+        "conversations": list(read_counts),
+        "unread": await counters.badge(db, owner_type, owner_id)
+    }
 
-@router.get("/{conversation_id}/messages")
+@router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
 async def get_conversation_messages(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    before_id: Optional[int] = Query(None, description="Return messages older than this id"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
-) -> List[MessageResponse]:
-    """Get messages for a conversation"""
+):
+    """Get messages for a conversation, oldest first (use before_id to page back)"""
     
-    # Verify user has access to this conversation
-    # Implementation placeholder
+    conversation, _ = load_conversation(db, conversation_id, current_user)
     
-    # Get messages
-    # Implementation placeholder
-    messages = []
+    # Messages live under the conversation's thread key, served by the (session_id, id) index
+    query = db.query(ChatMessage).filter(
+        ChatMessage.session_id == conversation.session_id,
+        ChatMessage.user_id == conversation.client_id,
+        ChatMessage.provider_id == conversation.provider_id
+    )
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
     
-    return messages
+    names = {"user": conversation.client.name, "provider": conversation.provider.name}
+    return await stream_list(request, (
+        {
+            "id": message.id,
+            "sender_type": "client" if message.sender_type == "user" else "provider",
+            "sender_name": names.get(message.sender_type, ""),
+            "message": message.message_text,
+            "timestamp": message.created_at
+        }
+        for message in reversed(messages)
+    ), MessageResponse)
 
 @router.post("/send-message")
 async def send_message(
     request: SendMessageRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    hub: ChatHub = Depends(get_chat_hub),
+    writer: Optional[ChatWriter] = Depends(get_chat_writer),
+    counters: UnreadCounters = Depends(get_unread_counters),
+    activity: ActivityLog = Depends(get_activity_log)
 ):
     """Send a message in a conversation"""
     
-    # Verify user has access to this conversation
-    # Implementation placeholder
+    conversation, role = load_conversation(db, request.conversation_id, current_user)
     
-    # Save message
-    # Implementation placeholder
+    text = request.message.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
     
-    # Return success
-    return {"message": "Message sent successfully"}
+    # Saves the message and updates the conversation summary in one transaction (or queues it)
+    sender_name = conversation.client.name if role == "user" else conversation.provider.name
+    event = await post_message(
+        db, hub, writer, conversation.session_id, conversation.client_id, conversation.provider_id,
+        role, text, sender_name, counters=counters, activity=activity
+    )
+    
+    return {"message": "Message sent successfully", "message_id": event["id"], "client_msg_id": event["client_msg_id"]}
 
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> ConversationResponse:
     """Get conversation details"""
     
-    # Verify access and get conversation
-    # Implementation placeholder
-    
-    conversation = ConversationResponse(
-        id=conversation_id,
-        request_id=1,
-        client_id=1,
-        provider_id=1,
-        client_name="Client Name",
-        provider_name="Provider Name",
-        service_category="Category",
-        last_message="Last message",
-        last_message_time=datetime.utcnow(),
-        unread_count=0
-    )
+    conversation, role = load_conversation(db, conversation_id, current_user)
     
-    return conversation
+    return ConversationResponse(
+        id=conversation.id,
+        request_id=conversation.request_id,
+        client_id=conversation.client_id,
+        provider_id=conversation.provider_id,
+        client_name=conversation.client.name,
+        provider_name=conversation.provider.name,
+        service_category=conversation.service_category or "",
+        last_message=conversation.last_message or "",
+        last_message_time=conversation.last_message_time or conversation.created_at,
+        unread_count=conversation.client_unread if role == "user" else conversation.provider_unread
+    )
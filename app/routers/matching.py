@@ -1,12 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.orm import Session, sessionmaker
 from typing import List, Optional
 from pydantic import BaseModel
-from app.database.database import get_db
-from app.services.auth import get_current_user
+from app.core.responses import stream_list
+from app.database.database import SessionLocal, get_db, get_read_db, mark_recent_write
+from app.services.activity import PROVIDER_MATCHED, REVIEW_POSTED, ActivityLog, get_activity_log
+from app.services.availability import AvailabilityIndex, get_availability_index
+from app.services.auth import get_current_user, get_provider_from_user, get_user_from_token
+from app.services.chat import (
+    SYNC_MAX_TIMEOUT_SECONDS, ChatHub, channel_for, get_chat_hub, mark_delivered, mark_read,
+    publish_chat_event, wait_for_chat_event
+)
+from app.services.chat_writer import ChatWriter, get_chat_writer, post_message
 from app.services.matching import ServiceMatchingService, MatchedProvider
+from app.services.principals import Principal
+from app.services.ratings import MIN_RATING, MAX_RATING, apply_rating_change
+from app.services.unread import UnreadCounters, get_unread_counters, pop_unread_deltas
+from app.models.conversation import Conversation
 from app.models.user import User
-from app.models.service_provider import ChatMessage, ServiceProvider
+from app.models.service_provider import ChatMessage, Review, ServiceProvider
 from datetime import datetime
 
 router = APIRouter()
@@ -18,6 +32,8 @@ class ProviderMatchRequest(BaseModel):
     min_rating: Optional[float] = 0.0
     max_rate: Optional[float] = None
     availability: Optional[str] = None
+    available_from: Optional[datetime] = None  # Only providers free for this whole window
+    available_until: Optional[datetime] = None
 
 class ProviderMatchResponse(BaseModel):
     id: int
@@ -41,6 +57,7 @@ class ChatMessageCreate(BaseModel):
     provider_id: int
     message_text: str
     session_id: str
+    client_msg_id: Optional[str] = None  # Reuse on retry so the message is stored once
 
 class ChatMessageResponse(BaseModel):
     id: int
@@ -49,6 +66,11 @@ class ChatMessageResponse(BaseModel):
     created_at: datetime
     sender_name: str
 
+class ChatSyncResponse(BaseModel):
+    messages: List[ChatMessageResponse]
+    cursor: int
+    has_more: bool
+
 class ReviewCreate(BaseModel):
     provider_id: int
     rating: int  # 1-5 stars
@@ -67,8 +89,11 @@ matching_service = ServiceMatchingService()
 @router.post("/find-providers", response_model=List[ProviderMatchResponse])
 async def find_service_providers(
     request: ProviderMatchRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    http_request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    activity: ActivityLog = Depends(get_activity_log),
+    availability_index: AvailabilityIndex = Depends(get_availability_index)
 ):
     """Find service providers based on location and filters"""
     
@@ -78,10 +103,19 @@ async def find_service_providers(
             detail="Please update your profile with your location to find nearby providers"
         )
     
-    # Seed sample data if no providers exist
+    if (request.available_from is None) != (request.available_until is None) or (
+        request.available_from and request.available_until <= request.available_from
+    ):
+        raise HTTPException(status_code=400, detail="Give both available_from and a later available_until")
+    
+    # Seed sample data if no providers exist (writes always go to the primary)
     provider_count = db.query(ServiceProvider).count()
     if provider_count == 0:
-        matching_service.seed_sample_providers(db)
+        primary_db = SessionLocal()
+        try:
+            matching_service.seed_sample_providers(primary_db)
+        finally:
+            primary_db.close()
     
     matched_providers = matching_service.find_providers(
         db=db,
@@ -90,36 +124,31 @@ async def find_service_providers(
         max_distance=request.max_distance,
         min_rating=request.min_rating,
         max_rate=request.max_rate,
-        availability=request.availability
+        availability=request.availability,
+        available_from=request.available_from,
+        available_until=request.available_until,
+        index=availability_index
     )
     
-    return [
-        ProviderMatchResponse(
-            id=provider.id,
-            name=provider.name,
-            business_name=provider.business_name,
-            phone=provider.phone,
-            email=provider.email,
-            address=provider.address,
-            city=provider.city,
-            state=provider.state,
-            distance_miles=provider.distance_miles,
-            average_rating=provider.average_rating,
-            total_reviews=provider.total_reviews,
-            hourly_rate_min=provider.hourly_rate_min,
-            hourly_rate_max=provider.hourly_rate_max,
-            availability=provider.availability,
-            specialties=provider.specialties,
-            description=provider.description
+    if matched_providers:
+        activity.record(
+            current_user.id, PROVIDER_MATCHED,
+            f"{len(matched_providers)} providers matched for {request.category}",
+            category=request.category, provider_ids=[provider.id for provider in matched_providers[:10]]
         )
-        for provider in matched_providers
-    ]
+    
+    # Each match is validated and encoded as it is streamed out
+    return await stream_list(http_request, matched_providers, ProviderMatchResponse)
 
 @router.post("/chat/send")
 async def send_chat_message(
     message: ChatMessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    hub: ChatHub = Depends(get_chat_hub),
+    writer: Optional[ChatWriter] = Depends(get_chat_writer),
+    counters: UnreadCounters = Depends(get_unread_counters)
 ):
     """Send a chat message to a service provider"""
     
@@ -131,63 +160,261 @@ async def send_chat_message(
     if not provider:
         raise HTTPException(status_code=404, detail="Service provider not found")
     
-    # Create chat message
-    chat_message = ChatMessage(
-        session_id=message.session_id,
-        user_id=current_user.id,
-        provider_id=message.provider_id,
-        sender_type="user",
-        message_text=message.message_text
+    # Saved (or queued on the chat stream) and fanned out to open sockets on this thread
+    event = await post_message(
+        db, hub, writer, message.session_id, current_user.id, message.provider_id, "user",
+        message.message_text, current_user.name, message.client_msg_id, counters
     )
-    
-    db.add(chat_message)
-    db.commit()
-    db.refresh(chat_message)
+    mark_recent_write(response)
     
     return {
         "message": "Message sent successfully",
-        "chat_id": chat_message.id
+        "chat_id": event["id"],  # None until the write-behind writer stores it
+        "client_msg_id": event["client_msg_id"]
     }
 
-@router.get("/chat/{session_id}", response_model=List[ChatMessageResponse])
-async def get_chat_messages(
+@router.websocket("/chat/ws/{session_id}")
+async def chat_socket(
+    websocket: WebSocket,
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    provider_id: int = Query(...),
+    client_id: Optional[int] = Query(None, description="Providers: the client whose thread to join"),
+    token: str = Query(..., description="Access token (browsers cannot set headers on WebSockets)"),
+    db: Session = Depends(get_db),
+    hub: ChatHub = Depends(get_chat_hub),
+    writer: Optional[ChatWriter] = Depends(get_chat_writer),
+    counters: UnreadCounters = Depends(get_unread_counters)
 ):
-    """Get chat messages for a session"""
+    """
+    Real-time chat for one thread (session_id + client + provider_id).
+    
+    Client frames:
+        {"type": "message", "text": "...", "client_msg_id": "..."}
+        {"type": "read", "up_to_id": 42}
+    Server frames:
+        {"type": "ack", "id": 42, "client_msg_id": "..."}   - message accepted (id is null with write-behind)
+        {"type": "message", ...}                            - new message in the thread
+        {"type": "stored", "id": 42, "client_msg_id": ...}  - write-behind: database id for a message
+        {"type": "delivered", "id": 42, "by": "provider"}   - recipient's socket received it
+        {"type": "read", "up_to_id": 42, "by": "user"}      - recipient read up to this id
+    """
+    
+    try:
+        current_user = get_user_from_token(token, db)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    provider = db.query(ServiceProvider).filter(ServiceProvider.id == provider_id).first()
+    if not provider:
+        await websocket.close(code=1008)
+        return
+    
+    # Threads are authorized against their conversation: the provider's own account
+    # joins an existing one, anyone else is its client (or starts a new thread)
+    thread = db.query(Conversation.client_id).filter(
+        Conversation.session_id == session_id,
+        Conversation.provider_id == provider_id
+    )
+    own_provider = get_provider_from_user(db, current_user, provider_id) if current_user.user_type == "provider" else None
+    if own_provider is not None and own_provider.id == provider.id:
+        role, other_role, sender_name = "provider", "user", provider.name
+        if client_id is not None:
+            thread = thread.filter(Conversation.client_id == client_id)
+        clients = thread.limit(2).all()
+        if len(clients) != 1:
+            await websocket.close(code=1008)  # No such thread, or several clients and none chosen
+            return
+        client_id = clients[0].client_id
+    else:
+        role, other_role, sender_name = "user", "provider", current_user.name
+        if thread.filter(Conversation.client_id != current_user.id).first() is not None:
+            await websocket.close(code=1008)  # Another client's session
+            return
+        client_id = current_user.id
+    
+    # Hand the request session's connection back to the pool: an idle socket must
+    # not hold one for as long as it stays open. Each frame gets a short-lived session.
+    frame_session = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    db.rollback()
+    db.close()
+    
+    await websocket.accept()
+    channel = channel_for(session_id, client_id, provider_id)
+    queue = await hub.subscribe(channel)
+    
+    async def forward_events():
+        while True:
+            event = await queue.get()
+            await websocket.send_json(event)
+            if event.get("sender_type") != other_role:
+                continue
+            
+            # Delivery receipt for messages from the other side
+            if event.get("type") == "message":
+                if event.get("id") is None:
+                    # Write-behind: not stored yet, the receipt carries the client id instead
+                    receipt = {"type": "delivered", "id": None, "client_msg_id": event.get("client_msg_id"), "by": role}
+                    await publish_chat_event(hub, channel, receipt)
+                else:
+                    with frame_session() as frame_db:
+                        delivered = mark_delivered(frame_db, session_id, client_id, provider_id, other_role, event["id"])
+                    if delivered:
+                        await publish_chat_event(hub, channel, {"type": "delivered", "id": event["id"], "by": role})
+            elif event.get("type") == "stored":
+                # Already delivered to this socket; record it now that the row exists
+                with frame_session() as frame_db:
+                    mark_delivered(frame_db, session_id, client_id, provider_id, other_role, event["id"])
+    
+    async def receive_frames():
+        while True:
+            frame = await websocket.receive_json()
+            kind = frame.get("type")
+            
+            if kind == "message":
+                text = (frame.get("text") or "").strip()
+                if not text:
+                    await websocket.send_json({"type": "error", "detail": "Message text is required"})
+                    continue
+                with frame_session() as frame_db:
+                    event = await post_message(
+                        frame_db, hub, writer, session_id, client_id, provider_id, role, text, sender_name,
+                        frame.get("client_msg_id"), counters
+                    )
+                await websocket.send_json({"type": "ack", "id": event["id"], "client_msg_id": event["client_msg_id"]})
+            
+            elif kind == "read":
+                try:
+                    up_to_id = int(frame["up_to_id"])
+                except (KeyError, TypeError, ValueError):
+                    await websocket.send_json({"type": "error", "detail": "up_to_id is required"})
+                    continue
+                with frame_session() as frame_db:
+                    marked = mark_read(frame_db, session_id, client_id, provider_id, other_role, up_to_id)
+                    await counters.apply(pop_unread_deltas(frame_db))
+                if marked:
+                    await publish_chat_event(hub, channel, {"type": "read", "up_to_id": up_to_id, "by": role})
+            
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {kind}"})
     
-    messages = db.query(ChatMessage).filter(
+    tasks = [asyncio.create_task(forward_events()), asyncio.create_task(receive_frames())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                print(f"Chat socket error on {channel}: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await hub.unsubscribe(channel, queue)
+
+def _chat_history_query(db: Session, session_id: str, current_user: Principal, provider_id: Optional[int] = None):
+    """Projection over one session's messages; provider names come from a join instead of a lookup per message"""
+    sender_name = case(
+        (ChatMessage.sender_type == "user", current_user.name),
+        else_=func.coalesce(ServiceProvider.name, "Provider")
+    ).label("sender_name")
+    
+    query = db.query(
+        ChatMessage.id,
+        ChatMessage.sender_type,
+        ChatMessage.message_text,
+        ChatMessage.created_at,
+        sender_name
+    ).outerjoin(
+        ServiceProvider, ServiceProvider.id == ChatMessage.provider_id
+    ).filter(
         ChatMessage.session_id == session_id,
         ChatMessage.user_id == current_user.id
-    ).order_by(ChatMessage.created_at.asc()).all()
-    
-    response_messages = []
-    for msg in messages:
-        if msg.sender_type == "user":
-            sender_name = current_user.name
-        else:
-            provider = db.query(ServiceProvider).filter(
-                ServiceProvider.id == msg.provider_id
-            ).first()
-            sender_name = provider.name if provider else "Provider"
-        
-        response_messages.append(
-            ChatMessageResponse(
-                id=msg.id,
-                sender_type=msg.sender_type,
-                message_text=msg.message_text,
-                created_at=msg.created_at,
-                sender_name=sender_name
-            )
-        )
+    )
+    
+    if provider_id is not None:
+        query = query.filter(ChatMessage.provider_id == provider_id)
+    return query
+
+@router.get("/chat/{session_id}", response_model=List[ChatMessageResponse])
+async def get_chat_messages(
+    session_id: str,
+    request: Request,
+    before_id: Optional[int] = Query(None, description="Return messages older than this id"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Get chat messages for a session, newest page first (use before_id to page back)"""
+    
+    # One projection query, paginated by message id
+    query = _chat_history_query(db, session_id, current_user)
+    
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    
+    rows = query.order_by(ChatMessage.id.desc()).limit(limit).all()
+    
+    # Chronological order for display
+    return await stream_list(request, (row._asdict() for row in reversed(rows)), ChatMessageResponse)
+
+@router.get("/chat/{session_id}/sync", response_model=ChatSyncResponse)
+async def sync_chat_messages(
+    session_id: str,
+    after_id: int = Query(0, ge=0, description="Last message id the client has seen"),
+    provider_id: Optional[int] = Query(None, description="Limit to one thread; enables push wake-ups"),
+    timeout: float = Query(0, ge=0, le=SYNC_MAX_TIMEOUT_SECONDS, description="Seconds to wait for new messages"),
+    limit: int = Query(200, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    hub: ChatHub = Depends(get_chat_hub)
+):
+    """
+    Return only messages newer than after_id (oldest first).
+    
+    With timeout > 0 the request long-polls: it returns as soon as a new message
+    exists or when the timeout expires with an empty delta. Pass the returned
+    cursor as after_id on the next call.
+    """
     
-    return response_messages
+    def fetch_delta():
+        query = _chat_history_query(db, session_id, current_user, provider_id).filter(ChatMessage.id > after_id)
+        return query.order_by(ChatMessage.id).limit(limit + 1).all()
+    
+    # Subscribe before the first read so a message saved in between still wakes us
+    channel = channel_for(session_id, current_user.id, provider_id) if provider_id is not None else None
+    queue = None
+    if channel and timeout > 0:
+        try:
+            queue = await hub.subscribe(channel)
+        except Exception as e:
+            print(f"Chat sync falling back to polling for {channel}: {e}")
+    
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            rows = fetch_delta()
+            remaining = deadline - asyncio.get_running_loop().time()
+            if rows or remaining <= 0:
+                break
+            
+            # End the read transaction so the pooled connection is not held while waiting
+            db.rollback()
+            await wait_for_chat_event(queue, remaining)
+    finally:
+        if queue is not None:
+            await hub.unsubscribe(channel, queue)
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "messages": [row._asdict() for row in rows],
+        "cursor": rows[-1].id if rows else after_id,
+        "has_more": has_more
+    }
 
 @router.get("/provider/{provider_id}")
 async def get_provider_details(
     provider_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed information about a service provider"""
     
@@ -218,11 +445,16 @@ async def get_provider_details(
 @router.post("/review")
 async def submit_review(
     review: ReviewCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    activity: ActivityLog = Depends(get_activity_log)
 ):
     """Submit a review for a service provider"""
     
+    if not MIN_RATING <= review.rating <= MAX_RATING:
+        raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+    
     # Check if provider exists
     provider = db.query(ServiceProvider).filter(
         ServiceProvider.id == review.provider_id
@@ -232,7 +464,6 @@ async def submit_review(
         raise HTTPException(status_code=404, detail="Service provider not found")
     
     # Check if user already reviewed this provider
-    from app.models.service_provider import Review
     existing_review = db.query(Review).filter(
         Review.user_id == current_user.id,
         Review.provider_id == review.provider_id
@@ -240,11 +471,13 @@ async def submit_review(
     
     if existing_review:
         # Update existing review
+        old_rating = existing_review.rating
         existing_review.rating = review.rating
         existing_review.review_text = review.comment or ""
         existing_review.created_at = datetime.utcnow()
     else:
         # Create new review
+        old_rating = None
         new_review = Review(
             user_id=current_user.id,
             provider_id=review.provider_id,
@@ -254,41 +487,45 @@ async def submit_review(
         )
         db.add(new_review)
     
+    # Update provider's rating aggregates in the same transaction as the review
+    apply_rating_change(db, provider.id, review.rating, old_rating)
     db.commit()
-    
-    # Update provider's average rating
-    reviews = db.query(Review).filter(Review.provider_id == review.provider_id).all()
-    if reviews:
-        avg_rating = sum(r.rating for r in reviews) / len(reviews)
-        provider.average_rating = round(avg_rating, 1)
-        provider.total_reviews = len(reviews)
-        db.commit()
+    mark_recent_write(response)
+    activity.record(
+        current_user.id, REVIEW_POSTED, f"You rated {provider.name} {review.rating} stars",
+        provider_id=provider.id, rating=review.rating
+    )
     
     return {"message": "Review submitted successfully"}
 
 @router.get("/provider/{provider_id}/reviews", response_model=List[ReviewResponse])
 async def get_provider_reviews(
     provider_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    before_id: Optional[int] = Query(None, description="Return reviews older than this id"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
 ):
-    """Get reviews for a service provider"""
+    """Get reviews for a service provider, newest first (use before_id to page back)"""
     
-    from app.models.service_provider import Review
-    reviews = db.query(Review).filter(
+    # One projection query joining reviewer names, paginated by (created_at, id):
+    # an edited review moves back to the top, and the id breaks timestamp ties
+    query = db.query(
+        Review.id,
+        Review.rating,
+        func.coalesce(Review.review_text, "").label("comment"),
+        Review.created_at,
+        func.coalesce(User.name, "Anonymous").label("user_name")
+    ).outerjoin(
+        User, User.id == Review.user_id
+    ).filter(
         Review.provider_id == provider_id
-    ).order_by(Review.created_at.desc()).all()
-    
-    response_reviews = []
-    for review in reviews:
-        user = db.query(User).filter(User.id == review.user_id).first()
-        response_reviews.append(
-            ReviewResponse(
-                id=review.id,
-                rating=review.rating,
-                comment=review.review_text or "",
-                created_at=review.created_at,
-                user_name=user.name if user else "Anonymous"
-            )
-        )
+    )
+    
+    if before_id is not None:
+        cursor = select(Review.created_at, Review.id).where(Review.id == before_id).scalar_subquery()
+        query = query.filter(tuple_(Review.created_at, Review.id) < cursor)
+    
+    rows = query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit).all()
     
-    return response_reviews
+    return await stream_list(request, (row._asdict() for row in rows), ReviewResponse)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
+from fastapi.responses import RedirectResponse
 from typing import List, Optional
 from pydantic import BaseModel
-import json
 import uuid
-from app.services.problem_detector import ProblemDetector, ProblemDetectionResult, CategoryOrganizer
-from app.core.redis_client import redis_client
+from app.services.problem_detector import ProblemDetector, ProblemDetectionResult
+from app.services.catalog import category_groups
+from app.services.sessions import SessionStore, get_session_store
 import logging
 
 router = APIRouter()
@@ -27,10 +28,9 @@ class ProblemDetectionResponse(BaseModel):
 
 # Initialize services
 problem_detector = ProblemDetector()
-category_organizer = CategoryOrganizer()
 
 @router.post("/detect", response_model=ProblemDetectionResponse)
-async def detect_problem(problem: ProblemSubmission):
+async def detect_problem(problem: ProblemSubmission, sessions: SessionStore = Depends(get_session_store)):
     """
     Detect the service category from a problem description or use user selection.
     """
@@ -69,12 +69,8 @@ async def detect_problem(problem: ProblemSubmission):
             "status": "ready_for_matching"
         }
         
-        # Store session with 24-hour expiry
-        await redis_client.setex(
-            f"session:{session_id}",
-            86400,  # 24 hours
-            json.dumps(session_data)
-        )
+        # Store session (expires SESSION_TTL_SECONDS after it was last used)
+        await sessions.create(session_id, session_data)
         
         # Generate next steps based on category and urgency
         next_steps = generate_next_steps(final_category, detection_result.urgency_level)
@@ -94,25 +90,37 @@ async def detect_problem(problem: ProblemSubmission):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/categories")
-async def get_service_categories():
+async def get_service_categories(request: Request):
+    """
+    Get all available service categories organized by groups (precomputed, ETag-cached).
+    """
+    return category_groups.response(request)
+
+@router.get("/categories/{version}")
+async def get_versioned_service_categories(version: str, request: Request):
     """
-    Get all available service categories organized by groups.
+    The category groups under their content hash; cacheable forever.
     """
-    return category_organizer.get_category_groups()
+    response = category_groups.versioned_response(request, version)
+    if response is None:
+        return RedirectResponse(category_groups.versioned_path, status_code=302)
+    return response
 
 @router.get("/session/{session_id}")
-async def get_session_data(session_id: str):
+async def get_session_data(session_id: str, sessions: SessionStore = Depends(get_session_store)):
     """
     Retrieve session data.
     """
     try:
-        session_data = await redis_client.get(f"session:{session_id}")
-        if not session_data:
+        session_data = await sessions.get(session_id)
+        if session_data is None:
             raise HTTPException(status_code=404, detail="Session not found or expired")
         
-        return json.loads(session_data)
+        return session_data
         
-    except json.JSONDecodeError:
+    except HTTPException:
+        raise
+    except ValueError:
         raise HTTPException(status_code=500, detail="Invalid session data")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving session: {str(e)}")
@@ -1,17 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime, timedelta
 
-from app.database.database import get_db
+from app.database.database import get_db, get_read_db
+from app.database.geo import METERS_PER_MILE
+from app.models.availability import ProviderBooking, ProviderHours
 from app.models.service_provider import ServiceProvider
+from app.models.service_request import ServiceRequest
 from app.models.user import User
-from app.services.auth import get_current_user, create_access_token
+from app.services.activity import (
+    PROVIDER_MATCHED, PROVIDER_RESPONDED, REQUEST_CANCELLED, REQUEST_COMPLETED, REQUEST_CREATED,
+    ActivityLog, feed_item, feed_query, get_activity_log
+)
+from app.services.auth import get_current_provider, get_current_user, create_access_token
+from app.services.availability import (
+    EAT, AvailabilityIndex, BookingConflict, add_booking, booking_item, format_clock, get_availability_index,
+    parse_clock, remove_booking, set_working_hours, to_minute
+)
+from app.services.catalog import catalog
+from app.services.conversations import inbox_query
+from app.services.dispatch import EMERGENCY, Dispatcher, get_dispatcher
+from app.services.matching import ServiceMatchingService
+from app.services.principals import Principal, PrincipalCache, ProviderPrincipal, get_principal_cache
+from app.services.provider_stats import read_provider_stats
+from app.services.service_requests import (
+    ACCEPTED, CLIENT_STATUS, COMPLETED, OFFERED, OPEN, RequestStateError, accept_offer, cancel_request,
+    client_requests_query, complete_request, count_active_client_chats, count_client_requests, create_request,
+    decline_offer, offer_request, provider_queue_query
+)
+from app.services.sessions import SessionStore, get_session_store
+from app.services.unread import UnreadCounters, get_unread_counters
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(prefix="/api/providers", tags=["providers"])
 
+matching_service = ServiceMatchingService()
+
 class ProviderApplicationSchema(BaseModel):
     fullName: str
     businessName: str = None
@@ -27,11 +53,23 @@ class ProviderApplicationSchema(BaseModel):
     maxRate: int
     pricingNotes: str = None
 
+class ServiceRequestCreate(BaseModel):
+    session_id: Optional[str] = None  # Problem detection session to take category/description/urgency from
+    category: Optional[str] = None
+    description: Optional[str] = None
+    urgency: Optional[str] = None
+    county: Optional[str] = None
+    sub_county: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
 class ProviderStatsSchema(BaseModel):
     newRequests: int = 0
     activeChats: int = 0
     averageRating: float = 0.0
     completedJobs: int = 0
+    unreadMessages: int = 0
 
 class ProviderProfileUpdateSchema(BaseModel):
     fullName: Optional[str] = None
@@ -48,6 +86,19 @@ class ProviderProfileUpdateSchema(BaseModel):
 class ServiceCategoryUpdateSchema(BaseModel):
     service_ids: List[str]
 
+class WorkingHoursBlock(BaseModel):
+    weekday: int  # 0 = Monday ... 6 = Sunday
+    start: str  # "HH:MM"
+    end: str
+
+class WorkingHoursUpdate(BaseModel):
+    hours: List[WorkingHoursBlock]
+
+class BookingCreate(BaseModel):
+    start: datetime
+    end: datetime
+    request_id: Optional[int] = None
+
 @router.post("/apply")
 async def apply_as_provider(
     application: ProviderApplicationSchema,
@@ -109,119 +160,141 @@ async def apply_as_provider(
 
 @router.get("/dashboard/stats")
 async def get_provider_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    counters: UnreadCounters = Depends(get_unread_counters)
 ) -> ProviderStatsSchema:
     """Get provider dashboard statistics"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(
-        ServiceProvider.email == current_user.email
-    ).first()
-    
-    if not provider:
-        raise HTTPException(status_code=404, detail="Provider not found")
-    
-    # Calculate stats (placeholder - implement actual logic)
+    # Materialized counters, one primary-key lookup
+    counts = read_provider_stats(db, provider.id)
     stats = ProviderStatsSchema(
-        newRequests=0,  # Count of new service requests
-        activeChats=0,  # Count of active conversations
-        averageRating=provider.average_rating,
-        completedJobs=0  # Count of completed jobs
+        newRequests=counts["new_requests"],
+        activeChats=counts["active_chats"],
+        averageRating=provider.average_rating or 0.0,
+        completedJobs=counts["completed_jobs"],
+        unreadMessages=await counters.badge(db, "provider", provider.id)
     )
     
     return stats
 
 @router.get("/requests")
 async def get_provider_requests(
-    current_user: User = Depends(get_current_user),
+    before_id: Optional[int] = Query(None, description="Return offers older than this offer id"),
+    limit: int = Query(20, ge=1, le=100),
+    provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
-    """Get service requests for provider"""
+    """Get service requests offered to the provider, newest first"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
+    # The provider's offer queue (new and accepted), from the (provider_id, status, id) index
+    rows = provider_queue_query(db, provider.id, before_id=before_id, limit=limit).all()
     
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(
-        ServiceProvider.email == current_user.email
-    ).first()
-    
-    if not provider:
-        raise HTTPException(status_code=404, detail="Provider not found")
-    
-    # Get matching requests based on provider's categories and location
-    # This is a placeholder - implement actual matching logic
     requests = []
+    for row in rows:
+        request = row._asdict()
+        miles = matching_service.calculate_distance(provider.latitude, provider.longitude, row.latitude, row.longitude)
+        request["distance"] = round(miles * METERS_PER_MILE / 1000, 1) if miles < 999 else None
+        requests.append(request)
     
     return requests
 
 @router.get("/conversations")
 async def get_provider_conversations(
-    current_user: User = Depends(get_current_user),
+    provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
     """Get active conversations for provider"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(
-        ServiceProvider.email == current_user.email
-    ).first()
-    
-    if not provider:
-        raise HTTPException(status_code=404, detail="Provider not found")
-    
-    # Get conversations - placeholder
-    conversations = []
+    # Denormalized summaries, newest first, from the provider inbox index
+    rows = inbox_query(db, provider_id=provider.id).all()
     
-    return conversations
+    return [{**row._asdict(), "customer_name": row.client_name} for row in rows]
 
 @router.post("/requests/{request_id}/accept")
 async def accept_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    activity: ActivityLog = Depends(get_activity_log),
+    dispatcher: Dispatcher = Depends(get_dispatcher)
 ):
     """Accept a service request"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
+    # Concurrent accepts are settled on the Redis lease before touching the database
+    if not await dispatcher.claim(request_id, provider.id):
+        raise HTTPException(status_code=409, detail="Another provider has already taken this request")
+    
+    # Compare-and-set on the offer and the request: only one provider can win
+    try:
+        conversation = accept_offer(db, request_id, provider.id)
+        db.commit()
+    except RequestStateError as e:
+        db.rollback()
+        await dispatcher.release(request_id, provider.id)
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception:
+        db.rollback()
+        await dispatcher.release(request_id, provider.id)
+        raise
+    
+    activity.record(
+        conversation.client_id, PROVIDER_RESPONDED, f"{provider.name} accepted your request",
+        request_id=request_id, provider_id=provider.id, conversation_id=conversation.id
+    )
     
-    # Implementation placeholder
-    return {"message": "Request accepted successfully"}
+    return {"message": "Request accepted successfully", "conversation_id": conversation.id}
 
 @router.post("/requests/{request_id}/decline")
 async def decline_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
     """Decline a service request"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
+    try:
+        decline_offer(db, request_id, provider.id)
+        db.commit()
+    except RequestStateError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
     
-    # Implementation placeholder
     return {"message": "Request declined"}
 
+@router.post("/requests/{request_id}/complete")
+async def complete_service_request(
+    request_id: int,
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    activity: ActivityLog = Depends(get_activity_log)
+):
+    """Mark an accepted request as completed"""
+    
+    try:
+        complete_request(db, request_id, provider.id)
+        db.commit()
+    except RequestStateError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    request = db.get(ServiceRequest, request_id)
+    activity.record(
+        request.client_id, REQUEST_COMPLETED, f"{provider.name} completed your {request.category} request",
+        request_id=request_id, provider_id=provider.id
+    )
+    
+    return {"message": "Request completed"}
+
 @router.get("/profile")
 async def get_provider_profile(
-    current_user: User = Depends(get_current_user),
+    current_provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
     """Get current provider's profile"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(ServiceProvider.email == current_user.email).first()
+    # The full row; the cached provider only carries the hot fields
+    provider = db.get(ServiceProvider, current_provider.id)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
@@ -248,19 +321,17 @@ async def get_provider_profile(
 @router.put("/profile")
 async def update_provider_profile(
     profile_data: ProviderProfileUpdateSchema,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
 ):
     """Update current provider's profile"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
     # Debug: Print received data
     print(f"Received profile data: {profile_data.dict()}")
     
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(ServiceProvider.email == current_user.email).first()
+    # The full row; the cached provider only carries the hot fields
+    provider = db.get(ServiceProvider, current_provider.id)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
@@ -292,6 +363,7 @@ async def update_provider_profile(
     try:
         db.commit()
         db.refresh(provider)
+        await principals.invalidate_provider(provider.id)  # The cached snapshot carries the name
         
         return {"message": "Profile updated successfully", "provider": {
             "full_name": provider.name,
@@ -311,18 +383,26 @@ async def update_provider_profile(
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update profile")
 
+def describe_service(service_id: str) -> dict:
+    """A stored service or category id as the dashboard shows it, named from the catalog"""
+    service = catalog.service(service_id)
+    if service:
+        name, category = service.name, service.category
+    else:
+        category = catalog.canonical_category(service_id)
+        info = catalog.categories.get(category)
+        name = info["name"] if info else service_id.replace('_', ' ').title()
+    return {"id": service_id, "name": name, "category": category, "service_name": name}
+
 @router.get("/services")
 async def get_provider_services(
-    current_user: User = Depends(get_current_user),
+    current_provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
     """Get provider's current services"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(ServiceProvider.email == current_user.email).first()
+    # The full row; the cached provider only carries the hot fields
+    provider = db.get(ServiceProvider, current_provider.id)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
@@ -338,40 +418,27 @@ async def get_provider_services(
             
             # Convert to service objects
             for service_id in service_list:
-                services.append({
-                    "id": service_id,
-                    "name": service_id.replace('_', ' ').title(),
-                    "category": service_id,
-                    "service_name": service_id.replace('_', ' ').title()
-                })
+                services.append(describe_service(service_id))
         except (json.JSONDecodeError, TypeError):
             # If it's a simple string, split by comma
             service_list = provider.services.split(',') if provider.services else []
             for service_id in service_list:
                 service_id = service_id.strip()
                 if service_id:
-                    services.append({
-                        "id": service_id,
-                        "name": service_id.replace('_', ' ').title(),
-                        "category": service_id,
-                        "service_name": service_id.replace('_', ' ').title()
-                    })
+                    services.append(describe_service(service_id))
     
     return services
 
 @router.put("/services")
 async def update_provider_services(
     services_data: ServiceCategoryUpdateSchema,
-    current_user: User = Depends(get_current_user),
+    current_provider: ProviderPrincipal = Depends(get_current_provider),
     db: Session = Depends(get_db)
 ):
     """Update provider's services"""
     
-    if current_user.user_type != "provider":
-        raise HTTPException(status_code=403, detail="Provider access required")
-    
-    # Get provider record
-    provider = db.query(ServiceProvider).filter(ServiceProvider.email == current_user.email).first()
+    # The full row; the cached provider only carries the hot fields
+    provider = db.get(ServiceProvider, current_provider.id)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
@@ -389,45 +456,190 @@ async def update_provider_services(
         print(f"Error updating services: {e}")
         raise HTTPException(status_code=500, detail="Failed to update services")
 
+@router.get("/availability")
+async def get_provider_availability(
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db)
+):
+    """Get the provider's weekly working hours and upcoming bookings"""
+    
+    hours = db.query(ProviderHours).filter(
+        ProviderHours.provider_id == provider.id
+    ).order_by(ProviderHours.weekday, ProviderHours.start_minute).all()
+    bookings = db.query(ProviderBooking).filter(
+        ProviderBooking.provider_id == provider.id,
+        ProviderBooking.end_minute > to_minute(datetime.now(EAT))
+    ).order_by(ProviderBooking.start_minute).all()
+    
+    return {
+        "hours": [
+            {"weekday": block.weekday, "start": format_clock(block.start_minute), "end": format_clock(block.end_minute)}
+            for block in hours
+        ],
+        "bookings": [booking_item(booking) for booking in bookings]
+    }
+
+@router.put("/availability")
+async def update_provider_availability(
+    working_hours: WorkingHoursUpdate,
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    index: AvailabilityIndex = Depends(get_availability_index)
+):
+    """Replace the provider's weekly working hours"""
+    
+    try:
+        blocks = [(block.weekday, parse_clock(block.start), parse_clock(block.end)) for block in working_hours.hours]
+        set_working_hours(db, provider.id, blocks)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    index.set_hours(provider.id, blocks)
+    
+    return {"message": "Working hours updated successfully", "block_count": len(blocks)}
+
+@router.post("/availability/bookings")
+async def create_provider_booking(
+    booking: BookingCreate,
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    index: AvailabilityIndex = Depends(get_availability_index)
+):
+    """Block out a time the provider is taken"""
+    
+    try:
+        created = add_booking(db, provider.id, booking.start, booking.end, request_id=booking.request_id)
+        db.commit()
+    except BookingConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    index.add_booking(created.id, provider.id, created.start_minute, created.end_minute)
+    
+    return booking_item(created)
+
+@router.delete("/availability/bookings/{booking_id}")
+async def delete_provider_booking(
+    booking_id: int,
+    provider: ProviderPrincipal = Depends(get_current_provider),
+    db: Session = Depends(get_db),
+    index: AvailabilityIndex = Depends(get_availability_index)
+):
+    """Free up a booked time"""
+    
+    if not remove_booking(db, provider.id, booking_id):
+        raise HTTPException(status_code=404, detail="Booking not found")
+    db.commit()
+    
+    index.remove_booking(booking_id)
+    
+    return {"message": "Booking removed successfully"}
+
 # Client dashboard routes
 @router.get("/clients/dashboard/stats", tags=["clients"])
 async def get_client_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    counters: UnreadCounters = Depends(get_unread_counters)
 ):
     """Get client dashboard statistics"""
     
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Client access required")
     
-    # Calculate stats - placeholder
+    # Request counts from the client's request index, chats from the client inbox index
+    # (finished requests' conversations stay in the inbox but are no longer active)
+    counts = count_client_requests(db, current_user.id)
     stats = {
-        "activeRequests": 0,
-        "activeChats": 0,
-        "completed": 0,
-        "totalSpent": 0
+        "activeRequests": sum(counts.get(state, 0) for state in (OPEN, OFFERED, ACCEPTED)),
+        "activeChats": count_active_client_chats(db, current_user.id),
+        "completed": counts.get(COMPLETED, 0),
+        "totalSpent": 0,
+        "unreadMessages": await counters.badge(db, "user", current_user.id)
     }
     
     return stats
 
+@router.post("/clients/requests", tags=["clients"])
+async def create_client_request(
+    request: ServiceRequestCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    activity: ActivityLog = Depends(get_activity_log),
+    dispatcher: Dispatcher = Depends(get_dispatcher),
+    sessions: SessionStore = Depends(get_session_store)
+):
+    """Create a service request and offer it to matching providers (emergencies go out in waves)"""
+    
+    if current_user.user_type != "client":
+        raise HTTPException(status_code=403, detail="Client access required")
+    
+    fields = request.model_dump(exclude={"session_id"})
+    if request.session_id:
+        # Fill in whatever the form left out from the problem detection session
+        session = await sessions.get(
+            request.session_id, fields=("final_category", "problem_description", "urgency_level")
+        )
+        if session:
+            fields["category"] = fields["category"] or session.get("final_category")
+            fields["description"] = fields["description"] or session.get("problem_description")
+            fields["urgency"] = fields["urgency"] or session.get("urgency_level")
+    
+    # The job is at the client's address unless the form says otherwise
+    for name in ("county", "sub_county", "latitude", "longitude"):
+        if fields[name] is None:
+            fields[name] = getattr(current_user, name)
+    fields = {name: value for name, value in fields.items() if value is not None}
+    if not fields.get("category"):
+        raise HTTPException(status_code=400, detail="A service category is required")
+    
+    service_request = create_request(db, current_user.id, session_id=request.session_id, **fields)
+    if service_request.urgency == EMERGENCY:
+        # The nearest same-day providers first; the dispatcher offers it once committed
+        offered = []
+        db.commit()
+        dispatcher.schedule(service_request.id)
+    else:
+        offered = offer_request(db, service_request)
+        db.commit()
+    
+    activity.record(
+        current_user.id, REQUEST_CREATED, f"You requested help with {service_request.category}",
+        request_id=service_request.id, category=service_request.category
+    )
+    if offered:
+        activity.record(
+            current_user.id, PROVIDER_MATCHED,
+            f"{len(offered)} providers matched for {service_request.category}",
+            request_id=service_request.id, provider_ids=offered[:10]
+        )
+    
+    return {"id": service_request.id, "status": CLIENT_STATUS[service_request.status], "provider_count": len(offered)}
+
 @router.get("/clients/requests", tags=["clients"])
 async def get_client_requests(
-    current_user: User = Depends(get_current_user),
+    before_id: Optional[int] = Query(None, description="Return requests older than this id"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get client's service requests"""
+    """Get client's service requests, newest first"""
     
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Client access required")
     
-    # Get user's requests - placeholder
-    requests = []
+    rows = client_requests_query(db, current_user.id, before_id, limit).all()
     
-    return requests
+    return [{**row._asdict(), "status": CLIENT_STATUS[row.status]} for row in rows]
 
 @router.get("/clients/conversations", tags=["clients"])
 async def get_client_conversations(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get client's conversations"""
@@ -435,38 +647,49 @@ async def get_client_conversations(
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Client access required")
     
-    # Get conversations - placeholder
-    conversations = []
+    # Denormalized summaries, newest first, from the client inbox index
+    rows = inbox_query(db, client_id=current_user.id).all()
     
-    return conversations
+    return [row._asdict() for row in rows]
 
 @router.get("/clients/activity", tags=["clients"])
 async def get_client_activity(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    before_id: Optional[int] = Query(None, description="Return events older than this id"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    """Get client's recent activity"""
+    """Get client's recent activity, newest first (use before_id to page back)"""
     
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Client access required")
     
-    # Get activity - placeholder
-    activity = []
+    # Append-only log, one range scan of the (user_id, id) index
+    rows = feed_query(db, current_user.id, before_id, limit).all()
     
-    return activity
+    return [feed_item(row) for row in rows]
 
 @router.post("/clients/requests/{request_id}/cancel", tags=["clients"])
-async def cancel_request(
+async def cancel_client_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    activity: ActivityLog = Depends(get_activity_log)
 ):
     """Cancel a service request"""
     
     if current_user.user_type != "client":
         raise HTTPException(status_code=403, detail="Client access required")
     
-    # Implementation placeholder
+    try:
+        cancel_request(db, request_id, current_user.id)
+        db.commit()
+    except RequestStateError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    activity.record(current_user.id, REQUEST_CANCELLED, "You cancelled a service request", request_id=request_id)
+    
     return {"message": "Request cancelled successfully"}
 
 def send_application_confirmation_email(email: str, name: str):
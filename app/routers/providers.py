@@ -2,17 +2,27 @@
 Provider application and management routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Form, Request
+from anyio import from_thread
+from fastapi import APIRouter, HTTPException, Depends, Form, Request, UploadFile, File
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
-import json
-from datetime import datetime
+import io
 
 from app.database.database import get_db
 from app.models.service_provider import ServiceProvider
 from app.models.user import User
+from app.services.auth import get_current_admin
+from app.services.principals import Principal, PrincipalCache, get_principal_cache
+from app.services.provider_import import (
+    ProviderImporter,
+    ProviderRowError,
+    build_provider_record,
+    detect_format,
+    iter_rows
+)
 
 router = APIRouter()
 
@@ -69,7 +79,8 @@ async def submit_provider_application(
     minRate: str = Form(...),
     maxRate: str = Form(...),
     pricingNotes: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
 ):
     """
     Submit a provider application
@@ -84,70 +95,36 @@ async def submit_provider_application(
         print(f"DEBUG: Selected Services: {selectedServices}")
         print(f"DEBUG: Min Rate: {minRate}, Max Rate: {maxRate}")
         
-        # Parse JSON fields
-        try:
-            selected_categories = json.loads(selectedCategories) if selectedCategories else []
-        except json.JSONDecodeError:
-            selected_categories = []
-            
-        try:
-            selected_services = json.loads(selectedServices) if selectedServices else []
-        except json.JSONDecodeError:
-            selected_services = []
-        
-        # Convert numeric fields
-        try:
-            travel_fee_float = float(travelFee) if travelFee else None
-        except (ValueError, TypeError):
-            travel_fee_float = None
-            
+        # Validate and map to provider columns (same rules as the bulk import)
         try:
-            latitude_float = float(latitude) if latitude else None
-        except (ValueError, TypeError):
-            latitude_float = None
-            
-        try:
-            longitude_float = float(longitude) if longitude else None
-        except (ValueError, TypeError):
-            longitude_float = None
-            
-        try:
-            min_rate_float = float(minRate)
-            max_rate_float = float(maxRate)
-        except (ValueError, TypeError):
-            raise HTTPException(status_code=400, detail="Invalid rate values")
-        
-        # Validate rate range
-        if min_rate_float >= max_rate_float:
-            raise HTTPException(status_code=400, detail="Maximum rate must be higher than minimum rate")
-        
-        # Create provider application data
-        application_data = {
-            'fullName': fullName,
-            'businessName': businessName,
-            'email': email,
-            'phone': phone,
-            'description': description,
-            'selectedCategories': selected_categories,
-            'selectedServices': selected_services,
-            'responseTime': responseTime,
-            'county': county,
-            'subCounty': subCounty,
-            'ward': ward,
-            'specificLocation': specificLocation,
-            'serviceRadius': serviceRadius,
-            'travelFee': travel_fee_float,
-            'landmark': landmark,
-            'postalCode': postalCode,
-            'serviceAreasDescription': serviceAreasDescription,
-            'latitude': latitude_float,
-            'longitude': longitude_float,
-            'fullAddress': fullAddress,
-            'manualAddress': manualAddress,
-            'minRate': min_rate_float,
-            'maxRate': max_rate_float,
-            'pricingNotes': pricingNotes
-        }
+            provider_fields = build_provider_record({
+                'fullName': fullName,
+                'businessName': businessName,
+                'email': email,
+                'phone': phone,
+                'description': description,
+                'selectedCategories': selectedCategories,
+                'selectedServices': selectedServices,
+                'responseTime': responseTime,
+                'county': county,
+                'subCounty': subCounty,
+                'ward': ward,
+                'specificLocation': specificLocation,
+                'serviceRadius': serviceRadius,
+                'travelFee': travelFee,
+                'landmark': landmark,
+                'postalCode': postalCode,
+                'serviceAreasDescription': serviceAreasDescription,
+                'latitude': latitude,
+                'longitude': longitude,
+                'fullAddress': fullAddress,
+                'manualAddress': manualAddress,
+                'minRate': minRate,
+                'maxRate': maxRate,
+                'pricingNotes': pricingNotes
+            })
+        except ProviderRowError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # Check if user is currently logged in (existing client becoming provider)
         existing_user = db.query(User).filter(User.email == email).first()
@@ -164,54 +141,8 @@ async def submit_provider_application(
                 content={"error": "A provider with this email already exists"}
             )
         
-        # Create location string
-        location_parts = [
-            specificLocation,
-            ward,
-            subCounty,
-            county
-        ]
-        location = ', '.join([part for part in location_parts if part])
-        
-        # Combine service categories and specific services
-        all_services = []
-        if selected_categories:
-            all_services.extend(selected_categories)
-        if selected_services:
-            # Extract service names from "category:service" format
-            service_names = [service.split(':', 1)[1] for service in selected_services if ':' in service]
-            all_services.extend(service_names)
-        
         # Create new provider application
-        new_provider = ServiceProvider(
-            name=fullName,
-            business_name=businessName,
-            email=email,
-            phone=phone,
-            description=description or '',
-            services=json.dumps(all_services),
-            location=location,
-            county=county,
-            sub_county=subCounty,
-            ward=ward,
-            specific_location=specificLocation,
-            service_radius=serviceRadius,
-            travel_fee=travel_fee_float,
-            landmark=landmark,
-            postal_code=postalCode,
-            service_areas_description=serviceAreasDescription,
-            latitude=latitude_float,
-            longitude=longitude_float,
-            full_address=fullAddress,
-            manual_address=manualAddress,
-            hourly_rate_min=min_rate_float,
-            hourly_rate_max=max_rate_float,
-            pricing_notes=application_data.get('pricingNotes'),
-            response_time=application_data['responseTime'],
-            availability_status='pending',  # Application needs to be reviewed
-            is_verified=False,
-            created_at=datetime.utcnow()
-        )
+        new_provider = ServiceProvider(**provider_fields, user_id=existing_user.id if existing_user else None)
         
         # Save to database
         db.add(new_provider)
@@ -225,6 +156,7 @@ async def submit_provider_application(
             existing_user.name = fullName  # Update name if different
             existing_user.phone = phone    # Update phone if different
             db.commit()
+            await principals.invalidate(existing_user.id)  # Cached sessions still say "client"
             user_transition = True
             print(f"DEBUG: Transitioned existing user {email} to provider")
         
@@ -256,6 +188,8 @@ async def submit_provider_application(
             content=response_data
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         print(f"Error submitting provider application: {str(e)}")
@@ -291,3 +225,39 @@ async def get_provider_application(
     except Exception as e:
         print(f"Error getting provider application: {str(e)}")
         raise HTTPException(status_code=500, detail="An error occurred while fetching application details")
+
+@router.post("/api/provider/import")
+async def import_provider_applications(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    batch_size: int = Form(500),
+    admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
+):
+    """
+    Bulk import provider applications from a CSV or NDJSON upload (admin endpoint)
+    """
+    fmt = (format or detect_format(file.filename or "")).lower()
+    if fmt not in ("csv", "ndjson", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    if not 1 <= batch_size <= 5000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 5000")
+    
+    # Rows are parsed lazily from the spooled upload and inserted batch by batch
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    def forget_promoted(inserted, promoted_user_ids):
+        # Accounts that just became providers must not keep their cached client snapshot
+        if promoted_user_ids:
+            from_thread.run(principals.invalidate, *promoted_user_ids)
+    
+    importer = ProviderImporter(db, batch_size=batch_size, hooks=[forget_promoted])
+    try:
+        report = await run_in_threadpool(importer.run, iter_rows(stream, fmt))
+    except Exception as e:
+        print(f"Error importing provider applications: {str(e)}")
+        raise HTTPException(status_code=500, detail="Import failed; batches committed before the error were kept")
+    finally:
+        stream.detach()
+    
+    return report.to_dict()
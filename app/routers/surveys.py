@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
 from pydantic import BaseModel
-import json
-from app.core.redis_client import redis_client
+from app.services.sessions import SessionStore, get_session_store
 
 router = APIRouter()
 
@@ -17,50 +16,43 @@ class SurveySubmissionResponse(BaseModel):
     estimated_quotes: List[Dict[str, Any]]
 
 @router.get("/{session_id}")
-async def get_survey(session_id: str):
+async def get_survey(session_id: str, sessions: SessionStore = Depends(get_session_store)):
     """
     Get the survey for a specific session.
     """
     try:
-        session_data = await redis_client.get(f"session:{session_id}")
-        if not session_data:
+        data = await sessions.get(session_id, fields=("survey", "detection_result", "problem_description"))
+        if data is None:
             raise HTTPException(status_code=404, detail="Session not found or expired")
         
-        data = json.loads(session_data)
         return {
             "survey": data.get("survey"),
             "detection_result": data.get("detection_result"),
             "problem_description": data.get("problem_description")
         }
         
-    except json.JSONDecodeError:
+    except HTTPException:
+        raise
+    except ValueError:
         raise HTTPException(status_code=500, detail="Invalid session data")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving survey: {str(e)}")
 
 @router.post("/submit")
-async def submit_survey(response: SurveyResponse):
+async def submit_survey(response: SurveyResponse, sessions: SessionStore = Depends(get_session_store)):
     """
     Submit survey responses and generate service provider recommendations.
     """
     try:
         # Get session data
-        session_data = await redis_client.get(f"session:{response.session_id}")
-        if not session_data:
+        data = await sessions.get(response.session_id)
+        if data is None:
             raise HTTPException(status_code=404, detail="Session not found or expired")
         
-        data = json.loads(session_data)
-        
-        # Add survey responses to session
+        # Add survey responses to session (only the two changed fields are written)
         data["survey_responses"] = response.answers
         data["status"] = "survey_completed"
-        
-        # Store updated session
-        await redis_client.setex(
-            f"session:{response.session_id}",
-            86400,  # 24 hours
-            json.dumps(data)
-        )
+        await sessions.update(response.session_id, survey_responses=response.answers, status="survey_completed")
         
         # Generate recommendations based on responses
         recommendations = await _generate_recommendations(data)
@@ -77,6 +69,8 @@ async def submit_survey(response: SurveyResponse):
             estimated_quotes=recommendations
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error submitting survey: {str(e)}")
 
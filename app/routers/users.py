@@ -5,14 +5,24 @@ from pydantic import BaseModel, EmailStr
 from app.database.database import get_db
 from app.models.user import User
 from app.services.auth import (
-    get_password_hash, 
     authenticate_user, 
+    access_token_for,
     create_access_token,
     get_current_user
 )
+from app.services.gazetteer import gazetteer
+from app.services.passwords import PasswordPool, PasswordPoolBusy, get_password_pool
+from app.services.principals import Principal, PrincipalCache, get_principal_cache
 
 router = APIRouter()
 
+def password_pool_busy(e: PasswordPoolBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": "1"}
+    )
+
 # Pydantic models
 class UserCreate(BaseModel):
     name: str
@@ -68,7 +78,11 @@ class TokenResponse(BaseModel):
     user: UserResponse
 
 @router.post("/register", response_model=TokenResponse)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(
+    user_data: UserCreate,
+    db: Session = Depends(get_db),
+    passwords: PasswordPool = Depends(get_password_pool)
+):
     """Register a new user"""
     
     # Check if user already exists
@@ -79,8 +93,13 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (bcrypt runs on the password pool, not the event loop,
+    # and without holding a database connection)
+    db.rollback()
+    try:
+        hashed_password = await passwords.hash(user_data.password)
+    except PasswordPoolBusy as e:
+        raise password_pool_busy(e)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -102,11 +121,12 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         zip_code=user_data.postalCode or user_data.zip_code  # Use postalCode if available, fallback to zip_code
     )
     
-    # Use provided coordinates if available, otherwise generate mock coordinates for Kenya
+    # Use provided coordinates if available, otherwise the centroid of the ward
+    # (or of the sub-county or county, if that is all we can place)
     if not new_user.latitude and new_user.county:
-        # Mock coordinates for Kenya (Nairobi area as default)
-        new_user.latitude = -1.2921 + (hash(user_data.email) % 100) * 0.01
-        new_user.longitude = 36.8219 + (hash(user_data.email) % 100) * 0.01
+        place = gazetteer.resolve(new_user.county, new_user.sub_county, new_user.ward)
+        if place:
+            new_user.latitude, new_user.longitude = place.coordinates
     
     db.add(new_user)
     db.commit()
@@ -122,17 +142,24 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=TokenResponse)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(
+    user_credentials: UserLogin,
+    db: Session = Depends(get_db),
+    passwords: PasswordPool = Depends(get_password_pool)
+):
     """Login user"""
     
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    try:
+        user = await authenticate_user(db, user_credentials.email, user_credentials.password, passwords)
+    except PasswordPoolBusy as e:
+        raise password_pool_busy(e)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = access_token_for(db, user)
     
     return TokenResponse(
         access_token=access_token,
@@ -141,31 +168,53 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
     )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get current user information"""
-    return UserResponse.from_orm(current_user)
+    # The full profile; the cached principal only carries what authorization needs
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return UserResponse.from_orm(user)
 
 @router.put("/me", response_model=UserResponse)
 async def update_user_profile(
     user_update: UserCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
 ):
     """Update user profile"""
     
-    current_user.name = user_update.name
-    current_user.phone = user_update.phone
-    current_user.address = user_update.address
-    current_user.city = user_update.city
-    current_user.state = user_update.state
-    current_user.zip_code = user_update.zip_code
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.name = user_update.name
+    user.phone = user_update.phone
+    user.address = user_update.address
+    user.city = user_update.city
+    user.state = user_update.state
+    user.zip_code = user_update.zip_code
     
-    # Update coordinates if location changed
-    if user_update.city and user_update.state:
-        current_user.latitude = 39.7817 + (hash(user_update.email) % 100) * 0.001
-        current_user.longitude = -89.6501 + (hash(user_update.email) % 100) * 0.001
+    # Keep the place names either way; only the coordinates depend on whether
+    # a map pin was sent or the ward centroid has to stand in for it
+    county = user_update.county or user_update.city
+    if county:
+        user.county = county
+        user.sub_county = user_update.subCounty or user_update.state
+        user.ward = user_update.ward
+    if user_update.latitude and user_update.longitude:
+        user.latitude, user.longitude = user_update.latitude, user_update.longitude
+    elif county:
+        place = gazetteer.resolve(user.county, user.sub_county, user.ward)
+        if place:
+            user.latitude, user.longitude = place.coordinates
     
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user)
+    await principals.invalidate(user.id)
     
-    return UserResponse.from_orm(current_user)
+    return UserResponse.from_orm(user)
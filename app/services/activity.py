@@ -0,0 +1,185 @@
+"""
+Client activity feed backed by the append-only activity_events table.
+
+Request handlers call activity_log.record() after their own commit; events are
+buffered in memory and a background task inserts them with one multi-row
+INSERT per ACTIVITY_FLUSH_SECONDS (or per ACTIVITY_BATCH_SIZE events), so a
+busy chat does not add a write per message. The buffer is flushed on
+shutdown; a crash loses at most one interval of feed entries, never chat or
+review data.
+
+Feed entries are best effort. While the database is unreachable they stay
+buffered, up to ACTIVITY_MAX_BUFFER (the oldest are dropped beyond that). A
+batch the database rejects is written again row by row, and the rows that
+still fail are dropped, so one bad event cannot block the rest.
+
+feed_query() reads a user's feed newest first with keyset pagination over
+(user_id, id).
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.database import SessionLocal, is_connection_error
+from app.models.activity import ActivityEvent
+
+REQUEST_CREATED = "request_created"
+PROVIDER_MATCHED = "provider_matched"
+MESSAGE_RECEIVED = "message_received"
+REVIEW_POSTED = "review_posted"
+PROVIDER_RESPONDED = "provider_responded"
+REQUEST_COMPLETED = "request_completed"
+REQUEST_CANCELLED = "request_cancelled"
+
+class ActivityLog:
+    """Buffers feed events and writes them in batches."""
+
+    def __init__(self, session_factory=SessionLocal, flush_seconds: Optional[float] = None,
+                 batch_size: Optional[int] = None, max_buffer: Optional[int] = None):
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds or settings.ACTIVITY_FLUSH_SECONDS
+        self.batch_size = batch_size or settings.ACTIVITY_BATCH_SIZE
+        self.max_buffer = max_buffer or settings.ACTIVITY_MAX_BUFFER
+        self.dropped = 0  # Events discarded because the buffer was full or the database rejected them
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()  # record() is also called from the chat writer's worker thread
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: Optional[int], event_type: str, description: str, **details):
+        """Queue an event for the user's feed (ignored for anonymous users)"""
+        if user_id is None:
+            return
+        row = {
+            "user_id": user_id,
+            "event_type": event_type,
+            "description": description,
+            "details": json.dumps(details, default=str) if details else None,
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            self._buffer.append(row)
+            self._trim()
+
+    def _trim(self):
+        # Caller holds the lock
+        excess = len(self._buffer) - self.max_buffer
+        if excess > 0:
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Insert everything buffered, batch_size rows per statement. Returns the number written."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        try:
+            self._insert(rows)
+        except Exception as e:
+            if is_connection_error(e):
+                self._requeue(rows)
+                raise
+            # Something in the batch was rejected: write the rows one at a time to isolate it
+            return self._insert_each(rows)
+        return len(rows)
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                db.execute(insert(ActivityEvent).values(rows[start:start + self.batch_size]))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_each(self, rows: List[Dict[str, Any]]) -> int:
+        written = 0
+        for n, row in enumerate(rows):
+            try:
+                self._insert([row])
+            except Exception as e:
+                if is_connection_error(e):
+                    self._requeue(rows[n:])
+                    raise
+                with self._lock:
+                    self.dropped += 1
+                print(f"Dropped activity event {row['event_type']} for user {row['user_id']}: {e}")
+                continue
+            written += 1
+        return written
+
+    def _requeue(self, rows: List[Dict[str, Any]]):
+        with self._lock:
+            # Keep the events (in order) for the next attempt, within the buffer cap
+            self._buffer[:0] = rows
+            self._trim()
+
+    async def run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"Activity flush failed ({self.pending()} events buffered, {self.dropped} dropped): {e}")
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            print(f"Activity shutdown flush failed: {e}")
+
+activity_log = ActivityLog()
+
+def get_activity_log() -> ActivityLog:
+    """Dependency returning the shared activity log (overridable in tests)"""
+    return activity_log
+
+def feed_query(db: Session, user_id: int, before_id: Optional[int] = None, limit: int = 20):
+    """A user's events newest first, as one range scan of the (user_id, id) index"""
+    query = db.query(
+        ActivityEvent.id,
+        ActivityEvent.event_type,
+        ActivityEvent.description,
+        ActivityEvent.details,
+        ActivityEvent.created_at
+    ).filter(ActivityEvent.user_id == user_id)
+    if before_id is not None:
+        query = query.filter(ActivityEvent.id < before_id)
+    return query.order_by(ActivityEvent.id.desc()).limit(limit)
+
+def feed_item(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "description": row.description,
+        "details": json.loads(row.details) if row.details else {},
+        "created_at": row.created_at,
+    }
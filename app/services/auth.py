@@ -1,15 +1,22 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import exists, select, update
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from app.database.database import engine, get_db
+from app.models.service_provider import ServiceProvider
 from app.models.user import User
 from app.core.config import settings
+from app.services.passwords import PasswordPool, make_context, password_pool
+from app.services.principals import (
+    Principal, PrincipalCache, ProviderPrincipal, get_principal_cache, principal_cache
+)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (synchronous; request handlers go through the password pool)
+pwd_context = make_context(settings.PASSWORD_BCRYPT_ROUNDS)
 
 # JWT settings
 SECRET_KEY = settings.SECRET_KEY if hasattr(settings, 'SECRET_KEY') else "your-secret-key-change-in-production"
@@ -17,6 +24,8 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
 security = HTTPBearer()
+# get_current_user() already insists on a token; this only reads it for the memoized "pid" claim
+token_reader = HTTPBearer(auto_error=False)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -34,7 +43,21 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
+def access_token_for(db: Session, user: User) -> str:
+    """Token for a signed-in user; provider accounts also carry their provider id (the "pid" claim)"""
+    data = {"sub": str(user.id)}
+    if user.user_type == "provider":
+        provider_id = db.scalar(select(ServiceProvider.id).where(ServiceProvider.user_id == user.id))
+        if provider_id is not None:
+            data["pid"] = provider_id
+    return create_access_token(data=data)
+
+def verify_token(token: str, cache: PrincipalCache = None):
+    """The token's subject (user id); claims are memoized per token after the first decode"""
+    cache = cache or principal_cache
+    user_id = cache.token_claims(token)
+    if user_id is not None:
+        return user_id
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
@@ -44,6 +67,7 @@ def verify_token(token: str):
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        cache.remember_token(token, user_id, payload.get("exp"), payload.get("pid"))
         return user_id
     except JWTError:
         raise HTTPException(
@@ -52,11 +76,9 @@ def verify_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    user_id = verify_token(credentials.credentials)
+def get_user_from_token(token: str, db: Session):
+    """Resolve a bearer token to a User (also used by WebSocket endpoints, which cannot send headers)"""
+    user_id = verify_token(token)
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
@@ -66,10 +88,94 @@ def get_current_user(
         )
     return user
 
-def authenticate_user(db: Session, email: str, password: str):
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
+) -> Principal:
+    """The caller as a cached Principal snapshot; the users row is only read on a cache miss"""
+    user_id = int(verify_token(credentials.credentials, principals))
+    principal = await principals.get(user_id)
+    if principal is None:
+        user = await run_in_threadpool(get_user_from_token, credentials.credentials, db)
+        principal = Principal.from_user(user)
+        await principals.put(principal)
+    return principal
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """The caller, if their account is listed in ADMIN_EMAILS"""
+    admins = {email.lower() for email in settings.ADMIN_EMAILS}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+def get_provider_from_user(db: Session, user, provider_id: int = None):
+    """
+    The ServiceProvider row of a provider account, through the user_id link.
+    Rows created before the link existed are matched by email once and linked.
+    """
+    if provider_id is not None:
+        provider = db.get(ServiceProvider, provider_id)
+        if provider is not None and provider.user_id == user.id:
+            return provider
+    provider = db.query(ServiceProvider).filter(ServiceProvider.user_id == user.id).first()
+    if provider is None:
+        provider = db.query(ServiceProvider).filter(
+            ServiceProvider.email == user.email, ServiceProvider.user_id.is_(None)
+        ).first()
+        if provider is not None:
+            provider.user_id = user.id
+            db.commit()
+    return provider
+
+async def get_current_provider(
+    current_user: Principal = Depends(get_current_user),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(token_reader),
+    db: Session = Depends(get_db),
+    principals: PrincipalCache = Depends(get_principal_cache)
+) -> ProviderPrincipal:
+    """The calling provider as a cached snapshot, found from the token's "pid" claim without a query when warm"""
+    if current_user.user_type != "provider":
+        raise HTTPException(status_code=403, detail="Provider access required")
+    token = credentials.credentials if credentials else None
+    provider_id = principals.token_provider_id(token) if token else None
+    provider = await principals.get_provider(provider_id) if provider_id is not None else None
+    if provider is None or provider.user_id != current_user.id:
+        row = await run_in_threadpool(get_provider_from_user, db, current_user, provider_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Provider profile not found")
+        provider = ProviderPrincipal.from_provider(row)
+        await principals.put_provider(provider)
+        if token:
+            principals.remember_token_provider(token, provider.id)
+    return provider
+
+def link_provider_accounts(bind=None) -> int:
+    """Backfill service_providers.user_id from the account with the same email; returns rows linked"""
+    bind = bind if bind is not None else engine
+    account = select(User.id).where(User.email == ServiceProvider.email)
+    with bind.begin() as conn:
+        result = conn.execute(
+            update(ServiceProvider)
+            .where(ServiceProvider.user_id.is_(None), exists(account))
+            .values(user_id=account.scalar_subquery())
+        )
+    return result.rowcount
+
+async def authenticate_user(db: Session, email: str, password: str, pool: PasswordPool = None):
+    """Check the password on the password pool, rehashing it if the bcrypt cost changed"""
     user = db.query(User).filter(User.email == email).first()
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    # Give the connection back to the pool while bcrypt runs; a burst of logins
+    # would otherwise hold every connection for the length of a hash
+    db.expunge(user)
+    db.rollback()
+    verified, new_hash = await (pool or password_pool).verify_and_update(password, user.password_hash)
+    if not verified:
         return False
+    if new_hash:
+        db.execute(update(User).where(User.id == user.id).values(password_hash=new_hash))
+        db.commit()
+        user.password_hash = new_hash
     return user
@@ -0,0 +1,270 @@
+"""
+Provider availability: weekly working hours plus booked intervals.
+
+Both are stored as small integers (minutes after midnight for hours, minutes
+since the epoch for bookings; local wall-clock time, East Africa Time has no
+DST). AvailabilityIndex keeps them in memory per process: working hours in a
+dict by provider and weekday, upcoming bookings in a centered interval tree,
+so "who is free Saturday 10:00-12:00" costs O(log n + k) in the number of
+bookings instead of a scan. The index is reloaded every
+AVAILABILITY_REFRESH_SECONDS; bookings and hours changed through this process
+are applied immediately.
+
+ServiceMatchingService.find_providers() uses it as a filter stage when a time
+window is requested.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.availability import ProviderBooking, ProviderHours
+
+EAT = timezone(timedelta(hours=3))
+EPOCH = datetime(1970, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+REBUILD_AFTER = 64  # Bookings added since the last tree build before rebuilding it
+
+Interval = Tuple[int, int, Tuple[int, int]]  # (start, end, (booking_id, provider_id))
+
+class BookingConflict(ValueError):
+    """The provider already has a booking overlapping the requested time"""
+
+def to_minute(moment: datetime) -> int:
+    """Local wall-clock minutes since the epoch (aware datetimes are converted to EAT)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(EAT).replace(tzinfo=None)
+    return int((moment - EPOCH).total_seconds() // 60)
+
+def from_minute(minute: int) -> datetime:
+    return EPOCH + timedelta(minutes=minute)
+
+def parse_clock(value: str) -> int:
+    """'HH:MM' -> minutes after midnight ('24:00' allowed as an end time)"""
+    hours, minutes = value.split(":")
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= MINUTES_PER_DAY or not 0 <= int(minutes) < 60:
+        raise ValueError(f"Invalid time of day: {value}")
+    return minute
+
+def format_clock(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+class IntervalTree:
+    """
+    Static centered interval tree over half-open [start, end) intervals.
+    Each node keeps the intervals containing its center sorted both ways, so
+    an overlap query visits one root-to-leaf path plus the matches.
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals: List[Interval]) -> Optional[_Node]:
+        if not intervals:
+            return None
+        starts = sorted(start for start, _, _ in intervals)
+        node = _Node()
+        node.center = starts[len(starts) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= node.center:
+                left.append(interval)
+            elif start > node.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        node.by_start = sorted(here, key=lambda interval: interval[0])
+        node.by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def intervals(self) -> List[Interval]:
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is not None:
+                found.extend(node.by_start)
+                stack.extend((node.left, node.right))
+        return found
+
+    def overlapping(self, start: int, end: int) -> List[Interval]:
+        """Intervals overlapping [start, end)"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                # Node intervals all end after the window; they overlap if they start before its end
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    found.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                # Node intervals all start before the window; they overlap if they end after its start
+                for interval in node.by_end:
+                    if interval[1] <= start:
+                        break
+                    found.append(interval)
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return found
+
+class AvailabilityIndex:
+    """Per-process index of working hours and upcoming bookings."""
+
+    def __init__(self, refresh_seconds: Optional[float] = None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.AVAILABILITY_REFRESH_SECONDS
+        self._hours: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+        self._tree = IntervalTree()
+        self._pending: List[Interval] = []  # Added since the tree was built
+        self._removed: Set[int] = set()  # Booking ids deleted since the tree was built
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        """(Re)load working hours and bookings that have not ended yet"""
+        hours: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+        for row in db.query(ProviderHours.provider_id, ProviderHours.weekday,
+                            ProviderHours.start_minute, ProviderHours.end_minute):
+            hours.setdefault(row.provider_id, {}).setdefault(row.weekday, []).append((row.start_minute, row.end_minute))
+
+        now = to_minute(datetime.now(EAT))
+        bookings = db.query(
+            ProviderBooking.id, ProviderBooking.provider_id, ProviderBooking.start_minute, ProviderBooking.end_minute
+        ).filter(ProviderBooking.end_minute > now)
+        tree = IntervalTree((row.start_minute, row.end_minute, (row.id, row.provider_id)) for row in bookings)
+
+        with self._lock:
+            self._hours = hours
+            self._tree = tree
+            self._pending = []
+            self._removed = set()
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.load(db)
+
+    def set_hours(self, provider_id: int, blocks: Sequence[Tuple[int, int, int]]):
+        """Replace a provider's weekly hours with (weekday, start_minute, end_minute) blocks"""
+        by_day: Dict[int, List[Tuple[int, int]]] = {}
+        for weekday, start, end in blocks:
+            by_day.setdefault(weekday, []).append((start, end))
+        with self._lock:
+            self._hours[provider_id] = by_day
+
+    def add_booking(self, booking_id: int, provider_id: int, start: int, end: int):
+        with self._lock:
+            self._pending.append((start, end, (booking_id, provider_id)))
+            if len(self._pending) > REBUILD_AFTER:
+                self._rebuild()
+
+    def remove_booking(self, booking_id: int):
+        with self._lock:
+            self._removed.add(booking_id)
+            if len(self._removed) > REBUILD_AFTER:
+                self._rebuild()
+
+    def _rebuild(self):
+        # Caller holds the lock
+        intervals = self._tree.intervals() + self._pending
+        self._tree = IntervalTree(interval for interval in intervals if interval[2][0] not in self._removed)
+        self._pending = []
+        self._removed = set()
+
+    def busy(self, start: int, end: int) -> Set[int]:
+        """Providers with a booking overlapping [start, end)"""
+        with self._lock:
+            hits = self._tree.overlapping(start, end)
+            hits += [interval for interval in self._pending if interval[0] < end and interval[1] > start]
+            return {provider_id for _, _, (booking_id, provider_id) in hits if booking_id not in self._removed}
+
+    def works(self, provider_id: int, start: int, end: int) -> bool:
+        """True if [start, end) lies inside the provider's working hours (day by day)"""
+        days = self._hours.get(provider_id)
+        if not days:
+            return False
+        while start < end:
+            day_start = start - start % MINUTES_PER_DAY
+            weekday = from_minute(day_start).weekday()
+            segment_end = min(end, day_start + MINUTES_PER_DAY)
+            first, last = start - day_start, segment_end - day_start
+            if not any(block_start <= first and last <= block_end for block_start, block_end in days.get(weekday, ())):
+                return False
+            start = segment_end
+        return True
+
+    def available(self, db: Session, provider_ids: Iterable[int], start: datetime, end: datetime) -> Set[int]:
+        """Which of provider_ids work during [start, end) and have no booking in it"""
+        self.ensure_loaded(db)
+        first, last = to_minute(start), to_minute(end)
+        taken = self.busy(first, last)
+        return {provider_id for provider_id in provider_ids
+                if provider_id not in taken and self.works(provider_id, first, last)}
+
+availability_index = AvailabilityIndex()
+
+def get_availability_index() -> AvailabilityIndex:
+    """Dependency returning the shared availability index (overridable in tests)"""
+    return availability_index
+
+def set_working_hours(db: Session, provider_id: int, blocks: Sequence[Tuple[int, int, int]]):
+    """Replace the provider's weekly hours. Does not commit."""
+    for weekday, start, end in blocks:
+        if not 0 <= weekday <= 6 or not 0 <= start < end <= MINUTES_PER_DAY:
+            raise ValueError(f"Invalid working hours block: {weekday} {format_clock(start)}-{format_clock(end)}")
+    db.query(ProviderHours).filter(ProviderHours.provider_id == provider_id).delete(synchronize_session=False)
+    db.add_all([
+        ProviderHours(provider_id=provider_id, weekday=weekday, start_minute=start, end_minute=end)
+        for weekday, start, end in blocks
+    ])
+
+def add_booking(db: Session, provider_id: int, start: datetime, end: datetime,
+                request_id: Optional[int] = None) -> ProviderBooking:
+    """Book the provider for [start, end); raises BookingConflict on overlap. Does not commit."""
+    first, last = to_minute(start), to_minute(end)
+    if last <= first:
+        raise ValueError("A booking must end after it starts")
+    # One range scan of the provider's bookings (ix_provider_bookings_provider)
+    clash = db.query(ProviderBooking.id).filter(
+        ProviderBooking.provider_id == provider_id,
+        ProviderBooking.start_minute < last,
+        ProviderBooking.end_minute > first
+    ).first()
+    if clash:
+        raise BookingConflict("The provider is already booked at that time")
+    booking = ProviderBooking(provider_id=provider_id, start_minute=first, end_minute=last, request_id=request_id)
+    db.add(booking)
+    db.flush()
+    return booking
+
+def remove_booking(db: Session, provider_id: int, booking_id: int) -> bool:
+    """Delete one of the provider's bookings. Does not commit."""
+    return db.query(ProviderBooking).filter(
+        ProviderBooking.id == booking_id, ProviderBooking.provider_id == provider_id
+    ).delete(synchronize_session=False) == 1
+
+def booking_item(booking: ProviderBooking) -> dict:
+    return {
+        "id": booking.id,
+        "start": from_minute(booking.start_minute),
+        "end": from_minute(booking.end_minute),
+        "request_id": booking.request_id,
+    }
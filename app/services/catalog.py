@@ -0,0 +1,185 @@
+"""
+The service catalog: one data file, frozen lookups, precomputed responses.
+
+app/data/service_catalog.json is the single source of truth for categories
+and services. It is loaded once into a ServiceCatalog, whose lookups are
+all dictionary reads: service by id, services by category, and a bit per
+category. A provider's categories and services fold into one integer
+(ServiceProvider.category_mask), so matching tests a bit instead of
+searching JSON text. static/js/service-catalog.js is generated from the
+same file (generate_service_catalog_js.py).
+
+Catalog endpoints used to rebuild their payloads (the ~50-service list, the
+grouped categories) on every call, and the frontend asks for them on every
+page load. CatalogDocument serializes a payload once at import, gzips it
+once, and names it by a hash of its content. Responses carry that hash as a
+strong ETag, so a revalidation is answered with 304 and no body. The same
+document is also served under a versioned URL (.../{version}) with
+"Cache-Control: immutable": the version changes whenever the content does,
+so browsers may keep it forever. /api/catalog lists the current versioned URLs.
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.services.problem_detector import CategoryOrganizer
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / "data" / "service_catalog.json"
+
+@dataclass(frozen=True)
+class Service:
+    id: str
+    name: str
+    description: str
+    category: str
+    typical_rate: Optional[float] = None
+    urgency_keywords: Tuple[str, ...] = ()
+
+class ServiceCatalog:
+    """
+    Frozen lookups over the catalog data file: id -> service,
+    category -> services, and category/service -> bit. Each category's bit
+    is fixed in the data file because provider masks are stored in the
+    database. Legacy category ids (the problem detector's taxonomy) resolve
+    through "aliases".
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.categories: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+            {category_id: MappingProxyType(info) for category_id, info in data["categories"].items()}
+        )
+        self.aliases: Mapping[str, str] = MappingProxyType(dict(data.get("aliases", {})))
+        self.services: Tuple[Service, ...] = tuple(
+            Service(**{**service, "urgency_keywords": tuple(service.get("urgency_keywords", ()))})
+            for service in data["services"]
+        )
+
+        self.category_bits: Mapping[str, int] = MappingProxyType(
+            {category_id: 1 << info["bit"] for category_id, info in self.categories.items()}
+        )
+        if len(set(self.category_bits.values())) != len(self.category_bits):
+            raise ValueError("Catalog categories must have distinct bits")
+        unknown = {service.category for service in self.services} - set(self.categories)
+        if unknown:
+            raise ValueError(f"Catalog services use unknown categories: {', '.join(sorted(unknown))}")
+
+        self.by_id: Mapping[str, Service] = MappingProxyType({service.id: service for service in self.services})
+        if len(self.by_id) != len(self.services):
+            raise ValueError("Catalog service ids must be unique")
+        grouped: Dict[str, list] = {category_id: [] for category_id in self.categories}
+        for service in self.services:
+            grouped[service.category].append(service)
+        self.by_category: Mapping[str, Tuple[Service, ...]] = MappingProxyType(
+            {category_id: tuple(services) for category_id, services in grouped.items()}
+        )
+        self.service_bits: Mapping[str, int] = MappingProxyType(
+            {service.id: self.category_bits[service.category] for service in self.services}
+        )
+
+    @classmethod
+    def load(cls, path: Path = CATALOG_PATH) -> "ServiceCatalog":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def service(self, service_id: str) -> Optional[Service]:
+        return self.by_id.get(service_id)
+
+    def canonical_category(self, category: str) -> str:
+        return self.aliases.get(category, category)
+
+    def category_bit(self, category: str) -> int:
+        """The category's bit (0 for ids the catalog does not know)"""
+        return self.category_bits.get(self.canonical_category(category), 0)
+
+    def mask(self, ids: Iterable[str]) -> int:
+        """Bitmask of the categories named by a mix of category and service ids"""
+        mask = 0
+        for item in ids:
+            mask |= self.category_bit(item) or self.service_bits.get(item, 0)
+        return mask
+
+    def api_payload(self) -> Dict[str, Any]:
+        """The /api/services/categories shape: a flat service list and category names"""
+        return {
+            "services": [asdict(service) for service in self.services],
+            "categories": {category_id: info["name"] for category_id, info in self.categories.items()}
+        }
+
+catalog = ServiceCatalog.load()
+
+def category_mask(*json_lists: Optional[str]) -> int:
+    """Mask for ServiceProvider.categories/services (JSON lists, or legacy comma-separated text)"""
+    ids = []
+    for value in json_lists:
+        if not value:
+            continue
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = value.split(",")
+        if isinstance(parsed, str):
+            parsed = [parsed]
+        ids.extend(str(item).strip() for item in parsed if item)
+    return catalog.mask(ids)
+
+# Unversioned URLs are revalidated on every use; versioned ones never change
+REVALIDATE = "public, no-cache"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+class CatalogDocument:
+    """A JSON payload serialized, compressed and hashed once"""
+
+    def __init__(self, payload: Any, path: str):
+        self.body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), ensure_ascii=False).encode()
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.version = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.gzip_etag = f'"{self.version}-gz"'  # A strong validator names one representation, so each coding has its own
+        self.path = path
+
+    @property
+    def versioned_path(self) -> str:
+        return f"{self.path}/{self.version}"
+
+    def not_modified(self, request: Request) -> bool:
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        # If-None-Match uses the weak comparison, so W/"..." matches too
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        # Either coding's tag: both name the same version of the catalog
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
+
+    def response(self, request: Request, immutable: bool = False) -> Response:
+        gzipped = "gzip" in request.headers.get("accept-encoding", "")
+        headers = {
+            "ETag": self.gzip_etag if gzipped else self.etag,
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+            "Content-Location": self.versioned_path
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+    def versioned_response(self, request: Request, version: str) -> Optional[Response]:
+        """The immutable response for this version, or None if the catalog has moved on"""
+        return self.response(request, immutable=True) if version == self.version else None
+
+service_catalog = CatalogDocument(catalog.api_payload(), "/api/services/categories")
+category_groups = CatalogDocument(CategoryOrganizer.get_category_groups(), "/api/problems/categories")
+
+def catalog_manifest() -> Dict[str, str]:
+    """Current versioned URLs, for clients that want to cache catalogs indefinitely"""
+    return {"services": service_catalog.versioned_path, "category_groups": category_groups.versioned_path}
@@ -0,0 +1,210 @@
+"""
+Real-time chat fan-out over Redis pub/sub.
+
+Every chat thread (session_id + client + provider_id) has a Redis channel. A worker
+publishes each persisted message and every receipt to that channel, and each
+worker's ChatHub holds a single pub/sub connection that forwards events to the
+sockets it has open locally. Sockets on different uvicorn workers therefore see
+the same stream without talking to each other.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import redis_client
+from app.models.service_provider import ChatMessage
+from app.services.conversations import record_message, record_read
+
+CHANNEL_PREFIX = "chat"
+LISTENER_QUEUE_SIZE = 256  # Events buffered per socket before a slow reader starts losing them
+
+# Long-poll sync
+SYNC_MAX_TIMEOUT_SECONDS = 30
+SYNC_POLL_SECONDS = 1.0      # Re-check interval without a pub/sub subscription
+SYNC_RECHECK_SECONDS = 5.0   # Safety re-check with one (covers replica lag and dropped events)
+
+def channel_for(session_id: str, client_id: int, provider_id: int) -> str:
+    # The client is part of the key: a session id alone does not identify whose thread it is
+    return f"{CHANNEL_PREFIX}:{session_id}:{client_id}:{provider_id}"
+
+def message_event(message: ChatMessage, sender_name: str, client_msg_id: Optional[str] = None) -> Dict[str, Any]:
+    """Shape of a message event; matches ChatMessageResponse plus routing fields."""
+    return {
+        "type": "message",
+        "id": message.id,
+        "client_msg_id": client_msg_id,
+        "session_id": message.session_id,
+        "provider_id": message.provider_id,
+        "sender_type": message.sender_type,
+        "message_text": message.message_text,
+        "created_at": message.created_at.isoformat() if message.created_at else None,
+        "sender_name": sender_name,
+    }
+
+def save_message(db: Session, session_id: str, user_id: int, provider_id: int,
+                 sender_type: str, text: str, client_msg_id: Optional[str] = None) -> ChatMessage:
+    """Insert a message and update its conversation summary in one transaction"""
+    if client_msg_id:
+        # A retried send returns the message that was already stored
+        existing = db.query(ChatMessage).filter(
+            *_thread_filter(session_id, user_id, provider_id, sender_type),
+            ChatMessage.client_msg_id == client_msg_id
+        ).first()
+        if existing is not None:
+            return existing
+
+    message = ChatMessage(
+        session_id=session_id,
+        user_id=user_id,
+        provider_id=provider_id,
+        sender_type=sender_type,
+        message_text=text,
+        client_msg_id=client_msg_id,
+        created_at=datetime.utcnow()
+    )
+    db.add(message)
+    record_message(db, message)
+    db.commit()
+    db.refresh(message)
+    return message
+
+def _thread_filter(session_id: str, user_id: int, provider_id: int, sender_type: str):
+    return (
+        ChatMessage.session_id == session_id,
+        ChatMessage.user_id == user_id,
+        ChatMessage.provider_id == provider_id,
+        ChatMessage.sender_type == sender_type,
+    )
+
+def mark_delivered(db: Session, session_id: str, user_id: int, provider_id: int,
+                   sender_type: str, message_id: int) -> int:
+    """Stamp delivered_at on one message written by sender_type (no-op if already stamped)."""
+    result = db.execute(
+        update(ChatMessage).where(
+            ChatMessage.id == message_id,
+            ChatMessage.delivered_at.is_(None),
+            *_thread_filter(session_id, user_id, provider_id, sender_type)
+        ).values(delivered_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount
+
+def mark_read(db: Session, session_id: str, user_id: int, provider_id: int,
+              sender_type: str, up_to_id: int) -> int:
+    """Mark every unread message from sender_type up to up_to_id as read in one UPDATE."""
+    # Reading a message implies it was delivered; keep an earlier delivery time if there is one
+    delivered_at = func.coalesce(ChatMessage.delivered_at, datetime.utcnow())
+    result = db.execute(
+        update(ChatMessage).where(
+            ChatMessage.id <= up_to_id,
+            ChatMessage.is_read.isnot(True),
+            *_thread_filter(session_id, user_id, provider_id, sender_type)
+        ).values(is_read=True, delivered_at=delivered_at),
+        execution_options={"synchronize_session": False}
+    )
+    reader_type = "provider" if sender_type == "user" else "user"
+    record_read(db, session_id, user_id, provider_id, reader_type, result.rowcount)
+    db.commit()
+    return result.rowcount
+
+async def wait_for_chat_event(queue: Optional[asyncio.Queue], timeout: float):
+    """Sleep until a chat event arrives on queue or the (capped) timeout passes"""
+    if queue is None:
+        await asyncio.sleep(min(timeout, SYNC_POLL_SECONDS))
+        return
+    try:
+        await asyncio.wait_for(queue.get(), timeout=min(timeout, SYNC_RECHECK_SECONDS))
+    except asyncio.TimeoutError:
+        pass
+
+class ChatHub:
+    """One Redis pub/sub connection per worker, multiplexed across local sockets."""
+
+    def __init__(self, redis=None):
+        self.redis = redis or redis_client
+        self._pubsub = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def publish(self, channel: str, event: Dict[str, Any]):
+        await self.redis.publish(channel, json.dumps(event, default=str))
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            if not self._listeners[channel]:
+                await self._pubsub.subscribe(channel)
+            self._listeners[channel].add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        async with self._lock:
+            listeners = self._listeners.get(channel)
+            if listeners is None:
+                return
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[channel]
+                if self._pubsub is not None:
+                    await self._pubsub.unsubscribe(channel)
+
+    async def _read_loop(self):
+        while self._listeners:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Chat hub read error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                event = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+
+            for queue in list(self._listeners.get(channel, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    print(f"Chat hub dropped an event for a slow socket on {channel}")
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._listeners.clear()
+
+chat_hub = ChatHub()
+
+def get_chat_hub() -> ChatHub:
+    """Dependency returning this worker's hub (overridable in tests)"""
+    return chat_hub
+
+async def publish_chat_event(hub: ChatHub, channel: str, event: Dict[str, Any]):
+    """Publish to a chat channel; a Redis outage must not fail a message that is already saved"""
+    try:
+        await hub.publish(channel, event)
+    except Exception as e:
+        print(f"Chat publish failed for {channel}: {e}")
@@ -0,0 +1,371 @@
+"""
+Write-behind persistence for chat messages.
+
+With CHAT_WRITE_BEHIND enabled a message is acknowledged as soon as it is
+appended to a Redis Stream (AOF-backed Redis makes that durable); the live
+event is published in the same MULTI so sockets see it immediately. A single
+background writer per deployment, elected with a Redis lease, reads the stream
+through a consumer group and stores messages with one multi-row INSERT per
+batch:
+
+- ordering: one writer at a time, entries inserted in stream order, so message
+  ids follow send order; created_at is the time the message was acknowledged.
+  The lease is renewed and released with compare-and-set scripts, and renewed
+  again right before each commit, so a writer that lost it while a slow batch
+  ran rolls back instead of committing next to its successor.
+- idempotency: every entry carries a client_msg_id, unique per thread and side,
+  and the INSERT skips keys that already exist, so redelivery and client
+  retries are safe.
+- crash recovery: entries are XACKed only after the commit; a new writer first
+  claims everything still pending in the group before reading new entries.
+  Another consumer's entries are only claimed once they have been idle for a
+  full lease, so entries still in flight are never stored twice at once.
+- poison entries: a batch that was delivered before is stored one entry at a
+  time, so one bad entry cannot hold back the rest. An entry that keeps failing
+  for a reason other than a lost database connection is moved to the
+  dead-letter stream ("<stream>:dead") and XACKed after
+  CHAT_WRITE_MAX_DELIVERIES attempts.
+
+Once a batch is stored the writer publishes "stored" events so clients learn
+database ids (used for read receipts and sync cursors).
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.database.database import SessionLocal, dialect_insert, is_connection_error
+from app.models.service_provider import ChatMessage
+from app.services.activity import MESSAGE_RECEIVED, ActivityLog, activity_log
+from app.services.chat import ChatHub, channel_for, message_event, publish_chat_event, save_message
+from app.services.conversations import record_messages
+from app.services.unread import UnreadCounters, UnreadDelta, pop_unread_deltas, unread_counters
+
+WRITER_GROUP = "chat-writers"
+LEASE_KEY = "chat:writer:lease"
+LEASE_MS = 10000
+
+# Compare-and-set on the lease holder, so a writer never extends or drops a lease it lost
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class LeaseLost(RuntimeError):
+    """Another writer holds the lease; the batch must not be committed"""
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+# Columns of the unique index on chat_messages that makes a send idempotent
+IDEMPOTENCY_COLUMNS = ("session_id", "user_id", "provider_id", "sender_type", "client_msg_id")
+
+def _insert_ignoring_duplicates(db: Session):
+    insert = dialect_insert(db.get_bind())
+    return insert(ChatMessage).on_conflict_do_nothing(index_elements=list(IDEMPOTENCY_COLUMNS))
+
+def _idempotency_key(row) -> tuple:
+    if isinstance(row, dict):
+        return tuple(row[name] for name in IDEMPOTENCY_COLUMNS)
+    return tuple(getattr(row, name) for name in IDEMPOTENCY_COLUMNS)
+
+def _row_from_fields(fields: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "session_id": fields["session_id"],
+        "user_id": int(fields["user_id"]),
+        "provider_id": int(fields["provider_id"]),
+        "sender_type": fields["sender_type"],
+        "message_text": fields["message_text"],
+        "client_msg_id": fields["client_msg_id"],
+        "created_at": datetime.fromisoformat(fields["created_at"]),
+    }
+
+class ChatWriter:
+    """Appends messages to the chat stream and drains it into chat_messages."""
+
+    def __init__(self, redis=None, session_factory=SessionLocal, stream: Optional[str] = None,
+                 batch_size: Optional[int] = None, block_ms: Optional[int] = None,
+                 maxlen: Optional[int] = None, consumer: Optional[str] = None,
+                 activity: Optional[ActivityLog] = None, max_deliveries: Optional[int] = None,
+                 lease_ms: Optional[int] = None):
+        self.redis = redis or redis_client
+        self.session_factory = session_factory
+        self.stream = stream or settings.CHAT_STREAM_KEY
+        self.dead_letter_stream = f"{self.stream}:dead"
+        self.max_deliveries = max_deliveries or settings.CHAT_WRITE_MAX_DELIVERIES
+        self.batch_size = batch_size or settings.CHAT_WRITE_BATCH_SIZE
+        self.block_ms = block_ms or settings.CHAT_WRITE_BLOCK_MS
+        self.maxlen = maxlen or settings.CHAT_STREAM_MAXLEN
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_ms = lease_ms or LEASE_MS
+        self._renew_lease = self.redis.register_script(RENEW_LEASE_SCRIPT)
+        self._release_lease = self.redis.register_script(RELEASE_LEASE_SCRIPT)
+        self.counters = UnreadCounters(self.redis)
+        self.activity = activity or activity_log
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def append(self, session_id: str, user_id: int, provider_id: int, sender_type: str,
+                     text: str, sender_name: str, client_msg_id: Optional[str] = None) -> Dict[str, Any]:
+        """Durably queue a message and publish its live event; returns the event (id is None until stored)"""
+        created_at = datetime.utcnow()
+        client_msg_id = client_msg_id or uuid.uuid4().hex
+        fields = {
+            "session_id": session_id,
+            "user_id": str(user_id),
+            "provider_id": str(provider_id),
+            "sender_type": sender_type,
+            "message_text": text,
+            "client_msg_id": client_msg_id,
+            "created_at": created_at.isoformat(),
+            "sender_name": sender_name,
+        }
+        event = message_event(ChatMessage(**_row_from_fields(fields)), sender_name, client_msg_id)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.stream, fields, maxlen=self.maxlen, approximate=True)
+            pipe.publish(channel_for(session_id, user_id, provider_id), json.dumps(event, default=str))
+            stream_id, _ = await pipe.execute()
+
+        event["stream_id"] = stream_id
+        return event
+
+    def persist(self, entries: List[StreamEntry],
+                before_commit: Optional[Callable[[], None]] = None) -> Tuple[List[Dict[str, Any]], List[UnreadDelta]]:
+        """
+        Store a batch in one transaction; returns "stored" events for new rows and
+        unread changes. before_commit runs last and may raise to roll the batch back.
+        """
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        sender_names: Dict[tuple, str] = {}
+        for _, fields in entries:
+            row = _row_from_fields(fields)
+            rows.setdefault(_idempotency_key(row), row)
+            sender_names.setdefault(_idempotency_key(row), fields.get("sender_name", ""))
+
+        db = self.session_factory()
+        try:
+            # One multi-row INSERT in stream order; redelivered or retried messages are skipped
+            inserted = db.execute(
+                _insert_ignoring_duplicates(db).values(list(rows.values())).returning(
+                    ChatMessage.id, *[getattr(ChatMessage, name) for name in IDEMPOTENCY_COLUMNS]
+                )
+            ).all()
+            ids = {_idempotency_key(row): row.id for row in inserted}
+
+            new_messages = [ChatMessage(id=ids[key], **row) for key, row in rows.items() if key in ids]
+            record_messages(db, new_messages)
+            if before_commit is not None:
+                before_commit()
+            db.commit()
+            unread_deltas = pop_unread_deltas(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for message in new_messages:
+            record_message_activity(self.activity, message, sender_names[_idempotency_key(message)])
+        stored = [
+            {
+                "type": "stored",
+                "id": message.id,
+                "client_msg_id": message.client_msg_id,
+                "session_id": message.session_id,
+                "user_id": message.user_id,
+                "provider_id": message.provider_id,
+                "sender_type": message.sender_type,
+            }
+            for message in new_messages
+        ]
+        return stored, unread_deltas
+
+    async def ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.stream, WRITER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def acquire_lease(self) -> bool:
+        """Only the lease holder writes, which keeps inserts in stream order"""
+        if await self.redis.set(LEASE_KEY, self.consumer, nx=True, px=self.lease_ms):
+            return True
+        return await self.renew_lease()
+
+    async def renew_lease(self) -> bool:
+        """Extend the lease if we still hold it"""
+        return bool(await self._renew_lease(keys=[LEASE_KEY], args=[self.consumer, self.lease_ms]))
+
+    async def release_lease(self):
+        await self._release_lease(keys=[LEASE_KEY], args=[self.consumer])
+
+    def _hold_lease_from_thread(self, loop: asyncio.AbstractEventLoop):
+        """before_commit hook for persist(), which runs in a worker thread"""
+        if not asyncio.run_coroutine_threadsafe(self.renew_lease(), loop).result():
+            raise LeaseLost(f"{self.consumer} lost the chat writer lease")
+
+    async def _claim_pending(self) -> Tuple[List[StreamEntry], Dict[str, int], bool]:
+        """
+        Claim what is still pending in the group (read by a writer that crashed,
+        or by us before a failed commit), with the attempt each entry is now on.
+        The flag is True while older entries are still in another writer's hands.
+        """
+        pending = await self.redis.xpending_range(self.stream, WRITER_GROUP, min="-", max="+", count=self.batch_size)
+        # Our own entries can be retried now; another writer's only once it has
+        # been silent for a whole lease, i.e. it can no longer commit them
+        ready = []
+        for item in pending:
+            if item["consumer"] != self.consumer and item["time_since_delivered"] < self.lease_ms:
+                break  # Claiming past it would store entries out of order
+            ready.append(item)
+        in_flight = len(ready) < len(pending)
+        if not ready:
+            return [], {}, in_flight
+        # XPENDING counts earlier deliveries; this claim is one more
+        attempts = {item["message_id"]: item["times_delivered"] + 1 for item in ready}
+        claimed = await self.redis.xclaim(
+            self.stream, WRITER_GROUP, self.consumer, min_idle_time=0, message_ids=list(attempts)
+        )
+        entries = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        # Entries trimmed from the stream while pending can never be stored
+        gone = set(attempts) - {entry_id for entry_id, _ in entries}
+        if gone:
+            await self.redis.xack(self.stream, WRITER_GROUP, *gone)
+        return entries, attempts, in_flight
+
+    async def _store(self, entries: List[StreamEntry]):
+        if not await self.renew_lease():
+            raise LeaseLost(f"{self.consumer} does not hold the chat writer lease")
+        hold_lease = partial(self._hold_lease_from_thread, asyncio.get_running_loop())
+        stored, unread_deltas = await asyncio.to_thread(self.persist, entries, hold_lease)
+        await self.redis.xack(self.stream, WRITER_GROUP, *[entry_id for entry_id, _ in entries])
+        await self.counters.apply(unread_deltas)
+
+        for event in stored:
+            await publish_chat_event(self, channel_for(event["session_id"], event["user_id"], event["provider_id"]), event)
+
+    async def _dead_letter(self, entry: StreamEntry, error: Exception):
+        entry_id, fields = entry
+        print(f"Chat writer gave up on stream entry {entry_id}: {error}")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_stream, {**fields, "stream_id": entry_id, "error": str(error)[:500]},
+                      maxlen=self.maxlen, approximate=True)
+            pipe.xack(self.stream, WRITER_GROUP, entry_id)
+            await pipe.execute()
+
+    async def drain_once(self, block_ms: Optional[int] = None) -> int:
+        """Persist one batch (pending entries first). Returns the number of stream entries handled."""
+        entries, attempts, in_flight = await self._claim_pending()
+        if not entries and in_flight:
+            # Wait for the other writer's commit (or its lease) before reading anything newer
+            await asyncio.sleep((block_ms or 0) / 1000)
+            return 0
+        if not entries:
+            response = await self.redis.xreadgroup(
+                WRITER_GROUP, self.consumer, {self.stream: ">"}, count=self.batch_size, block=block_ms
+            )
+            entries = response[0][1] if response else []
+            if entries:
+                await self._store(entries)
+            return len(entries)
+
+        # Pending entries failed (or were orphaned) before: store them one by one to isolate a bad one
+        for entry in entries:
+            try:
+                await self._store([entry])
+            except Exception as e:
+                if isinstance(e, LeaseLost) or is_connection_error(e) or attempts[entry[0]] < self.max_deliveries:
+                    raise  # Retried on a later pass; the entries after it wait, which keeps them in order
+                await self._dead_letter(entry, e)
+        return len(entries)
+
+    async def publish(self, channel: str, event: Dict[str, Any]):
+        await self.redis.publish(channel, json.dumps(event, default=str))
+
+    async def run(self):
+        await self.ensure_group()
+        while not self._stop.is_set():
+            try:
+                if not await self.acquire_lease():
+                    await asyncio.sleep(self.lease_ms / 2000)  # Standby until the current writer goes away
+                    continue
+                await self.drain_once(self.block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Chat writer error: {e}")
+                await asyncio.sleep(1.0)
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Finish the current batch, flush what is left if we hold the lease, then release it"""
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        try:
+            if await self.renew_lease():
+                while await self.drain_once():
+                    pass
+                await self.release_lease()
+        except Exception as e:
+            print(f"Chat writer shutdown flush failed: {e}")
+
+chat_writer = ChatWriter()
+
+def get_chat_writer() -> Optional[ChatWriter]:
+    """Dependency: the writer when write-behind is enabled, else None (overridable in tests)"""
+    return chat_writer if settings.CHAT_WRITE_BEHIND else None
+
+def record_message_activity(activity: ActivityLog, message: ChatMessage, sender_name: str):
+    """Provider replies show up in the client's activity feed"""
+    if message.sender_type == "provider":
+        activity.record(
+            message.user_id, MESSAGE_RECEIVED, f"New message from {sender_name or 'your provider'}",
+            session_id=message.session_id, provider_id=message.provider_id, message_id=message.id
+        )
+
+async def post_message(db: Session, hub: ChatHub, writer: Optional[ChatWriter], session_id: str,
+                       user_id: int, provider_id: int, sender_type: str, text: str, sender_name: str,
+                       client_msg_id: Optional[str] = None, counters: Optional[UnreadCounters] = None,
+                       activity: Optional[ActivityLog] = None) -> Dict[str, Any]:
+    """
+    Send a chat message through the configured path and return its live event.
+
+    With a writer the message is queued on the stream (id is None until stored);
+    if Redis is unavailable, or write-behind is off, it is saved synchronously.
+    """
+    if writer is not None:
+        try:
+            return await writer.append(session_id, user_id, provider_id, sender_type, text, sender_name, client_msg_id)
+        except Exception as e:
+            print(f"Chat stream append failed, saving synchronously: {e}")
+
+    message = save_message(db, session_id, user_id, provider_id, sender_type, text, client_msg_id)
+    await (counters or unread_counters).apply(pop_unread_deltas(db))
+    record_message_activity(activity or activity_log, message, sender_name)
+    event = message_event(message, sender_name, message.client_msg_id)
+    await publish_chat_event(hub, channel_for(session_id, user_id, provider_id), event)
+    return event
@@ -0,0 +1,219 @@
+"""
+Conversation summaries kept in step with chat_messages.
+
+record_message() and record_read() run inside the caller's transaction, right
+next to the ChatMessage insert or read-receipt UPDATE, so the denormalized
+last_message and unread counters can never disagree with a committed message.
+mark_conversations_read() clears an owner's unread messages with set-based UPDATEs.
+inbox_query() serves client and provider inboxes with one indexed query.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.conversation import Conversation, UnreadTotal
+from app.models.service_provider import ChatMessage, ServiceProvider
+from app.models.user import User
+from app.services.provider_stats import record_chat_turn
+from app.services.unread import change_unread
+
+PREVIEW_LENGTH = 200  # Characters of the last message kept on the conversation
+
+def get_or_create_conversation(db: Session, session_id: str, client_id: int, provider_id: int,
+                               **fields) -> Conversation:
+    """Find the thread's conversation or create it (safe against concurrent first messages)"""
+    thread = dict(session_id=session_id, client_id=client_id, provider_id=provider_id)
+    conversation = db.query(Conversation).filter_by(**thread).first()
+    if conversation is not None:
+        return conversation
+
+    try:
+        with db.begin_nested():
+            conversation = Conversation(**thread, **fields)
+            db.add(conversation)
+    except IntegrityError:
+        # Another request created it first
+        conversation = db.query(Conversation).filter_by(**thread).one()
+    return conversation
+
+def record_message(db: Session, message: ChatMessage) -> Conversation:
+    """Fold a new (unflushed or flushed) message into its conversation's summary. Does not commit."""
+    return record_messages(db, [message])[0]
+
+def record_messages(db: Session, messages: Sequence[ChatMessage]) -> List[Conversation]:
+    """
+    Fold a batch of new messages (in send order) into their conversations with one
+    UPDATE per thread. Does not commit.
+    """
+    threads: Dict[Tuple[str, int, int], List[ChatMessage]] = {}
+    for message in messages:
+        threads.setdefault((message.session_id, message.user_id, message.provider_id), []).append(message)
+
+    conversations = []
+    for (session_id, client_id, provider_id), thread_messages in threads.items():
+        conversation = get_or_create_conversation(db, session_id, client_id, provider_id)
+        last = thread_messages[-1]
+        from_client = sum(1 for message in thread_messages if message.sender_type == "user")
+        from_provider = len(thread_messages) - from_client
+
+        record_chat_turn(db, conversation.id, provider_id, last.sender_type)
+
+        # Recipients' counters go up with SET x = x + n so concurrent senders don't lose counts
+        db.execute(
+            update(Conversation).where(Conversation.id == conversation.id).values({
+                Conversation.last_message: last.message_text[:PREVIEW_LENGTH],
+                Conversation.last_message_time: last.created_at or datetime.utcnow(),
+                Conversation.last_sender_type: last.sender_type,
+                Conversation.provider_unread: Conversation.provider_unread + from_client,
+                Conversation.client_unread: Conversation.client_unread + from_provider,
+            }),
+            execution_options={"synchronize_session": False}
+        )
+        change_unread(db, "provider", provider_id, {conversation.id: from_client})
+        change_unread(db, "user", client_id, {conversation.id: from_provider})
+        conversations.append(conversation)
+    return conversations
+
+def _unread_column(owner_type: str):
+    return Conversation.client_unread if owner_type == "user" else Conversation.provider_unread
+
+def record_read(db: Session, session_id: str, client_id: int, provider_id: int, reader_type: str, count: int):
+    """Subtract newly read messages from the reader's unread counters. Does not commit."""
+    if count <= 0:
+        return
+    conversation = db.query(Conversation).filter_by(
+        session_id=session_id, client_id=client_id, provider_id=provider_id
+    ).first()
+    if conversation is None:
+        return
+
+    unread = _unread_column(reader_type)
+    db.execute(
+        update(Conversation).where(Conversation.id == conversation.id).values(
+            {unread: case((unread > count, unread - count), else_=0)}
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    owner_id = client_id if reader_type == "user" else provider_id
+    change_unread(db, reader_type, owner_id, {conversation.id: -count})
+
+def mark_conversations_read(db: Session, owner_type: str, owner_id: int,
+                            conversation_ids: Optional[Sequence[int]] = None) -> Dict[int, int]:
+    """
+    Mark everything the owner has not read as read, in the given conversations or
+    all of theirs, with set-based UPDATEs. Returns {conversation_id: messages read}.
+    Does not commit.
+    """
+    unread = _unread_column(owner_type)
+    owner_column = Conversation.client_id if owner_type == "user" else Conversation.provider_id
+    query = select(Conversation.id, unread).where(owner_column == owner_id, unread > 0)
+    if conversation_ids is not None:
+        query = query.where(Conversation.id.in_(list(conversation_ids)))
+    rows = db.execute(query).all()
+    if not rows:
+        return {}
+
+    ids = [row.id for row in rows]
+    other_side = "provider" if owner_type == "user" else "user"
+    in_selected_thread = select(Conversation.id).where(
+        Conversation.id.in_(ids),
+        Conversation.session_id == ChatMessage.session_id,
+        Conversation.client_id == ChatMessage.user_id,
+        Conversation.provider_id == ChatMessage.provider_id
+    ).exists()
+    db.execute(
+        update(ChatMessage).where(
+            ChatMessage.sender_type == other_side,
+            ChatMessage.is_read.isnot(True),
+            in_selected_thread
+        ).values(is_read=True, delivered_at=func.coalesce(ChatMessage.delivered_at, datetime.utcnow())),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(
+        update(Conversation).where(Conversation.id.in_(ids)).values({unread: 0}),
+        execution_options={"synchronize_session": False}
+    )
+    read_counts = {row.id: row[1] for row in rows}
+    change_unread(db, owner_type, owner_id, {conversation_id: -count for conversation_id, count in read_counts.items()})
+    return read_counts
+
+def inbox_query(db: Session, client_id: Optional[int] = None, provider_id: Optional[int] = None,
+                limit: int = 50):
+    """
+    Newest-first conversations for one client or one provider, with both names
+    joined in, read straight off the (owner, last_message_time) index.
+    """
+    is_provider = provider_id is not None
+    unread = Conversation.provider_unread if is_provider else Conversation.client_unread
+    owner_filter = Conversation.provider_id == provider_id if is_provider else Conversation.client_id == client_id
+
+    return db.query(
+        Conversation.id,
+        Conversation.session_id,
+        Conversation.request_id,
+        Conversation.client_id,
+        Conversation.provider_id,
+        func.coalesce(User.name, "Client").label("client_name"),
+        func.coalesce(ServiceProvider.name, "Provider").label("provider_name"),
+        func.coalesce(Conversation.service_category, "").label("service_category"),
+        func.coalesce(Conversation.last_message, "").label("last_message"),
+        func.coalesce(Conversation.last_message_time, Conversation.created_at).label("last_message_time"),
+        unread.label("unread_count")
+    ).outerjoin(
+        User, User.id == Conversation.client_id
+    ).outerjoin(
+        ServiceProvider, ServiceProvider.id == Conversation.provider_id
+    ).filter(
+        owner_filter
+    ).order_by(
+        Conversation.last_message_time.desc(), Conversation.id.desc()
+    ).limit(limit)
+
+def rebuild_conversations(db: Session) -> int:
+    """
+    Recreate every conversation summary and unread total from chat_messages
+    (one GROUP BY pass).
+
+    For databases that had chat history before conversations existed, or to
+    repair drift. Returns the number of conversations written.
+    """
+    thread = (ChatMessage.session_id, ChatMessage.user_id, ChatMessage.provider_id)
+    totals = select(
+        *thread,
+        func.max(ChatMessage.id).label("last_id"),
+        func.min(ChatMessage.created_at).label("first_time"),
+        func.sum(case((and_(ChatMessage.sender_type == "provider", ChatMessage.is_read.isnot(True)), 1), else_=0)).label("client_unread"),
+        func.sum(case((and_(ChatMessage.sender_type == "user", ChatMessage.is_read.isnot(True)), 1), else_=0)).label("provider_unread")
+    ).group_by(*thread).subquery()
+
+    rows = db.execute(
+        select(totals, ChatMessage.message_text, ChatMessage.created_at, ChatMessage.sender_type)
+        .join(ChatMessage, ChatMessage.id == totals.c.last_id)
+    ).all()
+
+    for row in rows:
+        conversation = get_or_create_conversation(db, row.session_id, row.user_id, row.provider_id)
+        conversation.last_message = row.message_text[:PREVIEW_LENGTH]
+        conversation.last_message_time = row.created_at
+        conversation.last_sender_type = row.sender_type
+        conversation.client_unread = row.client_unread or 0
+        conversation.provider_unread = row.provider_unread or 0
+        if row.first_time is not None:
+            conversation.created_at = row.first_time
+    db.flush()
+
+    # Owner totals are sums of the per-conversation counters
+    db.execute(delete(UnreadTotal))
+    for owner_type, owner_column, unread in (("user", Conversation.client_id, Conversation.client_unread),
+                                             ("provider", Conversation.provider_id, Conversation.provider_unread)):
+        db.execute(insert(UnreadTotal).from_select(
+            ["owner_type", "owner_id", "unread"],
+            select(literal(owner_type), owner_column, func.sum(unread)).group_by(owner_column)
+        ))
+
+    db.commit()
+    return len(rows)
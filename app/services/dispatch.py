@@ -0,0 +1,260 @@
+"""
+Emergency dispatch: offer emergency requests to the nearest available
+providers in waves instead of broadcasting them.
+
+ProblemDetector promises emergency clients contact within 30 minutes, so an
+emergency request is handed to the dispatcher, which:
+
+- picks the DISPATCH_WAVE_SIZE nearest matching providers that work same day
+  (availability == "same_day") within DISPATCH_RADIUS_MILES and have not been
+  offered the request yet (PostGIS KNN when enabled, haversine otherwise);
+- offers them in parallel and waits DISPATCH_WAVE_TIMEOUT_SECONDS for an
+  accept; unanswered offers then expire and the next wave goes out, up to
+  DISPATCH_MAX_WAVES, after which the request is offered to every match;
+- records first_offer_ms, the time from dispatch start to the first offer.
+
+Accepting goes through a Redis lease per request (SET NX), so when several
+providers answer at once exactly one gets past claim() and the others are
+turned away without touching the database; the status compare-and-set in
+accept_offer() stays the final word if Redis is unavailable. A second lease
+per request makes sure only one worker runs its waves, and resume() picks up
+emergency requests left undispatched by a restart.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.database import geo
+from app.database.database import SessionLocal, postgis_enabled
+from app.models.service_provider import ServiceProvider
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.services.activity import PROVIDER_MATCHED, ActivityLog, activity_log
+from app.services.matching import ServiceMatchingService
+from app.services.service_requests import (
+    OFFERED, OPEN, RequestStateError, expire_offers, matching_providers, offer_request
+)
+
+EMERGENCY = "emergency"
+SAME_DAY = "same_day"
+
+def lease_key(request_id: int) -> str:
+    return f"dispatch:lease:{request_id}"
+
+def owner_key(request_id: int) -> str:
+    return f"dispatch:owner:{request_id}"
+
+def nearest_available(db: Session, request: ServiceRequest, limit: int, radius_miles: float) -> List[int]:
+    """Ids of the nearest same-day providers matching the request that have no offer for it yet"""
+    already_offered = select(RequestOffer.provider_id).where(RequestOffer.request_id == request.id)
+    query = db.query(ServiceProvider.id, ServiceProvider.latitude, ServiceProvider.longitude).filter(
+        ServiceProvider.id.in_(matching_providers(request)),
+        ServiceProvider.availability == SAME_DAY,
+        ~ServiceProvider.id.in_(already_offered)
+    )
+
+    if request.latitude is None or request.longitude is None:
+        return [row.id for row in query.order_by(ServiceProvider.id).limit(limit)]
+
+    if postgis_enabled(db.get_bind()):
+        geog = ServiceProvider.location_geog
+        rows = query.filter(
+            geo.within_miles(geog, request.latitude, request.longitude, radius_miles)
+        ).order_by(
+            geo.nearest_first(geog, request.latitude, request.longitude)
+        ).limit(limit)
+        return [row.id for row in rows]
+
+    distance = ServiceMatchingService().calculate_distance
+    ranked = sorted(
+        (distance(request.latitude, request.longitude, row.latitude, row.longitude), row.id) for row in query
+    )
+    return [provider_id for miles, provider_id in ranked if miles <= radius_miles][:limit]
+
+class Dispatcher:
+    """Runs emergency request waves as asyncio tasks and arbitrates accepts."""
+
+    def __init__(self, redis=None, session_factory=SessionLocal, wave_size: Optional[int] = None,
+                 wave_timeout: Optional[float] = None, max_waves: Optional[int] = None,
+                 radius_miles: Optional[float] = None, poll_seconds: float = 1.0,
+                 activity: Optional[ActivityLog] = None):
+        self.redis = redis if redis is not None else redis_client
+        self.session_factory = session_factory
+        self.activity = activity or activity_log
+        self.wave_size = wave_size or settings.DISPATCH_WAVE_SIZE
+        self.wave_timeout = wave_timeout or settings.DISPATCH_WAVE_TIMEOUT_SECONDS
+        self.max_waves = max_waves or settings.DISPATCH_MAX_WAVES
+        self.radius_miles = radius_miles or settings.DISPATCH_RADIUS_MILES
+        self.poll_seconds = poll_seconds
+        # Long enough to outlive every wave, so a lease only expires for abandoned requests
+        self.lease_seconds = int(self.wave_timeout * (self.max_waves + 1)) + 60
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._claimed: Dict[int, asyncio.Event] = {}
+
+    async def claim(self, request_id: int, provider_id: int) -> bool:
+        """Take the request's accept lease; True if this provider holds it"""
+        try:
+            held = await self.redis.set(lease_key(request_id), provider_id, nx=True, ex=self.lease_seconds)
+            if not held and await self.redis.get(lease_key(request_id)) != str(provider_id):
+                return False
+        except Exception as e:
+            # The compare-and-set in accept_offer() still lets only one provider win
+            print(f"Dispatch lease unavailable for request {request_id}: {e}")
+        if request_id in self._claimed:
+            self._claimed[request_id].set()
+        return True
+
+    async def release(self, request_id: int, provider_id: int):
+        """Give the lease back after a failed accept so the next provider can try"""
+        try:
+            if await self.redis.get(lease_key(request_id)) == str(provider_id):
+                await self.redis.delete(lease_key(request_id))
+        except Exception as e:
+            print(f"Dispatch lease release failed for request {request_id}: {e}")
+
+    def schedule(self, request_id: int) -> asyncio.Task:
+        """Start dispatching a committed emergency request in the background"""
+        task = self._tasks.get(request_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self.dispatch(request_id, time.monotonic()))
+            self._tasks[request_id] = task
+            task.add_done_callback(lambda _, request_id=request_id: self._tasks.pop(request_id, None))
+        return task
+
+    async def _own(self, request_id: int) -> bool:
+        try:
+            return bool(await self.redis.set(owner_key(request_id), "1", nx=True, ex=self.lease_seconds))
+        except Exception as e:
+            print(f"Dispatch owner lease unavailable for request {request_id}: {e}")
+            return True
+
+    async def dispatch(self, request_id: int, started: float):
+        if not await self._own(request_id):
+            return  # Another worker is dispatching this request
+        self._claimed[request_id] = asyncio.Event()
+        try:
+            for _ in range(self.max_waves):
+                wave = await asyncio.to_thread(self._offer_wave, request_id, started)
+                if wave is None:
+                    return  # Accepted, cancelled or completed
+                if not wave:
+                    break  # Nobody nearby is left to ask
+                if await self._wait_for_accept(request_id):
+                    return
+                await asyncio.to_thread(self._expire_wave, request_id, wave)
+            # Waves exhausted: fall back to offering every matching provider
+            await asyncio.to_thread(self._offer_wave, request_id, started, True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Dispatch of request {request_id} failed: {e}")
+        finally:
+            self._claimed.pop(request_id, None)
+            try:
+                await self.redis.delete(owner_key(request_id))
+            except Exception:
+                pass
+
+    def _offer_wave(self, request_id: int, started: float, everyone: bool = False) -> Optional[List[int]]:
+        """Offer the next wave and commit; None once the request no longer needs providers"""
+        db = self.session_factory()
+        try:
+            request = db.get(ServiceRequest, request_id)
+            if request is None or request.status not in (OPEN, OFFERED):
+                return None
+            try:
+                if everyone:
+                    wave = offer_request(db, request)
+                else:
+                    wave = nearest_available(db, request, self.wave_size, self.radius_miles)
+                    wave = offer_request(db, request, provider_ids=wave) if wave else []
+            except RequestStateError:
+                db.rollback()  # Taken or cancelled since the check above; drop this wave's offers
+                return None
+            if wave:
+                db.execute(
+                    update(ServiceRequest).where(
+                        ServiceRequest.id == request_id, ServiceRequest.first_offer_ms.is_(None)
+                    ).values(first_offer_ms=int((time.monotonic() - started) * 1000)),
+                    execution_options={"synchronize_session": False}
+                )
+            db.commit()
+            if wave:
+                self.activity.record(
+                    request.client_id, PROVIDER_MATCHED,
+                    f"{len(wave)} providers alerted for your {request.category} emergency",
+                    request_id=request_id, provider_ids=wave[:10]
+                )
+            return wave
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _wait_for_accept(self, request_id: int) -> bool:
+        """Wait out the wave; True as soon as the request is taken (locally or by another worker)"""
+        deadline = time.monotonic() + self.wave_timeout
+        claimed = self._claimed[request_id]
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(claimed.wait(), timeout=min(self.poll_seconds, remaining))
+            except asyncio.TimeoutError:
+                pass
+            if claimed.is_set():
+                claimed.clear()  # A claim whose accept failed is released; keep waiting unless it went through
+            if not await asyncio.to_thread(self._still_waiting, request_id):
+                return True
+
+    def _still_waiting(self, request_id: int) -> bool:
+        db = self.session_factory()
+        try:
+            status = db.query(ServiceRequest.status).filter(ServiceRequest.id == request_id).scalar()
+            return status in (OPEN, OFFERED)
+        finally:
+            db.close()
+
+    def _expire_wave(self, request_id: int, wave: List[int]):
+        db = self.session_factory()
+        try:
+            expire_offers(db, request_id, wave)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def resume(self) -> int:
+        """Schedule emergency requests still waiting for a provider (call on startup)"""
+        db = self.session_factory()
+        try:
+            pending = db.query(ServiceRequest.id).filter(
+                ServiceRequest.urgency == EMERGENCY, ServiceRequest.status.in_([OPEN, OFFERED])
+            ).all()
+        finally:
+            db.close()
+        for (request_id,) in pending:
+            self.schedule(request_id)
+        return len(pending)
+
+    async def stop(self):
+        """Cancel running waves; resume() on the next startup picks them up again"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+dispatcher = Dispatcher()
+
+def get_dispatcher() -> Dispatcher:
+    """Dependency returning the shared dispatcher (overridable in tests)"""
+    return dispatcher
@@ -0,0 +1,192 @@
+"""
+Kenya gazetteer: (county, sub-county, ward) -> coordinates.
+
+The county > sub-county > ward > estate hierarchy is the one the signup forms
+use (static/js/kenya-locations.js); it is read from that file once, at
+import, so the server and the forms always agree on the names. Ward
+centroids come from app/data/kenya_ward_centroids.json. Sub-county and
+county centroids are the mean of their wards' and are computed at load too.
+
+Every place is stored under its normalized path, so resolving the names a
+form submitted is a dictionary read. Names typed by hand are normalized
+first (case, punctuation, "Ward"/"Sub-County" suffixes, Roman numerals) and
+"Parklands/Highridge" answers to either half; anything else is matched
+against the names at that level with difflib and the answer memoized.
+Names that still don't match resolve to the deepest level that did.
+
+Unlike the coordinates users used to be given (offsets from hash(email),
+which Python salts per process), these are the same on every worker and
+across restarts.
+"""
+
+import difflib
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+LOCATIONS_JS_PATH = ROOT / "static" / "js" / "kenya-locations.js"
+CENTROIDS_PATH = ROOT / "app" / "data" / "kenya_ward_centroids.json"
+
+# Names closer than this (difflib ratio) to a known name are taken as that name
+FUZZY_CUTOFF = 0.8
+
+COUNTY, SUB_COUNTY, WARD = "county", "sub_county", "ward"
+
+ROMAN = {"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5"}
+SUFFIXES = ("sub county", "subcounty", "county", "ward")
+
+Key = Tuple[str, ...]
+
+@dataclass(frozen=True)
+class Place:
+    county: str
+    sub_county: Optional[str]
+    ward: Optional[str]
+    latitude: float
+    longitude: float
+    level: str  # county, sub_county or ward
+
+    @property
+    def coordinates(self) -> Tuple[float, float]:
+        return self.latitude, self.longitude
+
+def normalize(name: Optional[str]) -> str:
+    """Lower-case, punctuation-free form of a place name, used as the lookup key"""
+    if not name:
+        return ""
+    text = name.lower().replace("&", " and ").replace("'", "")
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    for suffix in SUFFIXES:
+        if text.endswith(" " + suffix):
+            text = text[:-len(suffix) - 1]
+    return " ".join(ROMAN.get(word, word) for word in text.split())
+
+def read_administrative_data(path: Path = LOCATIONS_JS_PATH) -> dict:
+    """The kenyaAdministrativeData object literal from the JS module, as Python data"""
+    text = path.read_text(encoding="utf-8")
+    start = text.index("{", text.index("kenyaAdministrativeData ="))
+    literal = text[start:text.index("\n};", start) + 2]
+    literal = re.sub(r"//[^\n]*", "", literal)
+    literal = re.sub(r"^(\s*)([A-Za-z_]\w*)\s*:", r'\1"\2":', literal, flags=re.M)  # Quote keys
+    literal = re.sub(r",(\s*[}\]])", r"\1", literal)  # Trailing commas
+    return json.loads(literal)
+
+def _mean(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    return (round(sum(p[0] for p in points) / len(points), 5),
+            round(sum(p[1] for p in points) / len(points), 5))
+
+class Gazetteer:
+    """Places by normalized path, with alias and fuzzy name matching per level."""
+
+    def __init__(self, administrative: dict, centroids: Dict[str, Dict[str, Dict[str, List[float]]]],
+                 version: str = ""):
+        self.version = version  # Changes with either source file; cached geocodes record it
+        self.places: Dict[Key, Place] = {}
+        self.areas: Dict[Key, Tuple[str, ...]] = {}
+        # Parent path -> {name or alias: normalized child name}
+        self.children: Dict[Key, Dict[str, str]] = {}
+
+        wards: Dict[Key, Tuple[str, str, str, Tuple[float, float]]] = {}
+        for county in administrative["counties"]:
+            for sub_county in county["subCounties"]:
+                for ward in sub_county["wards"]:
+                    point = centroids.get(county["name"], {}).get(sub_county["name"], {}).get(ward["name"])
+                    if point is None:
+                        continue
+                    key = (normalize(county["name"]), normalize(sub_county["name"]), normalize(ward["name"]))
+                    wards[key] = (county["name"], sub_county["name"], ward["name"], tuple(point))
+                    # Counties listed twice (Mombasa) merge; estates are kept for address matching
+                    self.areas[key] = tuple(dict.fromkeys(self.areas.get(key, ()) + tuple(ward.get("areas", ()))))
+
+        points: Dict[Key, List[Tuple[float, float]]] = {}
+        names: Dict[Key, str] = {}
+        for key, (county, sub_county, ward, point) in wards.items():
+            self.places[key] = Place(county, sub_county, ward, point[0], point[1], WARD)
+            for depth, name in ((1, county), (2, sub_county)):
+                points.setdefault(key[:depth], []).append(point)
+                names[key[:depth]] = name
+            for depth, name in enumerate((county, sub_county, ward)):
+                self._add_child(key[:depth], name)
+
+        for key, group in points.items():
+            latitude, longitude = _mean(group)
+            if len(key) == 1:
+                self.places[key] = Place(names[key], None, None, latitude, longitude, COUNTY)
+            else:
+                self.places[key] = Place(names[key[:1]], names[key], None, latitude, longitude, SUB_COUNTY)
+
+    def _add_child(self, parent: Key, name: str):
+        aliases = self.children.setdefault(parent, {})
+        canonical = normalize(name)
+        aliases[canonical] = canonical
+        if "/" in name:
+            for part in name.split("/"):
+                aliases.setdefault(normalize(part), canonical)
+
+    @classmethod
+    def load(cls, locations_path: Path = LOCATIONS_JS_PATH, centroids_path: Path = CENTROIDS_PATH) -> "Gazetteer":
+        source = locations_path.read_bytes() + centroids_path.read_bytes()
+        with open(centroids_path, encoding="utf-8") as f:
+            centroids = json.load(f)["wards"]
+        return cls(read_administrative_data(locations_path), centroids, hashlib.sha256(source).hexdigest()[:12])
+
+    def _child(self, parent: Key, name: str, fuzzy: bool = True) -> Optional[str]:
+        """The normalized child of parent that a normalized name refers to"""
+        aliases = self.children.get(parent, {})
+        if name in aliases:
+            return aliases[name]
+        if not fuzzy:
+            return None
+        close = difflib.get_close_matches(name, list(aliases), n=1, cutoff=FUZZY_CUTOFF)
+        return aliases[close[0]] if close else None
+
+    @lru_cache(maxsize=4096)
+    def _resolve(self, county: str, sub_county: str, ward: str) -> Optional[Key]:
+        key = (county, sub_county, ward)
+        if key in self.places:
+            return key
+        county = self._child((), county)
+        if county is None:
+            return None
+        path = (county,)
+        matched_sub_county = self._child(path, sub_county) if sub_county else None
+        if matched_sub_county:
+            path += (matched_sub_county,)
+        if ward:
+            if matched_sub_county:
+                parents = [path]
+            else:
+                # Unknown or missing sub-county: a ward name unique within the county still places it
+                parents = [(county, name) for name in set(self.children.get((county,), {}).values())]
+            for fuzzy in (False, True):
+                found = [parent + (match,) for parent in parents
+                         for match in [self._child(parent, ward, fuzzy)] if match]
+                if found:
+                    if len(found) == 1:
+                        path = found[0]
+                    break
+        return path
+
+    def resolve(self, county: Optional[str], sub_county: Optional[str] = None,
+                ward: Optional[str] = None) -> Optional[Place]:
+        """The most specific known place for the names, or None if the county is unknown"""
+        key = self._resolve(normalize(county), normalize(sub_county), normalize(ward))
+        return self.places[key] if key else None
+
+    def coordinates(self, county: Optional[str], sub_county: Optional[str] = None,
+                    ward: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        place = self.resolve(county, sub_county, ward)
+        return place.coordinates if place else None
+
+    def wards(self) -> Iterator[Tuple[Place, Tuple[str, ...]]]:
+        """Every ward with its estates and landmarks"""
+        for key, place in self.places.items():
+            if place.level == WARD:
+                yield place, self.areas.get(key, ())
+
+gazetteer = Gazetteer.load()
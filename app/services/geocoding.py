@@ -0,0 +1,317 @@
+"""
+Offline geocoding of free-text Kenyan addresses and landmarks.
+
+Providers and users type where they are into full_address, landmark,
+manual_address and similar fields ("Opposite Galeria Mall, Langata Rd"),
+and many rows have no coordinates at all, so the matcher sees them as
+infinitely far away or at distance zero. AddressIndex resolves such text
+without any network call, against the gazetteer's wards, sub-counties and
+counties and the estate/landmark lists of every ward.
+
+Each known name is an entry in a token inverted index (token -> entries).
+A query's tokens gather the entries they appear in, weighted by inverse
+document frequency. An entry matches when most of its weight is in the
+query (MIN_COVERAGE). Query tokens that name the places an entry lies in
+also count toward it, so "Kileleshwa, Nairobi" is the ward, not the county.
+The match explaining the most of the query wins, and then the one with the
+least missing. Unknown tokens are corrected to a known
+one when difflib finds a close spelling. When equally good matches sit in
+different wards, the answer is the area they share (sub-county or county).
+Estates and landmarks have no coordinates of their own and are placed at
+their ward's centroid.
+
+Geocoder puts the geocode_cache table in front of the index, so each
+distinct (county, text) is resolved once across processes and restarts.
+Misses are cached too. Entries from an older gazetteer or older matching
+rules are recomputed.
+backfill_coordinates() fills in latitude/longitude for existing rows in
+batches (see backfill_geocodes.py).
+"""
+
+import difflib
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database.database import dialect_insert
+from app.models.geocode import GeocodeEntry
+from app.models.service_provider import ServiceProvider
+from app.models.user import User
+from app.services.gazetteer import COUNTY, SUB_COUNTY, WARD, Gazetteer, Place, gazetteer, normalize
+
+AREA = "area"
+LEVEL_RANK = {COUNTY: 0, SUB_COUNTY: 1, WARD: 2, AREA: 3}
+
+# Words that say nothing about where a place is
+GENERIC = frozenset({
+    "a", "along", "and", "area", "at", "behind", "estate", "in", "near", "next", "of", "off", "opp",
+    "opposite", "the", "to"
+})
+
+# Share of a name's (IDF-weighted) tokens the text must contain, so "Galeria
+# Mall" still finds "Galeria Shopping Mall"
+MIN_COVERAGE = 0.7
+
+# Minimum difflib ratio for correcting a misspelt token to a known one
+TOKEN_CUTOFF = 0.85
+
+# Bumped when matching rules change, so cached answers from older rules are recomputed
+MATCHER_REVISION = 2
+
+# Free-text columns tried for each table, most specific first
+TEXT_FIELDS = {
+    ServiceProvider: ("landmark", "specific_location", "manual_address", "full_address", "location", "address"),
+    User: ("landmark", "full_address", "address")
+}
+
+@dataclass(frozen=True)
+class GeocodeMatch:
+    latitude: float
+    longitude: float
+    county: str
+    sub_county: Optional[str]
+    ward: Optional[str]
+    matched: str
+    level: str
+
+@dataclass(frozen=True)
+class _Entry:
+    name: str
+    tokens: FrozenSet[str]
+    place: Place
+    level: str
+    context: FrozenSet[str] = frozenset()  # Tokens of the places it lies in (county, sub-county, ward)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [token for token in normalize(text).split() if token not in GENERIC]
+
+class AddressIndex:
+    """Token inverted index over every place and estate name in the gazetteer."""
+
+    def __init__(self, places: Gazetteer):
+        self.gazetteer = places
+        entries: List[_Entry] = []
+
+        def add(name: str, place: Place, level: str):
+            tokens = frozenset(tokenize(name))
+            if tokens:
+                enclosing = {COUNTY: (), SUB_COUNTY: (place.county,), WARD: (place.county, place.sub_county),
+                             AREA: (place.county, place.sub_county, place.ward)}[level]
+                context = frozenset(token for parent in enclosing for token in tokenize(parent)) - tokens
+                entries.append(_Entry(name, tokens, place, level, context))
+
+        for place in places.places.values():
+            name = {COUNTY: place.county, SUB_COUNTY: place.sub_county, WARD: place.ward}[place.level]
+            add(name, place, place.level)
+            if "/" in name:
+                for part in name.split("/"):
+                    add(part, place, place.level)
+        for place, areas in places.wards():
+            for area in areas:
+                add(area, place, AREA)
+
+        self.entries: Tuple[_Entry, ...] = tuple(entries)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for i, entry in enumerate(self.entries):
+            for token in entry.tokens:
+                postings[token].append(i)
+        self.postings: Dict[str, Tuple[int, ...]] = {token: tuple(ids) for token, ids in postings.items()}
+        self.idf: Dict[str, float] = {
+            token: math.log(1 + len(self.entries) / len(ids)) for token, ids in self.postings.items()
+        }
+        self.weights: Tuple[float, ...] = tuple(sum(self.idf[token] for token in entry.tokens) for entry in self.entries)
+        self.version = f"{places.version}.{MATCHER_REVISION}"
+
+    @lru_cache(maxsize=8192)
+    def _known(self, token: str) -> Optional[str]:
+        """The indexed token a query token stands for, correcting spelling"""
+        if token in self.postings:
+            return token
+        if len(token) < 4 or token.isdigit():
+            return None
+        close = difflib.get_close_matches(token, list(self.postings), n=1, cutoff=TOKEN_CUTOFF)
+        return close[0] if close else None
+
+    def search(self, text: Optional[str], county: Optional[str] = None) -> Optional[GeocodeMatch]:
+        """Best place named in the text (within the county, if it is a known one)"""
+        tokens = {known for known in map(self._known, tokenize(text)) if known}
+        in_county = self.gazetteer.resolve(county) if county else None
+
+        scores: Dict[int, float] = defaultdict(float)
+        for token in tokens:
+            for i in self.postings[token]:
+                scores[i] += self.idf[token]
+
+        best: List[_Entry] = []
+        best_key = None
+        for i, score in scores.items():
+            entry = self.entries[i]
+            coverage = score / self.weights[i]
+            if coverage < MIN_COVERAGE:
+                continue  # Too much of the name is missing from the text
+            if in_county and entry.place.county != in_county.county:
+                continue
+            # Text naming the places around it ("Kileleshwa, Nairobi") counts for it too,
+            # so the county name does not outscore the more specific one
+            score += sum(self.idf[token] for token in tokens & entry.context)
+            # Most of the text explained first, then the most complete name
+            key = (round(score, 6), round(coverage, 6))
+            if best_key is None or key > best_key:
+                best, best_key = [entry], key
+            elif key == best_key:
+                best.append(entry)
+        if not best:
+            return None
+
+        # A ward's own name outranks the same words in another ward's estate list
+        named = [entry for entry in best if entry.level != AREA]
+        best = named or best
+        entry = max(best, key=lambda entry: LEVEL_RANK[entry.level])
+        place, level = entry.place, entry.level
+        paths = {_path(entry.place) for entry in best}
+        # A ward and its own sub-county (Changamwe, Changamwe) agree; keep the deeper one
+        paths = {path for path in paths if not any(other[:len(path)] == path != other for other in paths)}
+        if len(paths) > 1:
+            # The same name in several wards: answer with the area they share
+            shared = []
+            for names in zip(*paths):
+                if len(set(names)) > 1:
+                    break
+                shared.append(names[0])
+            if not shared:
+                return None
+            place = self.gazetteer.resolve(*shared)
+            level = place.level
+        return GeocodeMatch(place.latitude, place.longitude, place.county, place.sub_county, place.ward,
+                            entry.name, level)
+
+def _path(place: Place) -> Tuple[str, ...]:
+    return tuple(name for name in (place.county, place.sub_county, place.ward) if name)
+
+class Geocoder:
+    """AddressIndex behind the persistent geocode_cache table."""
+
+    def __init__(self, index: Optional[AddressIndex] = None):
+        self.index = index or AddressIndex(gazetteer)
+
+    @staticmethod
+    def cache_key(text: Optional[str], county: Optional[str] = None) -> str:
+        return f"{normalize(county)}|{normalize(text)}"
+
+    def geocode(self, db: Session, text: Optional[str], county: Optional[str] = None) -> Optional[GeocodeMatch]:
+        return self.geocode_many(db, [(text, county)])[0]
+
+    def geocode_many(self, db: Session,
+                     queries: Sequence[Tuple[Optional[str], Optional[str]]]) -> List[Optional[GeocodeMatch]]:
+        """
+        Geocode (text, county) pairs: one SELECT for the cached ones, the index
+        for the rest, and one batched upsert to cache those. Does not commit.
+        """
+        version = self.index.version
+        keys = [self.cache_key(text, county) for text, county in queries]
+        wanted = sorted({key for key in keys if not key.endswith("|")})
+
+        answers: Dict[str, Optional[GeocodeMatch]] = {}
+        for start in range(0, len(wanted), 500):
+            cached = db.query(GeocodeEntry).filter(
+                GeocodeEntry.query.in_(wanted[start:start + 500]), GeocodeEntry.version == version
+            )
+            for entry in cached:
+                answers[entry.query] = _from_entry(entry)
+
+        fresh = []
+        for key, (text, county) in zip(keys, queries):
+            if key.endswith("|") or key in answers:
+                continue
+            match = answers[key] = self.index.search(text, county)
+            fresh.append(_to_row(key, match, version))
+        if fresh:
+            stmt = dialect_insert(db.get_bind())(GeocodeEntry)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["query"],
+                    set_={column: stmt.excluded[column] for column in fresh[0] if column != "query"}
+                ),
+                fresh
+            )
+        return [answers.get(key) for key in keys]
+
+def _from_entry(entry: GeocodeEntry) -> Optional[GeocodeMatch]:
+    if entry.latitude is None or entry.longitude is None:
+        return None
+    return GeocodeMatch(entry.latitude, entry.longitude, entry.county, entry.sub_county, entry.ward,
+                        entry.matched, entry.level)
+
+def _to_row(key: str, match: Optional[GeocodeMatch], version: str) -> Dict[str, object]:
+    row = {"query": key, "version": version, "latitude": None, "longitude": None, "county": None,
+           "sub_county": None, "ward": None, "matched": None, "level": None}
+    if match:
+        row.update(latitude=match.latitude, longitude=match.longitude, county=match.county,
+                   sub_county=match.sub_county, ward=match.ward, matched=match.matched, level=match.level)
+    return row
+
+@dataclass
+class BackfillReport:
+    table: str
+    placed: int = 0
+    from_text: int = 0
+    unplaced: int = 0
+
+def backfill_coordinates(db: Session, geocoder: Optional[Geocoder] = None,
+                         batch_size: int = 500) -> List[BackfillReport]:
+    """
+    Give providers and users without coordinates the best place their text
+    fields name, or else their form's ward (sub-county, county). Commits
+    after each batch, so it can run against a live database.
+    """
+    geocoder = geocoder or Geocoder()
+    reports = []
+    for model, fields in TEXT_FIELDS.items():
+        report = BackfillReport(model.__tablename__)
+        table = model.__table__
+        columns = [getattr(model, field) for field in fields]
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(model.id, model.county, model.sub_county, model.ward, *columns)
+                .where(or_(model.latitude.is_(None), model.longitude.is_(None)), model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            matches = geocoder.geocode_many(db, [(getattr(row, field), row.county) for row in rows for field in fields])
+            placed = []
+            for n, row in enumerate(rows):
+                found = [match for match in matches[n * len(fields):(n + 1) * len(fields)] if match]
+                text = max(found, key=lambda match: LEVEL_RANK[match.level], default=None)
+                form = geocoder.index.gazetteer.resolve(row.county, row.sub_county, row.ward)
+                if text and (form is None or LEVEL_RANK[text.level] >= LEVEL_RANK[form.level]):
+                    point = (text.latitude, text.longitude)
+                    report.from_text += 1
+                elif form:
+                    point = form.coordinates
+                else:
+                    report.unplaced += 1
+                    continue
+                placed.append({"row_id": row.id, "lat": point[0], "lon": point[1]})
+
+            if placed:
+                db.execute(
+                    update(table).where(table.c.id == bindparam("row_id"))
+                    .values(latitude=bindparam("lat"), longitude=bindparam("lon")),
+                    placed
+                )
+            report.placed += len(placed)
+            db.commit()
+        reports.append(report)
+    return reports
+
+geocoder = Geocoder()
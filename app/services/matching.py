@@ -1,10 +1,16 @@
 import math
 import json
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import bindparam, func, or_, select, update
 from app.models.service_provider import ServiceProvider
 from app.models.user import User
+from app.database.database import engine, postgis_enabled
+from app.database import geo
+from app.services.availability import AvailabilityIndex, availability_index
+from app.services.catalog import category_mask
+from app.services.ratings import seeded_rating_sum
 from dataclasses import dataclass
 
 @dataclass
@@ -59,13 +65,23 @@ class ServiceMatchingService:
         max_distance: float = 50.0,
         min_rating: float = 0.0,
         max_rate: Optional[float] = None,
-        availability: Optional[str] = None
+        availability: Optional[str] = None,
+        available_from: Optional[datetime] = None,
+        available_until: Optional[datetime] = None,
+        index: Optional[AvailabilityIndex] = None
     ) -> List[MatchedProvider]:
-        """Find service providers matching criteria, sorted by distance."""
+        """
+        Find service providers matching criteria, sorted by distance.
+        
+        On Postgres with PostGIS the radius filter and ordering run in SQL;
+        otherwise distances are computed in Python. With a time window only
+        providers working then and not already booked are kept (answered from
+        the in-memory availability index).
+        """
         
         query = db.query(ServiceProvider).filter(
             ServiceProvider.is_active == True,
-            ServiceProvider.categories.contains(category)
+            ServiceProvider.offers(category)
         )
         
         # Apply filters
@@ -83,10 +99,37 @@ class ServiceMatchingService:
         if availability:
             query = query.filter(ServiceProvider.availability == availability)
         
-        providers = query.all()
+        if user.latitude and user.longitude and postgis_enabled(db.get_bind()):
+            ranked = self._rank_in_database(query, user, max_distance)
+        else:
+            ranked = self._rank_in_python(query.all(), user, max_distance)
+        
+        if available_from and available_until:
+            free = (index or availability_index).available(
+                db, [provider.id for provider, _ in ranked], available_from, available_until
+            )
+            ranked = [(provider, distance) for provider, distance in ranked if provider.id in free]
+        
+        return [self._to_matched_provider(provider, distance) for provider, distance in ranked]
+    
+    def _rank_in_database(self, query, user: User, max_distance: float):
+        """Radius filter and distance ordering pushed down to PostGIS (ST_DWithin + KNN)."""
+        
+        geog = ServiceProvider.location_geog
+        rows = query.add_columns(
+            geo.distance_miles(geog, user.latitude, user.longitude).label("distance_miles")
+        ).filter(
+            geo.within_miles(geog, user.latitude, user.longitude, max_distance)
+        ).order_by(
+            geo.nearest_first(geog, user.latitude, user.longitude)
+        ).all()
+        
+        return [(provider, distance) for provider, distance in rows]
+    
+    def _rank_in_python(self, providers: List[ServiceProvider], user: User, max_distance: float):
+        """Haversine filtering and sorting for backends without PostGIS (SQLite)."""
         
-        # Calculate distances and create matched providers
-        matched_providers = []
+        ranked = []
         for provider in providers:
             if user.latitude and user.longitude:
                 distance = self.calculate_distance(
@@ -100,37 +143,38 @@ class ServiceMatchingService:
             else:
                 distance = 0.0  # Default if user location not available
             
-            # Parse specialties from JSON string
-            try:
-                specialties = json.loads(provider.specialties) if provider.specialties else []
-            except (json.JSONDecodeError, TypeError):
-                specialties = []
-            
-            matched_provider = MatchedProvider(
-                id=provider.id,
-                name=provider.name,
-                business_name=provider.business_name or provider.name,
-                phone=provider.phone,
-                email=provider.email,
-                address=f"{provider.address}, {provider.city}, {provider.state} {provider.zip_code}",
-                city=provider.city,
-                state=provider.state,
-                distance_miles=round(distance, 1),
-                average_rating=provider.average_rating,
-                total_reviews=provider.total_reviews,
-                hourly_rate_min=provider.hourly_rate_min or 0.0,
-                hourly_rate_max=provider.hourly_rate_max or 0.0,
-                availability=provider.availability,
-                specialties=specialties,
-                description=provider.description or ""
-            )
-            
-            matched_providers.append(matched_provider)
+            ranked.append((provider, distance))
         
         # Sort by distance
-        matched_providers.sort(key=lambda x: x.distance_miles)
+        ranked.sort(key=lambda item: item[1])
+        
+        return ranked
+    
+    def _to_matched_provider(self, provider: ServiceProvider, distance: float) -> MatchedProvider:
+        # Parse specialties from JSON string
+        try:
+            specialties = json.loads(provider.specialties) if provider.specialties else []
+        except (json.JSONDecodeError, TypeError):
+            specialties = []
         
-        return matched_providers
+        return MatchedProvider(
+            id=provider.id,
+            name=provider.name,
+            business_name=provider.business_name or provider.name,
+            phone=provider.phone,
+            email=provider.email,
+            address=f"{provider.address}, {provider.city}, {provider.state} {provider.zip_code}",
+            city=provider.city,
+            state=provider.state,
+            distance_miles=round(distance, 1),
+            average_rating=provider.average_rating,
+            total_reviews=provider.total_reviews,
+            hourly_rate_min=provider.hourly_rate_min or 0.0,
+            hourly_rate_max=provider.hourly_rate_max or 0.0,
+            availability=provider.availability,
+            specialties=specialties,
+            description=provider.description or ""
+        )
     
     def seed_sample_providers(self, db: Session):
         """Seed database with sample service providers for testing."""
@@ -207,8 +251,27 @@ class ServiceMatchingService:
             ).first()
             
             if not existing:
-                provider = ServiceProvider(**provider_data)
+                # No review rows back these counts; seed the sum the incremental update builds on
+                provider = ServiceProvider(**provider_data, rating_sum=seeded_rating_sum(
+                    provider_data["average_rating"], provider_data["total_reviews"]))
                 db.add(provider)
         
         db.commit()
         return len(sample_providers)
+
+def backfill_category_masks(bind=None) -> int:
+    """Compute service_providers.category_mask for rows written before it existed; returns rows updated"""
+    bind = bind if bind is not None else engine
+    with bind.begin() as conn:
+        rows = conn.execute(
+            select(ServiceProvider.id, ServiceProvider.categories, ServiceProvider.services)
+            .where(ServiceProvider.category_mask.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(ServiceProvider.__table__)
+                .where(ServiceProvider.__table__.c.id == bindparam("provider_id"))
+                .values(category_mask=bindparam("mask")),
+                [{"provider_id": row.id, "mask": category_mask(row.categories, row.services)} for row in rows]
+            )
+    return len(rows)
@@ -0,0 +1,75 @@
+"""
+Password hashing off the event loop.
+
+bcrypt costs ~250ms of CPU per hash at the default cost, so hashing inside an
+async handler stalls every request on the worker. PasswordPool runs hashes
+and verifications on a small dedicated thread pool (the bcrypt extension
+releases the GIL while it works, so threads run in parallel) and bounds the
+work waiting for it: once PASSWORD_POOL_WORKERS jobs are running and
+PASSWORD_POOL_MAX_QUEUE more are waiting, new ones are refused with
+PasswordPoolBusy, which the routers turn into 429 + Retry-After rather than
+letting a login burst queue up unbounded latency.
+
+The bcrypt cost is PASSWORD_BCRYPT_ROUNDS. verify_and_update() reports when a
+stored hash was made with another cost (passlib's needs_update), so logins
+rehash transparently after the setting changes.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+def make_context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+class PasswordPoolBusy(Exception):
+    """Too many password operations are already running or queued"""
+
+class PasswordPool:
+    """Bounded executor for bcrypt work."""
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 rounds: Optional[int] = None):
+        self.workers = workers or settings.PASSWORD_POOL_WORKERS
+        self.max_queue = max_queue if max_queue is not None else settings.PASSWORD_POOL_MAX_QUEUE
+        self.context = make_context(rounds or settings.PASSWORD_BCRYPT_ROUNDS)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="passwords")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def depth(self) -> int:
+        """Jobs running or waiting"""
+        with self._lock:
+            return self._in_flight
+
+    async def _run(self, function, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                raise PasswordPoolBusy("Too many sign-in attempts right now, please retry shortly")
+            self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """(matches, new_hash); new_hash is set when the stored hash should be replaced"""
+        return await self._run(self.context.verify_and_update, password, password_hash)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_pool = PasswordPool()
+
+def get_password_pool() -> PasswordPool:
+    """Dependency returning the shared password pool (overridable in tests)"""
+    return password_pool
@@ -0,0 +1,228 @@
+"""
+Cached resolution of the authenticated user.
+
+get_current_user() used to load the users row on every request. It now
+resolves a bearer token to a Principal, a small immutable snapshot of the
+fields request handlers read (id, type, email, name, location), through:
+
+1. a per-process memo of decoded JWT claims, keyed by token, so a token is
+   signature-checked once and afterwards only its expiry is compared;
+2. a per-process TTL LRU of principals by user id;
+3. optionally (PRINCIPAL_CACHE_REDIS) a Redis tier shared by all workers;
+4. the database, on a miss.
+
+Provider accounts additionally resolve to a ProviderPrincipal, the hot fields
+of their service_providers row, through the same tiers keyed by provider id.
+Provider tokens carry that id in a "pid" claim, so get_current_provider()
+usually costs no query at all; older tokens are resolved once through the
+service_providers.user_id link and the result is memoized with the token.
+
+Writes that change a snapshotted field call PrincipalCache.invalidate() or
+invalidate_provider(): profile updates (PUT /api/users/me and
+PUT /api/provider/profile) and client -> provider transitions. Other
+processes' local entries, and ratings, catch up within
+PRINCIPAL_CACHE_TTL_SECONDS. Handlers that modify a row load it themselves.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.models.service_provider import ServiceProvider
+from app.models.user import User
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    name: str
+    user_type: str
+    county: Optional[str] = None
+    sub_county: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            user_type=user.user_type or "client",
+            county=user.county,
+            sub_county=user.sub_county,
+            city=user.city,
+            state=user.state,
+            latitude=user.latitude,
+            longitude=user.longitude
+        )
+
+@dataclass(frozen=True)
+class ProviderPrincipal:
+    id: int
+    user_id: Optional[int]
+    email: str
+    name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    average_rating: Optional[float] = None
+
+    @classmethod
+    def from_provider(cls, provider: ServiceProvider) -> "ProviderPrincipal":
+        return cls(
+            id=provider.id,
+            user_id=provider.user_id,
+            email=provider.email,
+            name=provider.name,
+            latitude=provider.latitude,
+            longitude=provider.longitude,
+            average_rating=provider.average_rating
+        )
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class PrincipalCache:
+    """Local LRU in front of an optional Redis tier."""
+
+    def __init__(self, redis=None, use_redis: Optional[bool] = None, ttl_seconds: Optional[float] = None,
+                 redis_ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.redis = redis if redis is not None else redis_client
+        self.use_redis = settings.PRINCIPAL_CACHE_REDIS if use_redis is None else use_redis
+        self.redis_ttl_seconds = redis_ttl_seconds or settings.PRINCIPAL_REDIS_TTL_SECONDS
+        max_entries = max_entries or settings.PRINCIPAL_CACHE_SIZE
+        self.local = TTLCache(max_entries, ttl_seconds or settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        self.providers = TTLCache(max_entries, ttl_seconds or settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        # Decoded token -> (user id, expiry, provider id); a token outlives any principal TTL, so expiry is checked on read
+        self.tokens = TTLCache(max_entries, float("inf"))
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    @staticmethod
+    def provider_key(provider_id: int) -> str:
+        return f"provider_principal:{provider_id}"
+
+    async def _get(self, local: TTLCache, key: str, local_key: int, snapshot_class):
+        snapshot = local.get(local_key)
+        if snapshot is not None or not self.use_redis:
+            return snapshot
+        try:
+            cached = await self.redis.get(key)
+        except Exception as e:
+            print(f"Principal cache read failed: {e}")
+            return None
+        if cached is None:
+            return None
+        snapshot = snapshot_class(**json.loads(cached))
+        local.put(local_key, snapshot)
+        return snapshot
+
+    async def _put(self, local: TTLCache, key: str, snapshot):
+        local.put(snapshot.id, snapshot)
+        if self.use_redis:
+            try:
+                await self.redis.set(key, json.dumps(asdict(snapshot)), ex=self.redis_ttl_seconds)
+            except Exception as e:
+                print(f"Principal cache write failed: {e}")
+
+    async def _invalidate(self, local: TTLCache, keys: list, local_keys: tuple):
+        for local_key in local_keys:
+            local.pop(local_key)
+        if self.use_redis and keys:
+            try:
+                await self.redis.delete(*keys)
+            except Exception as e:
+                print(f"Principal cache invalidation failed: {e}")
+
+    async def get(self, user_id: int) -> Optional[Principal]:
+        return await self._get(self.local, self.key(user_id), user_id, Principal)
+
+    async def put(self, principal: Principal):
+        await self._put(self.local, self.key(principal.id), principal)
+
+    async def invalidate(self, *user_ids: int):
+        """Forget users whose snapshotted fields changed (call after the commit)"""
+        await self._invalidate(self.local, [self.key(user_id) for user_id in user_ids], user_ids)
+
+    async def get_provider(self, provider_id: int) -> Optional[ProviderPrincipal]:
+        return await self._get(self.providers, self.provider_key(provider_id), provider_id, ProviderPrincipal)
+
+    async def put_provider(self, provider: ProviderPrincipal):
+        await self._put(self.providers, self.provider_key(provider.id), provider)
+
+    async def invalidate_provider(self, *provider_ids: int):
+        """Forget providers whose snapshotted fields changed (call after the commit)"""
+        await self._invalidate(self.providers, [self.provider_key(pid) for pid in provider_ids], provider_ids)
+
+    def token_claims(self, token: str) -> Optional[str]:
+        """Memoized subject of a token already verified by this process (None if unknown or expired)"""
+        cached = self.tokens.get(token)
+        if cached is None:
+            return None
+        subject, expires_at, _ = cached
+        if expires_at is not None and expires_at <= time.time():
+            self.tokens.pop(token)
+            return None
+        return subject
+
+    def token_provider_id(self, token: str) -> Optional[int]:
+        """Provider id memoized for a verified token: its "pid" claim, or the id resolved for it"""
+        cached = self.tokens.get(token)
+        return cached[2] if cached is not None else None
+
+    def remember_token(self, token: str, subject: str, expires_at: Optional[float],
+                       provider_id: Optional[int] = None):
+        self.tokens.put(token, (subject, expires_at, provider_id))
+
+    def remember_token_provider(self, token: str, provider_id: int):
+        cached = self.tokens.get(token)
+        if cached is not None:
+            self.tokens.put(token, (cached[0], cached[1], provider_id))
+
+principal_cache = PrincipalCache()
+
+def get_principal_cache() -> PrincipalCache:
+    """Dependency returning the shared principal cache (overridable in tests)"""
+    return principal_cache
@@ -0,0 +1,225 @@
+"""
+Provider application rules and the bulk import pipeline.
+
+build_provider_record() holds the validation used by /api/provider/apply so
+single applications and partner-agency imports follow the same rules.
+ProviderImporter streams rows from CSV/NDJSON and writes them in batched
+transactions: one set-based duplicate check, one multi-row INSERT and one
+commit per batch.
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.service_provider import ServiceProvider
+from app.models.user import User
+from app.services.catalog import category_mask
+from app.services.gazetteer import gazetteer
+
+REQUIRED_FIELDS = [
+    "fullName", "email", "phone", "selectedCategories", "selectedServices", "responseTime",
+    "county", "subCounty", "ward", "serviceRadius", "minRate", "maxRate"
+]
+
+class ProviderRowError(ValueError):
+    """Raised when an application row fails validation."""
+
+def _parse_list(value) -> List[str]:
+    if isinstance(value, list):
+        return value
+    try:
+        return json.loads(value) if value else []
+    except json.JSONDecodeError:
+        return []
+
+def _parse_optional_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (ValueError, TypeError):
+        return None
+
+def build_provider_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate an application (form field names) and return ServiceProvider column values."""
+
+    missing = [name for name in REQUIRED_FIELDS if data.get(name) is None]
+    if missing:
+        raise ProviderRowError(f"Missing required fields: {', '.join(missing)}")
+
+    selected_categories = _parse_list(data.get("selectedCategories"))
+    selected_services = _parse_list(data.get("selectedServices"))
+
+    try:
+        min_rate = float(data["minRate"])
+        max_rate = float(data["maxRate"])
+    except (ValueError, TypeError):
+        raise ProviderRowError("Invalid rate values")
+
+    # Validate rate range
+    if min_rate >= max_rate:
+        raise ProviderRowError("Maximum rate must be higher than minimum rate")
+
+    # Create location string
+    location_parts = [data.get("specificLocation"), data["ward"], data["subCounty"], data["county"]]
+    location = ', '.join([part for part in location_parts if part])
+
+    # Forms without a map pin are placed at their ward's centroid
+    latitude = _parse_optional_float(data.get("latitude"))
+    longitude = _parse_optional_float(data.get("longitude"))
+    if latitude is None or longitude is None:
+        place = gazetteer.resolve(data["county"], data["subCounty"], data["ward"])
+        if place:
+            latitude, longitude = place.coordinates
+
+    # Combine service categories and specific services
+    all_services = list(selected_categories)
+    # Extract service names from "category:service" format
+    all_services.extend(service.split(':', 1)[1] for service in selected_services if ':' in service)
+
+    return {
+        "name": data["fullName"],
+        "business_name": data.get("businessName"),
+        "email": data["email"],
+        "phone": data["phone"],
+        "description": data.get("description") or '',
+        "services": json.dumps(all_services),
+        "category_mask": category_mask(json.dumps(all_services)),  # Core inserts skip the ORM event
+        "location": location,
+        "county": data["county"],
+        "sub_county": data["subCounty"],
+        "ward": data["ward"],
+        "specific_location": data.get("specificLocation"),
+        "service_radius": data["serviceRadius"],
+        "travel_fee": _parse_optional_float(data.get("travelFee")),
+        "landmark": data.get("landmark"),
+        "postal_code": data.get("postalCode"),
+        "service_areas_description": data.get("serviceAreasDescription"),
+        "latitude": latitude,
+        "longitude": longitude,
+        "full_address": data.get("fullAddress"),
+        "manual_address": data.get("manualAddress"),
+        "hourly_rate_min": min_rate,
+        "hourly_rate_max": max_rate,
+        "pricing_notes": data.get("pricingNotes"),
+        "response_time": data["responseTime"],
+        "availability_status": "pending",  # Application needs to be reviewed
+        "is_verified": False,
+        "created_at": datetime.utcnow(),
+    }
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a CSV (header row) or NDJSON text stream without loading it all."""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+    elif fmt in ("ndjson", "jsonl"):
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield {"_parse_error": "Invalid JSON line"}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def detect_format(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return "csv" if extension == "csv" else "ndjson"
+
+# Called after each committed batch with ([(provider_id, email), ...], promoted user ids),
+# e.g. to drop the promoted accounts' cached principals while the import is still running
+BatchHook = Callable[[List[Tuple[int, str]], List[int]], None]
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    promoted_user_ids: List[int] = field(default_factory=list)  # Client accounts that became providers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": len(self.errors),
+            "batches": self.batches,
+            "errors": self.errors[:100],  # Keep responses bounded for huge files
+        }
+
+class ProviderImporter:
+    """Validates and inserts provider rows in batched transactions."""
+
+    def __init__(self, db: Session, batch_size: int = 500, hooks: Sequence[BatchHook] = ()):
+        self.db = db
+        self.batch_size = batch_size
+        self.hooks = list(hooks)
+
+    def run(self, rows: Iterable[Dict[str, Any]]) -> ImportReport:
+        report = ImportReport()
+        batch: List[Dict[str, Any]] = []
+
+        for row_number, row in enumerate(rows, start=1):
+            if "_parse_error" in row:
+                report.errors.append({"row": row_number, "error": row["_parse_error"]})
+                continue
+            try:
+                record = build_provider_record(row)
+            except ProviderRowError as e:
+                report.errors.append({"row": row_number, "email": row.get("email"), "error": str(e)})
+                continue
+
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report)
+                batch = []
+
+        if batch:
+            self._flush(batch, report)
+        return report
+
+    def _flush(self, batch: List[Dict[str, Any]], report: ImportReport):
+        # Deduplicate within the batch, then against the table in one set-based query
+        unique: Dict[str, Dict[str, Any]] = {}
+        for record in batch:
+            unique.setdefault(record["email"], record)
+        existing = set(self.db.scalars(
+            select(ServiceProvider.email).where(ServiceProvider.email.in_(list(unique)))
+        ))
+        records = [record for email, record in unique.items() if email not in existing]
+        report.duplicates += len(batch) - len(records)
+
+        if records:
+            try:
+                # Multi-row INSERT (executemany/insertmanyvalues) instead of one round-trip per provider
+                inserted = self.db.execute(
+                    insert(ServiceProvider).returning(ServiceProvider.id, ServiceProvider.email),
+                    records
+                ).all()
+                # Existing client accounts with these emails become providers
+                promoted = self.db.execute(
+                    update(User).where(User.email.in_([r["email"] for r in records]))
+                    .values(user_type="provider").returning(User.id)
+                ).scalars().all()
+                self.db.execute(
+                    update(ServiceProvider).where(ServiceProvider.id.in_([row.id for row in inserted]))
+                    .values(user_id=select(User.id).where(User.email == ServiceProvider.email).scalar_subquery())
+                )
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            inserted = [(row.id, row.email) for row in inserted]
+            report.inserted += len(inserted)
+            report.promoted_user_ids.extend(promoted)
+            for hook in self.hooks:
+                hook(inserted, promoted)
+
+        report.batches += 1
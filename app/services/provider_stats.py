@@ -0,0 +1,143 @@
+"""
+Materialized provider dashboard stats.
+
+The hooks below run inside the caller's transaction, next to the write that
+changes a counter:
+
+- record_chat_turn(): a conversation becomes active when the client writes
+  last and stops being active when the provider replies.
+- change_new_requests(): offers waiting for the provider's answer, moved by
+  app.services.service_requests as requests are offered, taken or cancelled.
+- completed_jobs is bumped when the accepted provider completes a request.
+
+reconcile_provider_stats() recomputes the counters from conversations,
+request offers and requests with one GROUP BY each and is meant to run
+periodically (see reconcile_provider_stats.py).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database.database import dialect_insert
+from app.models.conversation import Conversation
+from app.models.provider_stats import ProviderStats
+from app.models.service_provider import ServiceProvider
+from app.models.service_request import RequestOffer, ServiceRequest
+
+COUNTERS = ("new_requests", "active_chats", "completed_jobs")
+
+def change_provider_stats(db: Session, provider_id: int, **deltas: int):
+    """Add deltas to a provider's counters (one upsert, never below zero). Does not commit."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    columns = {name: getattr(ProviderStats, name) for name in deltas}
+    db.execute(
+        dialect_insert(db.get_bind())(ProviderStats).values(
+            provider_id=provider_id, **{name: max(delta, 0) for name, delta in deltas.items()}
+        ).on_conflict_do_update(
+            index_elements=["provider_id"],
+            set_={
+                **{name: case((columns[name] + delta > 0, columns[name] + delta), else_=0)
+                   for name, delta in deltas.items()},
+                "updated_at": func.now()
+            }
+        )
+    )
+
+def record_chat_turn(db: Session, conversation_id: int, provider_id: int, sender_type: str):
+    """
+    Move active_chats when the conversation's turn changes hands. The conditional
+    UPDATE of last_sender_type reports through its row count whether it did, so
+    concurrent senders cannot both count the same transition. Does not commit.
+    """
+    if sender_type == "user":
+        turned = or_(Conversation.last_sender_type.is_(None), Conversation.last_sender_type != "user")
+        sign = 1
+    else:
+        turned = Conversation.last_sender_type == "user"
+        sign = -1
+
+    changed = db.execute(
+        update(Conversation).where(Conversation.id == conversation_id, turned).values(last_sender_type=sender_type),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    change_provider_stats(db, provider_id, active_chats=sign * changed)
+
+def change_new_requests(db: Session, provider_ids: Sequence[int], delta: int):
+    """Add delta to new_requests for each provider (one multi-row upsert). Does not commit."""
+    if not provider_ids or not delta:
+        return
+    insert = dialect_insert(db.get_bind())(ProviderStats)
+    new_count = ProviderStats.new_requests + delta
+    db.execute(
+        insert.values([
+            {"provider_id": provider_id, "new_requests": max(delta, 0)} for provider_id in provider_ids
+        ]).on_conflict_do_update(
+            index_elements=["provider_id"],
+            set_={"new_requests": case((new_count > 0, new_count), else_=0), "updated_at": func.now()}
+        )
+    )
+
+def read_provider_stats(db: Session, provider_id: int) -> Dict[str, int]:
+    """The provider's counters by primary key (zeros before the first event)"""
+    stats = db.get(ProviderStats, provider_id)
+    return {name: getattr(stats, name) if stats else 0 for name in COUNTERS}
+
+@dataclass
+class StatsDrift:
+    provider_id: int
+    field: str
+    stored: int
+    expected: int
+
+def reconcile_provider_stats(db: Session, fix: bool = True) -> List[StatsDrift]:
+    """Compare stored counters with conversations, offers and requests and repair drift"""
+
+    active = select(
+        Conversation.provider_id,
+        func.sum(case((Conversation.last_sender_type == "user", 1), else_=0)).label("active_chats")
+    ).group_by(Conversation.provider_id).subquery()
+    waiting = select(
+        RequestOffer.provider_id,
+        func.count(RequestOffer.id).label("new_requests")
+    ).where(RequestOffer.status == "new").group_by(RequestOffer.provider_id).subquery()
+    completed = select(
+        ServiceRequest.accepted_provider_id.label("provider_id"),
+        func.count(ServiceRequest.id).label("completed_jobs")
+    ).where(ServiceRequest.status == "completed").group_by(ServiceRequest.accepted_provider_id).subquery()
+
+    rows = db.execute(
+        select(ServiceProvider.id, active.c.active_chats, waiting.c.new_requests, completed.c.completed_jobs,
+               ProviderStats)
+        .outerjoin(active, active.c.provider_id == ServiceProvider.id)
+        .outerjoin(waiting, waiting.c.provider_id == ServiceProvider.id)
+        .outerjoin(completed, completed.c.provider_id == ServiceProvider.id)
+        .outerjoin(ProviderStats, ProviderStats.provider_id == ServiceProvider.id)
+    ).all()
+
+    drifted = []
+    now = datetime.utcnow()
+    for row in rows:
+        expected = {name: getattr(row, name) or 0 for name in COUNTERS}
+        stats = row.ProviderStats
+        for name, value in expected.items():
+            stored = getattr(stats, name) if stats else 0
+            if stored != value:
+                drifted.append(StatsDrift(provider_id=row.id, field=name, stored=stored, expected=value))
+
+        if fix:
+            if stats is None:
+                stats = ProviderStats(provider_id=row.id)
+                db.add(stats)
+            for name, value in expected.items():
+                setattr(stats, name, value)
+            stats.reconciled_at = now
+
+    if fix:
+        db.commit()
+    return drifted
@@ -0,0 +1,154 @@
+"""
+Incremental rating aggregates for service providers.
+
+Each review insert or edit adjusts rating_sum, total_reviews and the per-star
+histogram on ServiceProvider with a single UPDATE in the caller's transaction,
+so a write costs O(1) no matter how many reviews a provider has.
+reconcile_rating_aggregates() recomputes everything from the reviews table and
+is meant to run nightly (see reconcile_ratings.py). backfill_rating_aggregates()
+runs at startup and gives providers that predate rating_sum a consistent base.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import case, func, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.database.database import engine
+from app.models.service_provider import ServiceProvider, Review
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+def _star_column(rating: int):
+    return getattr(ServiceProvider, f"rating_{rating}")
+
+def _average(rating_sum, review_count):
+    # literal 1.0 keeps the division fractional on SQLite and numeric (roundable) on Postgres
+    return func.round(rating_sum * literal_column("1.0") / review_count, 1)
+
+def apply_rating_change(db: Session, provider_id: int, new_rating: int, old_rating: Optional[int] = None):
+    """
+    Fold a new review (old_rating=None) or an edited review into the provider's aggregates.
+
+    Does not commit; the caller commits together with the review row. Every SET
+    expression reads the pre-update row, so concurrent writers cannot lose updates.
+    """
+    values = {}
+    if old_rating is None:
+        sum_delta, count_delta = new_rating, 1
+    else:
+        sum_delta, count_delta = new_rating - old_rating, 0
+
+    if old_rating != new_rating:
+        new_bucket = _star_column(new_rating)
+        values[new_bucket.key] = new_bucket + 1
+        if old_rating is not None:
+            old_bucket = _star_column(old_rating)
+            values[old_bucket.key] = old_bucket - 1
+
+    new_sum = ServiceProvider.rating_sum + sum_delta
+    new_count = func.coalesce(ServiceProvider.total_reviews, 0) + count_delta
+    values.update(
+        rating_sum=new_sum,
+        total_reviews=new_count,
+        average_rating=_average(new_sum, new_count)
+    )
+
+    db.execute(
+        update(ServiceProvider).where(ServiceProvider.id == provider_id).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+
+@dataclass
+class RatingDrift:
+    provider_id: int
+    expected_count: int
+    stored_count: int
+    expected_sum: int
+    stored_sum: int
+
+def seeded_rating_sum(average_rating: Optional[float], total_reviews: Optional[int]) -> int:
+    """A rating_sum consistent with a count and average that have no review rows behind them"""
+    return round((average_rating or 0.0) * (total_reviews or 0))
+
+def reconcile_rating_aggregates(db: Session, fix: bool = True,
+                                provider_ids: Optional[Sequence[int]] = None) -> List[RatingDrift]:
+    """Compare stored aggregates with the reviews table (one GROUP BY) and repair drift."""
+
+    buckets = [
+        func.sum(case((Review.rating == star, 1), else_=0)).label(f"rating_{star}")
+        for star in range(MIN_RATING, MAX_RATING + 1)
+    ]
+    totals = select(
+        Review.provider_id,
+        func.count(Review.id).label("review_count"),
+        func.sum(Review.rating).label("rating_sum"),
+        *buckets
+    ).group_by(Review.provider_id).subquery()
+
+    query = select(ServiceProvider, totals).outerjoin(totals, totals.c.provider_id == ServiceProvider.id)
+    if provider_ids is not None:
+        query = query.where(ServiceProvider.id.in_(provider_ids))
+    rows = db.execute(query).all()
+
+    drifted = []
+    for row in rows:
+        provider = row.ServiceProvider
+        expected = {
+            "total_reviews": row.review_count or 0,
+            "rating_sum": row.rating_sum or 0,
+            **{f"rating_{star}": getattr(row, f"rating_{star}") or 0 for star in range(MIN_RATING, MAX_RATING + 1)}
+        }
+        if all(getattr(provider, name) == value for name, value in expected.items()):
+            continue
+
+        drifted.append(RatingDrift(
+            provider_id=provider.id,
+            expected_count=expected["total_reviews"],
+            stored_count=provider.total_reviews or 0,
+            expected_sum=expected["rating_sum"],
+            stored_sum=provider.rating_sum or 0
+        ))
+        if fix:
+            for name, value in expected.items():
+                setattr(provider, name, value)
+            count = expected["total_reviews"]
+            provider.average_rating = round(expected["rating_sum"] / count, 1) if count else 0.0
+
+    if fix and drifted:
+        db.commit()
+    return drifted
+
+def backfill_rating_aggregates(bind=None) -> int:
+    """
+    Repair providers whose rating_sum cannot match their count; returns rows fixed.
+
+    Every rating is at least 1, so rating_sum < total_reviews only happens for
+    rows that predate the column (it was added with a default of 0). Those with
+    review rows are reconciled from them; those with a count but no rows (the
+    sample providers, imported listings) get rating_sum from their average, so
+    the next apply_rating_change() starts from the same average.
+    """
+    with Session(bind=bind if bind is not None else engine) as db:
+        stale = db.execute(
+            select(ServiceProvider.id, ServiceProvider.average_rating, ServiceProvider.total_reviews,
+                   select(Review.id).where(Review.provider_id == ServiceProvider.id).exists().label("reviewed"))
+            .where(func.coalesce(ServiceProvider.total_reviews, 0) > ServiceProvider.rating_sum)
+        ).all()
+        if not stale:
+            return 0
+
+        reviewed = [row.id for row in stale if row.reviewed]
+        if reviewed:
+            reconcile_rating_aggregates(db, provider_ids=reviewed)
+        for row in stale:
+            if not row.reviewed:
+                db.execute(
+                    update(ServiceProvider).where(ServiceProvider.id == row.id)
+                    .values(rating_sum=seeded_rating_sum(row.average_rating, row.total_reviews)),
+                    execution_options={"synchronize_session": False}
+                )
+        db.commit()
+    return len(stale)
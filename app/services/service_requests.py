@@ -0,0 +1,287 @@
+"""
+Service request lifecycle and provider request queues.
+
+A request moves open -> offered -> accepted -> completed, or to cancelled from
+any non-final state. Each transition is a compare-and-set UPDATE on status, so
+two providers accepting at once cannot both win. Offers are the providers'
+inboxes: offer_request() writes one row per matching provider with a single
+INSERT ... SELECT, and accepting, declining or cancelling updates offers with
+set-based UPDATEs. Provider dashboard counters follow in the same transaction.
+
+None of these functions commit; the caller commits and then records activity.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.database.database import dialect_insert
+from app.models.conversation import Conversation
+from app.models.service_provider import ServiceProvider
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.models.user import User
+from app.services.conversations import get_or_create_conversation
+from app.services.provider_stats import change_new_requests, change_provider_stats
+
+OPEN = "open"
+OFFERED = "offered"
+ACCEPTED = "accepted"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+
+TRANSITIONS = {
+    OPEN: {OFFERED, CANCELLED},
+    OFFERED: {OPEN, ACCEPTED, CANCELLED},  # Back to open when every offered provider declines
+    ACCEPTED: {COMPLETED, CANCELLED},
+    COMPLETED: set(),
+    CANCELLED: set(),
+}
+
+OFFER_NEW = "new"
+OFFER_ACCEPTED = "accepted"
+OFFER_DECLINED = "declined"
+OFFER_WITHDRAWN = "withdrawn"  # Taken by another provider or cancelled by the client
+OFFER_EXPIRED = "expired"  # Not answered within a dispatch wave
+
+# How the client dashboard labels request states
+CLIENT_STATUS = {OPEN: "active", OFFERED: "active", ACCEPTED: "in_progress", COMPLETED: "completed", CANCELLED: "cancelled"}
+
+class RequestStateError(ValueError):
+    """The request (or offer) is not in a state that allows the change"""
+
+def transition(db: Session, request_id: int, to_state: str, *conditions, **values) -> bool:
+    """
+    Move a request to to_state from any state allowed to reach it, as one
+    compare-and-set UPDATE. Returns False if the request was not in such a state.
+    """
+    from_states = [state for state, targets in TRANSITIONS.items() if to_state in targets]
+    result = db.execute(
+        update(ServiceRequest).where(
+            ServiceRequest.id == request_id, ServiceRequest.status.in_(from_states), *conditions
+        ).values(status=to_state, **values),
+        execution_options={"synchronize_session": False}
+    )
+    return result.rowcount == 1
+
+def create_request(db: Session, client_id: int, category: str, **fields) -> ServiceRequest:
+    request = ServiceRequest(client_id=client_id, category=category, status=OPEN, **fields)
+    db.add(request)
+    db.flush()
+    return request
+
+def matching_providers(request: ServiceRequest):
+    """SELECT of providers who offer the request's category and cover its county"""
+    query = select(ServiceProvider.id).where(
+        ServiceProvider.is_active == True,
+        ServiceProvider.offers(request.category)
+    )
+    if request.county:
+        query = query.where(ServiceProvider.county == request.county)
+    return query
+
+def offer_request(db: Session, request: ServiceRequest, provider_ids: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    Offer an open or offered request to every matching provider (or only to
+    provider_ids among them) with one INSERT ... SELECT; providers who already
+    have the offer are skipped. Returns the ids of providers offered now.
+
+    Raises RequestStateError if the request was accepted or cancelled meanwhile;
+    the caller rolls back, which discards the offers just inserted.
+    """
+    candidates = matching_providers(request)
+    if provider_ids is not None:
+        candidates = candidates.where(ServiceProvider.id.in_(list(provider_ids)))
+    now = datetime.utcnow()
+
+    # The status is read again here rather than trusted from the loaded request
+    still_open = select(ServiceRequest.id).where(
+        ServiceRequest.id == request.id, ServiceRequest.status.in_((OPEN, OFFERED))
+    ).exists()
+    offered = db.execute(
+        dialect_insert(db.get_bind())(RequestOffer).from_select(
+            ["request_id", "provider_id", "status", "created_at"],
+            select(literal(request.id), candidates.subquery().c.id, literal(OFFER_NEW), literal(now)).where(still_open)
+        ).on_conflict_do_nothing(
+            index_elements=["request_id", "provider_id"]
+        ).returning(RequestOffer.provider_id)
+    ).scalars().all()
+
+    if not offered:
+        return offered
+    # Both updates lock the request row, so a cancel or accept racing this wave
+    # either waits for our commit (and withdraws these offers) or makes us fail
+    if not transition(db, request.id, OFFERED, offered_at=now) and not _keep_offered(db, request.id):
+        raise RequestStateError("This request is no longer open for offers")
+    change_new_requests(db, offered, 1)
+    return offered
+
+def _keep_offered(db: Session, request_id: int) -> bool:
+    """Compare-and-set for a later wave: the request must still be offered"""
+    return db.execute(
+        update(ServiceRequest).where(
+            ServiceRequest.id == request_id, ServiceRequest.status == OFFERED
+        ).values(status=OFFERED),
+        execution_options={"synchronize_session": False}
+    ).rowcount == 1
+
+def _withdraw_offers(db: Session, request_id: int, now: datetime, status: str = OFFER_NEW) -> List[int]:
+    return db.execute(
+        update(RequestOffer).where(
+            RequestOffer.request_id == request_id, RequestOffer.status == status
+        ).values(status=OFFER_WITHDRAWN, responded_at=now).returning(RequestOffer.provider_id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+
+def accept_offer(db: Session, request_id: int, provider_id: int) -> Conversation:
+    """
+    The provider takes the request: their offer is accepted, everyone else's is
+    withdrawn, and the client/provider conversation is opened.
+    """
+    now = datetime.utcnow()
+    taken = db.execute(
+        update(RequestOffer).where(
+            RequestOffer.request_id == request_id,
+            RequestOffer.provider_id == provider_id,
+            RequestOffer.status == OFFER_NEW
+        ).values(status=OFFER_ACCEPTED, responded_at=now),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if not taken or not transition(db, request_id, ACCEPTED, accepted_provider_id=provider_id, accepted_at=now):
+        raise RequestStateError("This request is no longer available")
+
+    change_new_requests(db, [provider_id, *_withdraw_offers(db, request_id, now)], -1)
+
+    request = db.get(ServiceRequest, request_id)
+    return get_or_create_conversation(
+        db, f"request-{request_id}", request.client_id, provider_id,
+        request_id=request_id, service_category=request.category
+    )
+
+def _reopen_if_unoffered(db: Session, request_id: int):
+    # A request nobody can still accept goes back to open
+    still_offered = select(RequestOffer.id).where(
+        RequestOffer.request_id == request_id, RequestOffer.status == OFFER_NEW
+    ).exists()
+    transition(db, request_id, OPEN, ~still_offered)
+
+def decline_offer(db: Session, request_id: int, provider_id: int):
+    """Decline an offer; a request nobody else can still accept goes back to open"""
+    declined = db.execute(
+        update(RequestOffer).where(
+            RequestOffer.request_id == request_id,
+            RequestOffer.provider_id == provider_id,
+            RequestOffer.status == OFFER_NEW
+        ).values(status=OFFER_DECLINED, responded_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if not declined:
+        raise RequestStateError("This request is no longer available")
+
+    change_new_requests(db, [provider_id], -1)
+    _reopen_if_unoffered(db, request_id)
+
+def expire_offers(db: Session, request_id: int, provider_ids: Sequence[int]) -> List[int]:
+    """Expire the given providers' unanswered offers (one UPDATE). Returns whose offers expired."""
+    expired = db.execute(
+        update(RequestOffer).where(
+            RequestOffer.request_id == request_id,
+            RequestOffer.provider_id.in_(list(provider_ids)),
+            RequestOffer.status == OFFER_NEW
+        ).values(status=OFFER_EXPIRED, responded_at=datetime.utcnow()).returning(RequestOffer.provider_id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+    change_new_requests(db, expired, -1)
+    _reopen_if_unoffered(db, request_id)
+    return expired
+
+def complete_request(db: Session, request_id: int, provider_id: int):
+    """The accepted provider marks the job done"""
+    if not transition(db, request_id, COMPLETED, ServiceRequest.accepted_provider_id == provider_id,
+                      closed_at=datetime.utcnow()):
+        raise RequestStateError("Only an accepted request can be completed by its provider")
+    change_provider_stats(db, provider_id, completed_jobs=1)
+
+def cancel_request(db: Session, request_id: int, client_id: int):
+    """
+    The client cancels; offers still waiting for an answer are withdrawn, and so
+    is an accepted one so the job leaves that provider's queue.
+    """
+    now = datetime.utcnow()
+    if not transition(db, request_id, CANCELLED, ServiceRequest.client_id == client_id, closed_at=now):
+        raise RequestStateError("This request can no longer be cancelled")
+    change_new_requests(db, _withdraw_offers(db, request_id, now), -1)
+    _withdraw_offers(db, request_id, now, status=OFFER_ACCEPTED)
+
+def provider_queue_query(db: Session, provider_id: int, statuses: Sequence[str] = (OFFER_NEW, OFFER_ACCEPTED),
+                         before_id: Optional[int] = None, limit: int = 20):
+    """
+    A provider's offers newest first, read off ix_request_offers_provider_queue,
+    with the request and the client's name joined in by primary key.
+    """
+    query = db.query(
+        ServiceRequest.id,
+        RequestOffer.id.label("offer_id"),
+        RequestOffer.status,
+        ServiceRequest.status.label("request_status"),
+        ServiceRequest.category,
+        func.coalesce(ServiceRequest.description, "").label("description"),
+        ServiceRequest.urgency,
+        func.coalesce(ServiceRequest.location, ServiceRequest.county, "").label("location"),
+        ServiceRequest.latitude,
+        ServiceRequest.longitude,
+        func.coalesce(User.name, "Client").label("customer_name"),
+        RequestOffer.created_at
+    ).join(
+        ServiceRequest, ServiceRequest.id == RequestOffer.request_id
+    ).outerjoin(
+        User, User.id == ServiceRequest.client_id
+    ).filter(
+        RequestOffer.provider_id == provider_id,
+        RequestOffer.status.in_(list(statuses))
+    )
+    if before_id is not None:
+        query = query.filter(RequestOffer.id < before_id)
+    return query.order_by(RequestOffer.id.desc()).limit(limit)
+
+def client_requests_query(db: Session, client_id: int, before_id: Optional[int] = None, limit: int = 20):
+    """A client's requests newest first, with how many providers can still take each one"""
+    providers_in_play = select(func.count(RequestOffer.id)).where(
+        RequestOffer.request_id == ServiceRequest.id,
+        RequestOffer.status.in_([OFFER_NEW, OFFER_ACCEPTED])
+    ).scalar_subquery()
+
+    query = db.query(
+        ServiceRequest.id,
+        ServiceRequest.status,
+        ServiceRequest.category,
+        func.coalesce(ServiceRequest.description, "").label("description"),
+        ServiceRequest.urgency,
+        func.coalesce(ServiceRequest.location, ServiceRequest.county, "").label("location"),
+        ServiceRequest.accepted_provider_id,
+        ServiceRequest.created_at,
+        providers_in_play.label("provider_count")
+    ).filter(ServiceRequest.client_id == client_id)
+    if before_id is not None:
+        query = query.filter(ServiceRequest.id < before_id)
+    return query.order_by(ServiceRequest.id.desc()).limit(limit)
+
+def count_client_requests(db: Session, client_id: int):
+    """{state: count} for a client's requests (one grouped scan of ix_service_requests_client)"""
+    rows = db.query(ServiceRequest.status, func.count(ServiceRequest.id)).filter(
+        ServiceRequest.client_id == client_id
+    ).group_by(ServiceRequest.status).all()
+    return dict(rows)
+
+def count_active_client_chats(db: Session, client_id: int) -> int:
+    """
+    A client's conversations still in play: chats started without a request,
+    and those whose request is neither completed nor cancelled.
+    """
+    return db.query(func.count(Conversation.id)).outerjoin(
+        ServiceRequest, ServiceRequest.id == Conversation.request_id
+    ).filter(
+        Conversation.client_id == client_id,
+        (ServiceRequest.id.is_(None)) | ServiceRequest.status.notin_([COMPLETED, CANCELLED])
+    ).scalar()
@@ -0,0 +1,169 @@
+"""
+Problem-detection sessions in Redis.
+
+A session used to be one JSON string (session:{id}) written with SETEX and
+read back whole with GET + json.loads, and updating it meant reading,
+changing and rewriting the entire blob. SessionStore keeps each session as
+a Redis hash instead:
+
+    session:{id} -> {"final_category": "\"plumbing\"", "urgency_level": "\"high\"", ...}
+
+with every top-level field JSON-encoded on its own, so
+
+- update() sets only the fields that changed (HSET), with no read first;
+- get() can fetch just the fields a handler needs (HMGET);
+- every read and write refreshes the expiry in the same pipelined round
+  trip, so SESSION_TTL_SECONDS is measured from last use (sliding TTL);
+- get_many() reads several sessions in one pipeline.
+
+Hot reads are served from a small per-process TTL cache that writes through
+this store keep current; another process's update shows up within
+SESSION_CACHE_TTL_SECONDS. Sessions written in the old JSON-string format
+are still readable until they expire.
+
+While Redis is unreachable (or its circuit breaker is open) sessions are
+created, read and updated in a bounded in-process store instead
+(REDIS_FALLBACK_MAX_ENTRIES), so problem detection keeps working on the
+worker that took the request. Those sessions are copied to Redis the next
+time they are read after it recovers.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from redis.exceptions import RedisError, ResponseError
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.services.principals import TTLCache
+
+class SessionStore:
+    """Hash-per-session store with sliding expiry and a local read cache."""
+
+    def __init__(self, redis=None, ttl_seconds: Optional[int] = None,
+                 cache_ttl_seconds: Optional[float] = None, cache_size: Optional[int] = None):
+        self.redis = redis if redis is not None else redis_client
+        self.ttl_seconds = ttl_seconds or settings.SESSION_TTL_SECONDS
+        cache_ttl = settings.SESSION_CACHE_TTL_SECONDS if cache_ttl_seconds is None else cache_ttl_seconds
+        self.local = TTLCache(cache_size or settings.SESSION_CACHE_SIZE, cache_ttl) if cache_ttl > 0 else None
+        self.fallback = TTLCache(settings.REDIS_FALLBACK_MAX_ENTRIES, self.ttl_seconds)
+
+    @staticmethod
+    def key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def encode(data: Dict[str, Any]) -> Dict[str, str]:
+        return {field: json.dumps(value, separators=(",", ":")) for field, value in data.items()}
+
+    @staticmethod
+    def decode(raw: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        return {field: json.loads(value) for field, value in raw.items() if value is not None}
+
+    def _cached(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self.local.get(session_id) if self.local is not None else None
+
+    def _remember(self, session_id: str, data: Optional[Dict[str, Any]]):
+        if self.local is None:
+            return
+        if data is None:
+            self.local.pop(session_id)
+        else:
+            self.local.put(session_id, data)
+
+    async def create(self, session_id: str, data: Dict[str, Any]):
+        """Store a new session (replacing any with the same id)"""
+        key = self.key(session_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=self.encode(data))
+        pipe.expire(key, self.ttl_seconds)
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            print(f"Session {session_id} kept in memory, Redis unavailable: {e}")
+            self.fallback.put(session_id, dict(data))
+        else:
+            self.fallback.pop(session_id)
+        self._remember(session_id, dict(data))
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """The session (or just the given fields of it), or None if it does not exist or expired"""
+        fields = list(fields) if fields is not None else None
+        data = self._cached(session_id)
+        if data is None:
+            data = (await self.get_many([session_id]))[0]
+            if data is None:
+                return None
+        if fields is not None:
+            return {field: data[field] for field in fields if field in data}
+        return dict(data)
+
+    async def get_many(self, session_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Several whole sessions in one pipelined round trip, refreshing each one's expiry"""
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hgetall(self.key(session_id))
+            pipe.expire(self.key(session_id), self.ttl_seconds)
+        try:
+            replies = await pipe.execute(raise_on_error=False)
+        except RedisError as e:
+            print(f"Session read served from memory, Redis unavailable: {e}")
+            return [self.fallback.get(session_id) for session_id in session_ids]
+
+        sessions = []
+        for session_id, raw in zip(session_ids, replies[::2]):
+            if isinstance(raw, ResponseError):
+                raw = await self._read_legacy(session_id)
+            data = self.decode(raw) if raw else None
+            kept = self.fallback.get(session_id)
+            if kept is not None:
+                # Created or changed while Redis was down; that copy is the newer one
+                data = {**(data or {}), **kept}
+                await self.create(session_id, data)
+            self._remember(session_id, data)
+            sessions.append(data)
+        return sessions
+
+    async def _read_legacy(self, session_id: str) -> Optional[Dict[str, str]]:
+        """A session still stored as one JSON string, in the encoded hash form"""
+        blob = await self.redis.get(self.key(session_id))
+        return self.encode(json.loads(blob)) if blob else None
+
+    async def update(self, session_id: str, **fields: Any):
+        """
+        Set some fields of a session and refresh its expiry, without reading it.
+        Callers check that the session exists first (a get() also keeps it alive).
+        """
+        key = self.key(session_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(key, mapping=self.encode(fields))
+        pipe.expire(key, self.ttl_seconds)
+        try:
+            await pipe.execute()
+        except ResponseError:
+            # Old JSON-string session: rewrite it as a hash with the new fields
+            legacy = await self._read_legacy(session_id)
+            await self.create(session_id, {**self.decode(legacy or {}), **fields})
+            return
+        except RedisError as e:
+            print(f"Session {session_id} updated in memory, Redis unavailable: {e}")
+            known = self.fallback.get(session_id) or self._cached(session_id) or {}
+            self.fallback.put(session_id, {**known, **fields})
+        else:
+            self.fallback.pop(session_id)
+        cached = self._cached(session_id)
+        self._remember(session_id, {**cached, **fields} if cached is not None else None)
+
+    async def delete(self, *session_ids: str):
+        for session_id in session_ids:
+            self._remember(session_id, None)
+            self.fallback.pop(session_id)
+        if session_ids:
+            await self.redis.delete(*[self.key(session_id) for session_id in session_ids])
+
+session_store = SessionStore()
+
+def get_session_store() -> SessionStore:
+    """Dependency returning the shared session store (overridable in tests)"""
+    return session_store
@@ -0,0 +1,161 @@
+"""
+Unread counters for inbox badges.
+
+SQL holds the truth: Conversation.client_unread/provider_unread per thread and
+UnreadTotal per owner, both changed in the same transaction as the message
+insert or read. Each change is also queued on the session; after commit the
+caller hands pop_unread_deltas(db) to UnreadCounters.apply(), which replaces
+the affected owners' Redis hashes with a stale marker so the next read reloads
+them from SQL:
+
+    unread:{owner_type}:{owner_id} -> {"total": n, "<conversation id>": n, "loaded": "1"}
+
+Deltas are not added to a cached hash: a load may already have read the
+committed change from SQL, and adding it again would count it twice. A load
+WATCHes the key while it reads SQL and starts over if apply() marks it stale
+in between; a load that read SQL just before a commit and wrote its hash after
+is marked stale by that commit's apply(). A hash is trusted only when it carries
+the "loaded" marker of a full load. Badge reads are one HMGET, or one
+primary-key lookup when Redis is unavailable.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import WatchError
+from sqlalchemy import case, event
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import redis_client
+from app.database.database import dialect_insert
+from app.models.conversation import Conversation, UnreadTotal
+
+CACHE_TTL_SECONDS = 24 * 3600
+LOAD_ATTEMPTS = 3  # Loads raced by invalidations; after that the counts are served from SQL uncached
+DELTAS_KEY = "unread_deltas"
+
+# (owner_type, owner_id, conversation_id, delta)
+UnreadDelta = Tuple[str, int, int, int]
+
+def change_unread(db: Session, owner_type: str, owner_id: int, deltas: Dict[int, int]):
+    """
+    Apply per-conversation deltas to the owner's SQL total (one upsert, never below
+    zero) and queue them for Redis. Does not commit.
+    """
+    deltas = {conversation_id: delta for conversation_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    change = sum(deltas.values())
+    new_total = UnreadTotal.unread + change
+    db.execute(
+        dialect_insert(db.get_bind())(UnreadTotal).values(
+            owner_type=owner_type, owner_id=owner_id, unread=max(change, 0)
+        ).on_conflict_do_update(
+            index_elements=["owner_type", "owner_id"],
+            set_={"unread": case((new_total > 0, new_total), else_=0)}
+        )
+    )
+    db.info.setdefault(DELTAS_KEY, []).extend(
+        (owner_type, owner_id, conversation_id, delta) for conversation_id, delta in deltas.items()
+    )
+
+def pop_unread_deltas(db: Session) -> List[UnreadDelta]:
+    return db.info.pop(DELTAS_KEY, [])
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_deltas(session, previous_transaction):
+    # Changes from a rolled-back transaction never reached SQL, so they must not reach Redis
+    if not previous_transaction.nested:
+        session.info.pop(DELTAS_KEY, None)
+
+class UnreadCounters:
+    """Redis mirror of the SQL unread counters."""
+
+    def __init__(self, redis=None):
+        self.redis = redis or redis_client
+
+    @staticmethod
+    def key(owner_type: str, owner_id: int) -> str:
+        return f"unread:{owner_type}:{owner_id}"
+
+    async def apply(self, deltas: List[UnreadDelta]):
+        """Invalidate the owners whose counts changed; failures only cost a stale badge until the TTL"""
+        if not deltas:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for key in {self.key(owner_type, owner_id) for owner_type, owner_id, _, _ in deltas}:
+                    # Written even when the key is missing, so a load WATCHing it starts over
+                    pipe.delete(key)
+                    pipe.hset(key, "stale", "1")
+                    pipe.expire(key, CACHE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Unread counter update failed: {e}")
+
+    @staticmethod
+    def read_sql(db: Session, owner_type: str, owner_id: int) -> Dict[str, int]:
+        """The owner's counts from SQL: the total row plus conversations with unread messages"""
+        # A column query, not db.get(): a retried load must not see the identity map's old row
+        total = db.query(UnreadTotal.unread).filter(
+            UnreadTotal.owner_type == owner_type, UnreadTotal.owner_id == owner_id
+        ).scalar()
+        if owner_type == "provider":
+            unread, owner_filter = Conversation.provider_unread, Conversation.provider_id == owner_id
+        else:
+            unread, owner_filter = Conversation.client_unread, Conversation.client_id == owner_id
+        rows = db.query(Conversation.id, unread).filter(owner_filter, unread > 0).all()
+
+        counts = {str(conversation_id): count for conversation_id, count in rows}
+        counts["total"] = total or 0
+        return counts
+
+    async def load(self, db: Session, owner_type: str, owner_id: int) -> Dict[str, int]:
+        """Rebuild the owner's hash from SQL, unless apply() keeps marking it stale meanwhile"""
+        key = self.key(owner_type, owner_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for _ in range(LOAD_ATTEMPTS):
+                await pipe.watch(key)
+                counts = self.read_sql(db, owner_type, owner_id)
+                pipe.multi()
+                pipe.delete(key)
+                pipe.hset(key, mapping={**counts, "loaded": "1"})
+                pipe.expire(key, CACHE_TTL_SECONDS)
+                try:
+                    await pipe.execute()
+                    return counts
+                except WatchError:
+                    continue  # A commit landed between the SQL read and the write; read again
+        return counts
+
+    async def badge(self, db: Session, owner_type: str, owner_id: int) -> int:
+        """Total unread for the owner: one HMGET, or one primary-key lookup"""
+        try:
+            loaded, total = await self.redis.hmget(self.key(owner_type, owner_id), "loaded", "total")
+            if loaded:
+                return max(int(total or 0), 0)
+            return (await self.load(db, owner_type, owner_id))["total"]
+        except Exception as e:
+            print(f"Unread cache unavailable, reading SQL: {e}")
+            total = db.get(UnreadTotal, (owner_type, owner_id))
+            return total.unread if total else 0
+
+    async def counts(self, db: Session, owner_type: str, owner_id: int) -> Dict[str, int]:
+        """Per-conversation unread counts (keyed by conversation id) plus "total" """
+        try:
+            counts = await self.redis.hgetall(self.key(owner_type, owner_id))
+            if counts.get("loaded"):
+                return {name: int(value) for name, value in counts.items() if name != "loaded"}
+            return await self.load(db, owner_type, owner_id)
+        except Exception as e:
+            print(f"Unread cache unavailable, reading SQL: {e}")
+            return self.read_sql(db, owner_type, owner_id)
+
+unread_counters = UnreadCounters()
+
+def get_unread_counters() -> UnreadCounters:
+    """Dependency returning the shared counters (overridable in tests)"""
+    return unread_counters
+
+def owner_for(user, provider: Optional[object]) -> Tuple[str, int]:
+    """Which inbox a user reads: their provider inbox if they are a provider, else their client inbox"""
+    return ("provider", provider.id) if provider is not None else ("user", user.id)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Fill in coordinates for providers and users that have none.
+
+Each row's landmark and address fields are geocoded offline against the
+gazetteer and its estate lists (results land in the geocode_cache table);
+rows whose text names nothing known are placed at their form's ward,
+sub-county or county. Safe to rerun: only rows still missing coordinates
+are touched, and each batch is committed on its own.
+
+    python backfill_geocodes.py --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, ensure_schema
+from app.services.geocoding import backfill_coordinates
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing provider and user coordinates")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows read and updated per transaction")
+    args = parser.parse_args()
+
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        reports = backfill_coordinates(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    for report in reports:
+        print(f"✅ {report.table}: placed {report.placed} ({report.from_text} from address text), "
+              f"{report.unplaced} still without coordinates")
+
+if __name__ == "__main__":
+    main()
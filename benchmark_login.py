@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput and event-loop responsiveness.
+
+Fires a burst of concurrent logins at an in-process app (SQLite in a temp
+directory) and pings a trivial endpoint throughout, so the report shows both
+logins per second and how long other requests waited while bcrypt was busy.
+Compare the password pool with hashing inline on the event loop:
+
+    python benchmark_login.py --requests 64 --concurrency 32
+    python benchmark_login.py --requests 64 --concurrency 32 --inline
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base, get_db
+from app.models.user import User
+from app.routers import users
+from app.services.passwords import PasswordPool, get_password_pool
+
+EMAIL = "bench@example.com"
+PASSWORD = "correct horse battery staple"
+
+class InlinePasswords(PasswordPool):
+    """The old behaviour: bcrypt on the event loop"""
+
+    async def _run(self, function, *args):
+        return function(*args)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+async def run(args, app):
+    transport = httpx.ASGITransport(app=app)
+    logins, pings, statuses = [], [], {}
+    done = asyncio.Event()
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            async with gate:
+                started = time.perf_counter()
+                response = await client.post("/api/users/login", json={"email": EMAIL, "password": PASSWORD})
+                logins.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def ping():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                pings.append(time.perf_counter() - started)
+                await asyncio.sleep(0.02)
+
+        pinger = asyncio.create_task(ping())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await pinger
+
+    return elapsed, logins, pings, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument("--requests", type=int, default=64, help="Logins to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="Logins in flight at once")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=4, help="Password pool threads")
+    parser.add_argument("--max-queue", type=int, default=64, help="Password jobs allowed to wait")
+    parser.add_argument("--inline", action="store_true", help="Hash on the event loop (old behaviour)")
+    args = parser.parse_args()
+
+    pool_class = InlinePasswords if args.inline else PasswordPool
+    passwords = pool_class(workers=args.workers, max_queue=args.max_queue, rounds=args.rounds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        db.add(User(email=EMAIL, name="Bench", password_hash=passwords.context.hash(PASSWORD)))
+        db.commit()
+        db.close()
+
+        def override_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = FastAPI()
+        app.include_router(users.router, prefix="/api/users")
+        app.get("/ping")(lambda: {"ok": True})
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_password_pool] = lambda: passwords
+
+        elapsed, logins, pings, statuses = asyncio.run(run(args, app))
+        engine.dispose()
+    passwords.shutdown()
+
+    mode = "inline on the event loop" if args.inline else f"password pool ({args.workers} workers)"
+    print(f"📊 {args.requests} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}, {mode}")
+    print(f"   throughput:    {statuses.get(200, 0) / elapsed:.1f} logins/s ({elapsed:.2f}s total)")
+    print(f"   login latency: p50 {statistics.median(logins) * 1000:.0f}ms, p95 {percentile(logins, 0.95) * 1000:.0f}ms")
+    print(f"   ping latency:  p50 {statistics.median(pings) * 1000:.1f}ms, max {max(pings) * 1000:.0f}ms "
+          f"({len(pings)} pings)")
+    print(f"   responses:     {dict(sorted(statuses.items()))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Shared test scaffolding: an in-memory SQLite database every session shares,
+and a FastAPI app that reads and writes through it.
+
+The test files also run as scripts, so the helpers are plain functions they
+import; the fixtures wrap them for tests that take a fresh database.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base, get_db, get_read_db
+
+def memory_database(engine=None):
+    """Create the schema (in memory unless an engine is given) and return (engine, Session)"""
+    engine = engine or create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+def make_test_app(Session, *routers) -> FastAPI:
+    """
+    An app serving the routers, each either a router or a (router, prefix)
+    pair, with get_db and get_read_db opening sessions from Session.
+    """
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    for router in routers:
+        router, prefix = router if isinstance(router, tuple) else (router, "")
+        app.include_router(router, prefix=prefix)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    return app
+
+@pytest.fixture
+def database():
+    """A fresh in-memory database as (engine, Session)"""
+    engine, Session = memory_database()
+    yield engine, Session
+    engine.dispose()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Regenerate static/js/service-catalog.js from app/data/service_catalog.json.
+
+The data file is the only place categories and services are edited; the
+browser module is written from it so the service picker, the API and the
+matcher never disagree. Run after changing the catalog, or with --check in
+CI to fail when the committed bundle is stale:
+
+    python generate_service_catalog_js.py
+    python generate_service_catalog_js.py --check
+"""
+
+import argparse
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.catalog import CATALOG_PATH
+
+JS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "js", "service-catalog.js")
+
+HEADER = """\
+/**
+ * Service categories and listings used throughout the application.
+ *
+ * GENERATED by generate_service_catalog_js.py from app/data/service_catalog.json.
+ * Do not edit by hand: change the data file and rerun the generator.
+ */
+"""
+
+UTILS = """\
+// Flat list and id index, built once when the module loads
+export const ALL_SERVICES = Object.freeze(Object.values(SERVICES).flat());
+export const SERVICES_BY_ID = new Map(ALL_SERVICES.map(service => [service.id, service]));
+
+// Helper functions to work with the service data
+export const ServiceUtils = {
+    // Get all services as a flat array
+    getAllServices() {
+        return ALL_SERVICES.slice();
+    },
+
+    // Get a service by its id
+    getServiceById(serviceId) {
+        return SERVICES_BY_ID.get(serviceId) || null;
+    },
+
+    // Get the catalog category of a category or service id (legacy ids included)
+    getServiceCategory(id) {
+        if (SERVICE_CATEGORIES[id]) return id;
+        if (CATEGORY_ALIASES[id]) return CATEGORY_ALIASES[id];
+        const service = SERVICES_BY_ID.get(id);
+        return service ? service.category : null;
+    },
+
+    // Get services by category
+    getServicesByCategory(categoryKey) {
+        return SERVICES[categoryKey] || [];
+    },
+
+    // Get category information
+    getCategoryInfo(categoryKey) {
+        return SERVICE_CATEGORIES[categoryKey] || null;
+    },
+
+    // Get all category keys
+    getCategoryKeys() {
+        return Object.keys(SERVICE_CATEGORIES);
+    },
+
+    // Search services by name or description
+    searchServices(searchTerm) {
+        const term = searchTerm.toLowerCase();
+        return ALL_SERVICES.filter(service =>
+            service.name.toLowerCase().includes(term) ||
+            service.description.toLowerCase().includes(term)
+        );
+    },
+
+    // Find services by urgency keywords
+    findUrgentServices(problemDescription) {
+        const description = problemDescription.toLowerCase();
+        return ALL_SERVICES.filter(service =>
+            service.urgency_keywords.some(keyword =>
+                description.includes(keyword.toLowerCase())
+            )
+        );
+    },
+
+    // Get color classes for a category
+    getCategoryColors(categoryKey) {
+        const category = SERVICE_CATEGORIES[categoryKey];
+        return category ? category.colorClasses : SERVICE_CATEGORIES.general_handyman.colorClasses;
+    },
+
+    // Format service data for API responses
+    formatForAPI() {
+        return {
+            categories: Object.keys(SERVICE_CATEGORIES).reduce((acc, key) => {
+                acc[key] = SERVICE_CATEGORIES[key].name;
+                return acc;
+            }, {}),
+            services: this.getAllServices()
+        };
+    }
+};
+
+// Export default for easy importing
+export default {
+    SERVICE_CATEGORIES,
+    CATEGORY_ALIASES,
+    SERVICES,
+    ServiceUtils
+};
+"""
+
+def render(data: dict) -> str:
+    """The JS module for a catalog data file"""
+    categories = {
+        category_id: {key: value for key, value in info.items() if key != "bit"}
+        for category_id, info in data["categories"].items()
+    }
+    services = {category_id: [] for category_id in categories}
+    for service in data["services"]:
+        services[service["category"]].append(service)
+
+    def literal(value) -> str:
+        return json.dumps(value, indent=4, ensure_ascii=False)
+
+    return "\n".join([
+        HEADER,
+        "// Main service categories with display names, descriptions, and color schemes",
+        f"export const SERVICE_CATEGORIES = {literal(categories)};",
+        "",
+        "// Older category ids (problem detection, earlier forms) and the category they belong to",
+        f"export const CATEGORY_ALIASES = {literal(data.get('aliases', {}))};",
+        "",
+        "// Services grouped by category",
+        f"export const SERVICES = {literal(services)};",
+        "",
+        UTILS
+    ])
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate static/js/service-catalog.js from the catalog data file")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if the generated file is out of date")
+    args = parser.parse_args()
+
+    with open(CATALOG_PATH, encoding="utf-8") as f:
+        source = render(json.load(f))
+
+    if args.check:
+        with open(JS_PATH, encoding="utf-8") as f:
+            if f.read() != source:
+                print("❌ static/js/service-catalog.js is out of date; run generate_service_catalog_js.py")
+                sys.exit(1)
+        print("✅ static/js/service-catalog.js matches the catalog data")
+        return
+
+    with open(JS_PATH, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"✅ Wrote {JS_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Bulk import provider applications from a CSV or NDJSON file.
+
+Rows use the same field names as the provider signup form (fullName, email,
+phone, county, subCounty, ward, selectedCategories, ...) and are validated with
+the same rules as /api/provider/apply.
+
+Usage:
+    python import_providers.py partners.csv
+    python import_providers.py partners.ndjson --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.services.principals import principal_cache
+from app.services.provider_import import ProviderImporter, detect_format, iter_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import provider applications")
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = ProviderImporter(db, batch_size=args.batch_size).run(iter_rows(stream, fmt))
+    finally:
+        db.close()
+
+    # Servers sharing principals through Redis must not keep promoted accounts as clients
+    if settings.PRINCIPAL_CACHE_REDIS and report.promoted_user_ids:
+        asyncio.run(principal_cache.invalidate(*report.promoted_user_ids))
+
+    print(f"✅ Inserted {report.inserted} providers in {report.batches} batches")
+    print(f"⏭️  Skipped {report.duplicates} duplicate emails")
+    if report.errors:
+        print(f"❌ {len(report.errors)} rows failed validation:")
+        for error in report.errors[:20]:
+            print(f"   row {error['row']}: {error['error']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Rebuild conversation summaries from chat_messages.
+
+Conversation rows are maintained on every message write; run this once after
+upgrading so chats that predate the conversations table show up in inboxes,
+or any time the summaries need repairing:
+
+    python rebuild_conversations.py
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, ensure_schema
+from app.services.conversations import rebuild_conversations
+from app.services.provider_stats import reconcile_provider_stats
+
+def main():
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        count = rebuild_conversations(db)
+        # Active chats are derived from the rebuilt last senders
+        reconcile_provider_stats(db)
+    finally:
+        db.close()
+
+    print(f"✅ Rebuilt {count} conversation summaries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Periodic job: verify materialized provider dashboard stats.
+
+Dashboard counters are maintained incrementally on each message and request
+transition; this recomputes them from conversations, offers and requests and
+repairs any drift. Run it once after upgrading to backfill provider_stats, then from cron:
+
+    */15 * * * * cd /srv/service-matching && python reconcile_provider_stats.py
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, ensure_schema
+from app.services.provider_stats import reconcile_provider_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile provider dashboard stats")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    args = parser.parse_args()
+
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        drifted = reconcile_provider_stats(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    if not drifted:
+        print("✅ All provider dashboard stats match conversations and requests")
+        return
+
+    action = "Found" if args.dry_run else "Repaired"
+    print(f"⚠️  {action} {len(drifted)} drifted counters:")
+    for drift in drifted:
+        print(f"   provider {drift.provider_id}: {drift.field} {drift.stored} -> {drift.expected}")
+
+if __name__ == "__main__":
+    main()
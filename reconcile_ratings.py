@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Nightly job: verify provider rating aggregates against the reviews table.
+
+Rating counters are maintained incrementally on each review write; this
+recomputes them with one GROUP BY and repairs any drift. The application
+backfills rating_sum for existing providers at startup; run this from cron:
+
+    0 3 * * * cd /srv/service-matching && python reconcile_ratings.py
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.database import SessionLocal, ensure_schema
+from app.services.ratings import reconcile_rating_aggregates
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile provider rating aggregates")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    args = parser.parse_args()
+
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        drifted = reconcile_rating_aggregates(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    if not drifted:
+        print("✅ All provider rating aggregates match the reviews table")
+        return
+
+    action = "Found" if args.dry_run else "Repaired"
+    print(f"⚠️  {action} drift on {len(drifted)} providers:")
+    for drift in drifted:
+        print(f"   provider {drift.provider_id}: count {drift.stored_count} -> {drift.expected_count}, "
+              f"sum {drift.stored_sum} -> {drift.expected_sum}")
+
+if __name__ == "__main__":
+    main()
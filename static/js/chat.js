@@ -13,8 +13,68 @@ async function openChatModal(providerId, providerName) {
     document.getElementById('chatProviderName').textContent = `Chat with ${providerName}`;
     document.getElementById('chatModal').classList.remove('hidden');
     
-    // Load existing chat messages
+    // Load existing chat messages, then switch to live updates
     await loadChatMessages();
+    connectChatSocket();
+}
+
+let chatSocket = null;
+let chatMessageCache = [];
+let chatHasOlder = false;
+
+// Matches the history endpoint's default page size
+const CHAT_PAGE_SIZE = 50;
+
+/**
+ * Idempotency key for a sent message; retries reuse it so the server stores it once
+ */
+function newClientMessageId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+/**
+ * Open a WebSocket for the current chat thread.
+ * New messages and receipts arrive over the socket instead of by polling.
+ */
+function connectChatSocket() {
+    if (!currentSessionId || !authToken || !currentChatProvider || !('WebSocket' in window)) return;
+    
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const params = new URLSearchParams({ provider_id: currentChatProvider, token: authToken });
+    chatSocket = new WebSocket(`${protocol}://${window.location.host}/api/matching/chat/ws/${encodeURIComponent(currentSessionId)}?${params}`);
+    
+    chatSocket.onmessage = (event) => {
+        const frame = JSON.parse(event.data);
+        if (frame.type === 'message') {
+            const seen = chatMessageCache.some(message =>
+                (frame.id !== null && message.id === frame.id) ||
+                (frame.client_msg_id && message.client_msg_id === frame.client_msg_id));
+            if (seen) return;
+            chatMessageCache.push(frame);
+            displayChatMessages(chatMessageCache);
+            if (frame.id !== null) markChatRead(frame);
+        } else if (frame.type === 'stored') {
+            // Write-behind: the message now has its database id
+            const message = chatMessageCache.find(m => m.client_msg_id === frame.client_msg_id);
+            if (message) message.id = frame.id;
+            markChatRead(frame);
+        }
+    };
+    
+    chatSocket.onclose = () => {
+        chatSocket = null;
+    };
+}
+
+/**
+ * Send a read receipt for a provider message that has a database id
+ * @param {Object} frame - Message or stored frame
+ */
+function markChatRead(frame) {
+    if (frame.sender_type === 'provider' && chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        chatSocket.send(JSON.stringify({ type: 'read', up_to_id: frame.id }));
+    }
 }
 
 /**
@@ -26,23 +86,41 @@ function closeChatModal() {
         chatModal.classList.add('hidden');
     }
     currentChatProvider = null;
+    
+    if (chatSocket) {
+        chatSocket.close();
+        chatSocket = null;
+    }
 }
 
 /**
- * Load chat messages for current session
+ * Fetch one page of chat history, oldest message first
+ * @param {number|null} beforeId - Only messages older than this id
+ * @returns {Promise<Array|null>} The page, or null if the request failed
+ */
+async function fetchChatPage(beforeId = null) {
+    const params = new URLSearchParams({ limit: CHAT_PAGE_SIZE });
+    if (beforeId !== null) params.set('before_id', beforeId);
+    
+    const response = await fetch(`/api/matching/chat/${currentSessionId}?${params}`, {
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    });
+    return response.ok ? response.json() : null;
+}
+
+/**
+ * Load the latest page of chat messages for current session
  */
 async function loadChatMessages() {
     if (!currentSessionId || !authToken) return;
     
     try {
-        const response = await fetch(`/api/matching/chat/${currentSessionId}`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
-            }
-        });
-        
-        if (response.ok) {
-            const messages = await response.json();
+        const messages = await fetchChatPage();
+        if (messages) {
+            chatMessageCache = messages;
+            chatHasOlder = messages.length === CHAT_PAGE_SIZE;
             displayChatMessages(messages);
         }
     } catch (error) {
@@ -50,11 +128,34 @@ async function loadChatMessages() {
     }
 }
 
+/**
+ * Prepend the page before the oldest loaded message, keeping the scroll position
+ */
+async function loadOlderChatMessages() {
+    const oldest = chatMessageCache.find(message => message.id !== null && message.id !== undefined);
+    if (!currentSessionId || !authToken || !oldest) return;
+    
+    try {
+        const messages = await fetchChatPage(oldest.id);
+        if (!messages) return;
+        
+        const chatMessages = document.getElementById('chatMessages');
+        const fromBottom = chatMessages.scrollHeight - chatMessages.scrollTop;
+        chatMessageCache = messages.concat(chatMessageCache);
+        chatHasOlder = messages.length === CHAT_PAGE_SIZE;
+        displayChatMessages(chatMessageCache, { keepScroll: true });
+        chatMessages.scrollTop = chatMessages.scrollHeight - fromBottom;
+    } catch (error) {
+        console.error('Error loading older chat messages:', error);
+    }
+}
+
 /**
  * Display chat messages in the chat interface
  * @param {Array} messages - Array of message objects
+ * @param {Object} options - keepScroll: leave the scroll position to the caller
  */
-function displayChatMessages(messages) {
+function displayChatMessages(messages, { keepScroll = false } = {}) {
     const chatMessages = document.getElementById('chatMessages');
     
     if (messages.length === 0) {
@@ -62,7 +163,13 @@ function displayChatMessages(messages) {
         return;
     }
     
-    chatMessages.innerHTML = messages.map(message => `
+    const olderButton = chatHasOlder ? `
+        <div class="mb-4 text-center">
+            <button id="chatLoadOlder" class="text-sm text-indigo-600 hover:text-indigo-800">Load older messages</button>
+        </div>
+    ` : '';
+    
+    chatMessages.innerHTML = olderButton + messages.map(message => `
         <div class="mb-4 ${message.sender_type === 'user' ? 'text-right' : 'text-left'}">
             <div class="inline-block max-w-xs px-4 py-2 rounded-lg ${
                 message.sender_type === 'user' 
@@ -77,8 +184,12 @@ function displayChatMessages(messages) {
         </div>
     `).join('');
     
+    // Bound here rather than inline: index.html loads this file as a module
+    const loadOlder = document.getElementById('chatLoadOlder');
+    if (loadOlder) loadOlder.addEventListener('click', loadOlderChatMessages);
+    
     // Scroll to bottom
-    chatMessages.scrollTop = chatMessages.scrollHeight;
+    if (!keepScroll) chatMessages.scrollTop = chatMessages.scrollHeight;
 }
 
 /**
@@ -90,6 +201,13 @@ async function sendChatMessage() {
     
     if (!messageText || !currentChatProvider || !currentSessionId || !authToken) return;
     
+    // The socket echoes the saved message back, so there is nothing to reload
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        chatSocket.send(JSON.stringify({ type: 'message', text: messageText, client_msg_id: newClientMessageId() }));
+        chatInput.value = '';
+        return;
+    }
+    
     try {
         const response = await fetch('/api/matching/chat/send', {
             method: 'POST',
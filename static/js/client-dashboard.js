@@ -445,6 +445,10 @@ function getActivityColor(type) {
             return 'blue';
         case 'provider_responded':
             return 'green';
+        case 'provider_matched':
+            return 'green';
+        case 'review_posted':
+            return 'yellow';
         case 'message_received':
             return 'purple';
         case 'request_completed':
@@ -462,6 +466,10 @@ function getActivityIcon(type) {
             return 'fa-plus';
         case 'provider_responded':
             return 'fa-user-check';
+        case 'provider_matched':
+            return 'fa-user-check';
+        case 'review_posted':
+            return 'fa-star';
         case 'message_received':
             return 'fa-comment';
         case 'request_completed':
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the client activity feed: events are buffered and inserted in batches,
+and the feed is served newest first with keyset pagination from one index scan.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.activity import ActivityEvent
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import conversations, matching, provider_dashboard
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user
+from app.services.chat import get_chat_hub
+from app.services.chat_writer import get_chat_writer
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+class SilentHub:
+    async def publish(self, channel, event):
+        pass
+
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client")
+PROVIDER_USER = User(id=2, email="fix@example.com", name="Otieno", user_type="provider")
+
+def make_client():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client"))
+    db.add(User(id=2, email="fix@example.com", name="Otieno", password_hash="x", user_type="provider"))
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.commit()
+    db.close()
+
+    activity = ActivityLog(session_factory=Session, batch_size=3)
+    current = {"user": CLIENT}
+    app = make_test_app(Session, (matching.router, "/api/matching"), conversations.router, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_chat_hub] = lambda: SilentHub()
+    app.dependency_overrides[get_chat_writer] = lambda: None
+    app.dependency_overrides[get_unread_counters] = lambda: UnreadCounters(fakeredis.aioredis.FakeRedis())
+    app.dependency_overrides[get_activity_log] = (lambda log: lambda: log)(activity)
+    return TestClient(app), Session, engine, current, activity
+
+def test_feed_is_batched_and_paginated():
+    client, Session, engine, current, activity = make_client()
+
+    client.post("/api/matching/chat/send", json={"provider_id": 1, "message_text": "Hi", "session_id": "s1"})
+    current["user"] = PROVIDER_USER
+    conversation_id = client.get("/api/providers/conversations").json()[0]["id"]
+    for text in ("Hello!", "I can come at 9", "See you then"):
+        client.post("/api/conversations/send-message", json={"conversation_id": conversation_id, "message": text})
+    current["user"] = CLIENT
+    client.post("/api/matching/review", json={"provider_id": 1, "rating": 5, "comment": "Great"})
+
+    # Nothing is written until the buffer is flushed
+    assert activity.pending() == 4
+    db = Session()
+    assert db.query(ActivityEvent).count() == 0
+
+    inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 inserts.append(statement) if statement.startswith("INSERT INTO activity_events") else None)
+    assert activity.flush() == 4
+    assert len(inserts) == 2, "4 events in batches of 3"
+    db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+    first_page = client.get("/api/providers/clients/activity", params={"limit": 3}).json()
+    assert len(statements) == 1 and "JOIN" not in statements[0], "one scan, no joins"
+    assert [item["type"] for item in first_page] == ["review_posted", "message_received", "message_received"]
+    assert first_page[0]["description"] == "You rated Quick Fix 5 stars"
+    assert first_page[1]["description"] == "New message from Quick Fix"
+    assert first_page[1]["details"]["session_id"] == "s1"
+
+    second_page = client.get("/api/providers/clients/activity",
+                             params={"limit": 3, "before_id": first_page[-1]["id"]}).json()
+    assert [item["description"] for item in second_page] == ["New message from Quick Fix"]
+    assert client.get("/api/providers/clients/dashboard/stats").json()["activeChats"] == 1
+    print("✅ Feed events are inserted in batches and paged by id from one scan")
+
+def test_failed_flush_keeps_events():
+    _, Session, _, _, _ = make_client()
+    # A database without the activity_events table
+    empty = sessionmaker(bind=create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool))
+    broken = ActivityLog(session_factory=empty)
+    broken.record(1, "review_posted", "first")
+    broken.record(None, "review_posted", "anonymous users have no feed")
+    with pytest.raises(OperationalError):
+        broken.flush()
+    assert broken.pending() == 1
+
+    broken.session_factory = Session
+    assert broken.flush() == 1
+    db = Session()
+    assert db.query(ActivityEvent.description).scalar() == "first"
+    db.close()
+    print("✅ Events survive a failed flush and are written on the next one")
+
+def test_bad_events_are_isolated_and_buffer_is_capped():
+    _, Session, _, _, _ = make_client()
+    activity = ActivityLog(session_factory=Session, max_buffer=3)
+    activity.record(1, "review_posted", "kept")
+    activity.record(1, "review_posted", None)  # Rejected by the NOT NULL constraint
+    activity.record(1, "review_posted", "also kept")
+    assert activity.flush() == 2 and activity.pending() == 0 and activity.dropped == 1
+
+    db = Session()
+    assert [row.description for row in db.query(ActivityEvent.description).order_by(ActivityEvent.id)] == ["kept", "also kept"]
+    db.close()
+
+    # While the database is down, only the newest max_buffer events are held
+    for i in range(5):
+        activity.record(1, "review_posted", f"event {i}")
+    assert activity.pending() == 3 and activity.dropped == 3
+    print("✅ A rejected event is dropped alone and the buffer stays bounded")
+
+if __name__ == "__main__":
+    test_feed_is_batched_and_paginated()
+    test_failed_flush_keeps_events()
+    test_bad_events_are_isolated_and_buffer_is_capped()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the precomputed catalog: payloads are serialized and compressed once,
+revalidations are answered with 304, and versioned URLs are immutable and
+change with the content.
+"""
+
+import gzip
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import problems
+from app.services.catalog import IMMUTABLE, CatalogDocument, category_groups, service_catalog
+from app.services.problem_detector import CategoryOrganizer
+
+def make_client():
+    app = FastAPI()
+    app.include_router(problems.router, prefix="/api/problems")
+    return TestClient(app)
+
+def test_etag_and_304():
+    client = make_client()
+
+    first = client.get("/api/problems/categories")
+    assert first.status_code == 200
+    assert first.json() == json.loads(json.dumps(CategoryOrganizer.get_category_groups()))
+    assert first.headers["ETag"] == category_groups.gzip_etag
+    assert first.headers["Content-Encoding"] == "gzip", "served from the precompressed bytes"
+
+    again = client.get("/api/problems/categories", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == category_groups.gzip_etag
+    weak = client.get("/api/problems/categories", headers={"If-None-Match": f'"other", W/{category_groups.gzip_etag}'})
+    assert weak.status_code == 304
+
+    # Each content coding has its own strong validator; either revalidates the same version
+    plain = client.get("/api/problems/categories", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers and plain.content == category_groups.body
+    assert plain.headers["ETag"] == category_groups.etag != category_groups.gzip_etag
+    revalidated = client.get("/api/problems/categories",
+                             headers={"Accept-Encoding": "identity", "If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == category_groups.etag
+    print("✅ Catalog responses carry a strong ETag and revalidate with 304")
+
+def test_versioned_urls_are_immutable():
+    client = make_client()
+
+    current = client.get(category_groups.versioned_path)
+    assert current.status_code == 200 and current.headers["Cache-Control"] == IMMUTABLE
+    stale = client.get("/api/problems/categories/0000000000000000", follow_redirects=False)
+    assert stale.status_code == 302 and stale.headers["Location"] == category_groups.versioned_path
+
+    # The version follows the content
+    before = CatalogDocument({"services": [{"id": "leak_repair"}]}, "/x")
+    after = CatalogDocument({"services": [{"id": "leak_repair"}, {"id": "roof_repair"}]}, "/x")
+    assert before.version != after.version
+    assert CatalogDocument({"services": [{"id": "leak_repair"}]}, "/x").version == before.version
+    assert json.loads(gzip.decompress(service_catalog.gzip_body)) == json.loads(service_catalog.body)
+    print("✅ Versioned catalog URLs are immutable and change with the content")
+
+if __name__ == "__main__":
+    test_etag_and_304()
+    test_versioned_urls_are_immutable()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the since-cursor chat sync endpoint: delta responses, the (session_id, id)
+index and long-polling woken by Redis pub/sub.
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, ChatMessage
+from app.routers import matching
+from app.services.auth import get_current_user
+from app.services.chat import ChatHub
+from conftest import make_test_app, memory_database
+
+def make_client(message_count=0, hub=None):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x"))
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.add_all([ChatMessage(session_id="s1", user_id=1, provider_id=1, sender_type="user",
+                            message_text=f"Message {i}") for i in range(message_count)])
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (matching.router, "/api/matching"))
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="Wanjiru")
+    if hub is not None:
+        app.dependency_overrides[matching.get_chat_hub] = lambda: hub
+    return app, engine
+
+def test_sync_returns_only_the_delta():
+    app, engine = make_client(message_count=5)
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+
+    with TestClient(app) as client:
+        result = client.get("/api/matching/chat/s1/sync", params={"after_id": 2}).json()
+        assert [m["id"] for m in result["messages"]] == [3, 4, 5]
+        assert result["cursor"] == 5 and result["has_more"] is False
+        assert len(statements) == 1
+
+        result = client.get("/api/matching/chat/s1/sync", params={"after_id": 0, "limit": 2}).json()
+        assert result["cursor"] == 2 and result["has_more"] is True
+
+        # Nothing new and no timeout: an empty delta, cursor unchanged
+        result = client.get("/api/matching/chat/s1/sync", params={"after_id": 5}).json()
+        assert result == {"messages": [], "cursor": 5, "has_more": False}
+
+    with engine.connect() as conn:
+        plan = " ".join(str(row) for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM chat_messages WHERE session_id = 's1' AND id > 2 ORDER BY id"
+        )))
+    assert "ix_chat_messages_session_id_id" in plan
+    print("✅ Sync returns the delta in one query using the (session_id, id) index")
+
+def test_long_poll_falls_back_to_polling():
+    app, _ = make_client(message_count=1)
+    with TestClient(app) as client:
+        started = time.monotonic()
+        result = client.get("/api/matching/chat/s1/sync", params={"after_id": 1, "timeout": 1.5}).json()
+        elapsed = time.monotonic() - started
+    assert result["messages"] == [] and result["cursor"] == 1
+    assert 1.4 <= elapsed < 4
+    print(f"✅ Empty long-poll without a thread channel returned after {elapsed:.1f}s")
+
+def test_long_poll_wakes_on_new_message():
+    fakeredis = pytest.importorskip("fakeredis")
+    hub = ChatHub(fakeredis.aioredis.FakeRedis(decode_responses=True))
+    app, _ = make_client(message_count=1, hub=hub)
+
+    with TestClient(app) as client:
+        results = {}
+
+        def wait_for_reply():
+            started = time.monotonic()
+            results["body"] = client.get("/api/matching/chat/s1/sync",
+                                         params={"after_id": 1, "provider_id": 1, "timeout": 20}).json()
+            results["elapsed"] = time.monotonic() - started
+
+        waiter = threading.Thread(target=wait_for_reply)
+        waiter.start()
+        time.sleep(0.5)
+        client.post("/api/matching/chat/send", json={"provider_id": 1, "message_text": "Any update?", "session_id": "s1"})
+        waiter.join(timeout=10)
+
+    assert [m["message_text"] for m in results["body"]["messages"]] == ["Any update?"]
+    assert results["elapsed"] < 5, "woken by pub/sub, not by the timeout"
+    print(f"✅ Long-poll returned {results['elapsed']:.1f}s after it started, woken by the new message")
+
+if __name__ == "__main__":
+    test_sync_returns_only_the_delta()
+    test_long_poll_falls_back_to_polling()
+    test_long_poll_wakes_on_new_message()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Test the write-behind chat pipeline: stream append, batched multi-row inserts,
+idempotent retries, ordering and recovery of entries left pending by a crash.
+"""
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.conversation import Conversation
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, ChatMessage
+from app.routers import matching
+from app.services.auth import get_current_user
+from app.services.chat import ChatHub, get_chat_hub
+from app.services.chat_writer import WRITER_GROUP, ChatWriter, LeaseLost, get_chat_writer
+from conftest import make_test_app, memory_database
+
+def make_database():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x"))
+    db.add(User(id=2, email="kamau@example.com", name="Kamau", password_hash="x"))
+    db.add_all([
+        ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                        county="Nairobi", sub_county="Westlands", ward="Parklands"),
+        ServiceProvider(id=2, name="Spark Electric", email="spark@example.com", phone="0701",
+                        county="Nairobi", sub_county="Langata", ward="Karen"),
+    ])
+    db.commit()
+    db.close()
+    return engine, Session
+
+def make_writer(redis, Session, consumer, lease_ms=None):
+    return ChatWriter(redis=redis, session_factory=Session, stream="test:chat", batch_size=50, consumer=consumer,
+                      lease_ms=lease_ms)
+
+def test_batches_are_ordered_and_idempotent():
+    engine, Session = make_database()
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    writer = make_writer(redis, Session, "worker-1")
+
+    inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 inserts.append(statement) if statement.startswith("INSERT INTO chat_messages") else None)
+
+    async def scenario():
+        await writer.ensure_group()
+        assert await writer.acquire_lease()
+        events = []
+        for i in range(4):
+            events.append(await writer.append("s1", 1, 1, "user", f"Message {i}", "Wanjiru", client_msg_id=f"c{i}"))
+        events.append(await writer.append("s1", 1, 2, "user", "Other thread", "Wanjiru", client_msg_id="c0"))
+        # A client retry of c1 after a timeout
+        await writer.append("s1", 1, 1, "user", "Message 1", "Wanjiru", client_msg_id="c1")
+        assert all(e["id"] is None and e["stream_id"] for e in events)
+
+        handled = await writer.drain_once(block_ms=10)
+        assert handled == 6
+        assert await writer.drain_once() == 0
+        pending = await redis.xpending("test:chat", WRITER_GROUP)
+        return pending["pending"]
+
+    assert asyncio.run(scenario()) == 0
+    assert len(inserts) == 1, "one multi-row INSERT per batch"
+
+    db = Session()
+    rows = db.query(ChatMessage).order_by(ChatMessage.id).all()
+    assert [(r.provider_id, r.message_text) for r in rows] == [
+        (1, "Message 0"), (1, "Message 1"), (1, "Message 2"), (1, "Message 3"), (2, "Other thread")
+    ]
+    conversation = db.query(Conversation).filter(Conversation.provider_id == 1).one()
+    assert conversation.provider_unread == 4 and conversation.last_message == "Message 3"
+    db.close()
+    print("✅ 6 stream entries stored as 5 rows in send order with one INSERT")
+
+def test_pending_entries_survive_a_writer_crash():
+    _, Session = make_database()
+    server = fakeredis.FakeServer()
+    crashed = make_writer(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), Session, "worker-1",
+                          lease_ms=100)
+    survivor = make_writer(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), Session, "worker-2",
+                           lease_ms=100)
+
+    def fail(entries, before_commit=None):
+        raise RuntimeError("database unavailable")
+    crashed.persist = fail
+
+    async def scenario():
+        await crashed.ensure_group()
+        assert await crashed.acquire_lease()
+        for i in range(3):
+            await crashed.append("s1", 1, 1, "user", f"Before crash {i}", "Wanjiru")
+        with pytest.raises(RuntimeError):
+            await crashed.drain_once(block_ms=10)
+        assert (await survivor.redis.xpending("test:chat", WRITER_GROUP))["pending"] == 3
+
+        await survivor.append("s1", 1, 1, "user", "After crash", "Wanjiru")
+        # The crashed writer's lease has to run out before anyone takes over
+        assert not await survivor.acquire_lease()
+        await asyncio.sleep(0.15)
+        assert await survivor.acquire_lease()
+        # Pending entries are claimed and stored before anything new is read
+        assert await survivor.drain_once(block_ms=10) == 3
+        assert await survivor.drain_once(block_ms=10) == 1
+        return (await survivor.redis.xpending("test:chat", WRITER_GROUP))["pending"]
+
+    assert asyncio.run(scenario()) == 0
+    db = Session()
+    texts = [r.message_text for r in db.query(ChatMessage).order_by(ChatMessage.id)]
+    assert texts == ["Before crash 0", "Before crash 1", "Before crash 2", "After crash"]
+    db.close()
+    print("✅ Entries left pending by a failed writer were recovered in order")
+
+def test_a_writer_that_lost_its_lease_does_not_commit():
+    _, Session = make_database()
+    server = fakeredis.FakeServer()
+    slow = make_writer(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), Session, "worker-1",
+                       lease_ms=100)
+    standby = make_writer(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), Session, "worker-2",
+                          lease_ms=100)
+
+    persist = slow.persist
+    def slow_persist(entries, before_commit=None):
+        time.sleep(0.2)  # A commit that outlives the lease
+        return persist(entries, before_commit)
+    slow.persist = slow_persist
+
+    async def scenario():
+        await slow.ensure_group()
+        assert await slow.acquire_lease()
+        for i in range(2):
+            await slow.append("s1", 1, 1, "user", f"Slow {i}", "Wanjiru")
+        batch = asyncio.create_task(slow.drain_once(block_ms=10))
+        await asyncio.sleep(0.05)
+
+        # The lease lapses mid-batch and the standby takes over
+        await standby.redis.delete("chat:writer:lease")
+        assert await standby.acquire_lease()
+        await standby.append("s1", 1, 1, "user", "Newer", "Wanjiru")
+        assert await standby.drain_once(block_ms=10) == 0, "in-flight entries are not claimed, nor newer ones read"
+
+        with pytest.raises(LeaseLost):
+            await batch
+        await asyncio.sleep(0.1)
+        assert await standby.acquire_lease()
+        assert await standby.drain_once(block_ms=10) == 2
+        assert await standby.drain_once(block_ms=10) == 1
+
+    asyncio.run(scenario())
+    db = Session()
+    assert [r.message_text for r in db.query(ChatMessage).order_by(ChatMessage.id)] == ["Slow 0", "Slow 1", "Newer"]
+    db.close()
+    print("✅ A writer whose lease lapsed rolls back; its successor stores the batch in order")
+
+def test_poison_entries_are_dead_lettered():
+    _, Session = make_database()
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    writer = ChatWriter(redis=redis, session_factory=Session, stream="test:chat", batch_size=50,
+                        consumer="worker-1", max_deliveries=3)
+
+    async def scenario():
+        await writer.ensure_group()
+        assert await writer.acquire_lease()
+        await writer.append("s1", 1, 1, "user", "Before", "Wanjiru", client_msg_id="a")
+        await writer.append("s1", 1, 1, "user", "Neighbour", "Wanjiru", client_msg_id="b")
+        await redis.xadd("test:chat", {"session_id": "s1", "user_id": "1", "provider_id": "1", "sender_type": "user",
+                                       "message_text": "Poison", "client_msg_id": "c", "created_at": "not a date"})
+        await writer.append("s1", 1, 1, "user", "After", "Wanjiru", client_msg_id="d")
+        # Another client reusing a client_msg_id on the same session is a different message
+        await writer.append("s1", 2, 1, "user", "Other client", "Kamau", client_msg_id="a")
+
+        failures = 0
+        for _ in range(10):
+            try:
+                if not await writer.drain_once(block_ms=10):
+                    break
+            except ValueError:
+                failures += 1
+        dead = await redis.xrange("test:chat:dead")
+        pending = (await redis.xpending("test:chat", WRITER_GROUP))["pending"]
+        return failures, dead, pending
+
+    failures, dead, pending = asyncio.run(scenario())
+    assert failures == 2, "retried until the third attempt, then dead-lettered"
+    assert pending == 0 and len(dead) == 1
+    assert dead[0][1]["message_text"] == "Poison" and "error" in dead[0][1]
+
+    db = Session()
+    rows = [(r.user_id, r.message_text) for r in db.query(ChatMessage).order_by(ChatMessage.id)]
+    assert rows == [(1, "Before"), (1, "Neighbour"), (1, "After"), (2, "Other client")]
+    db.close()
+    print("✅ A failing entry is isolated and dead-lettered; the rest are stored in order")
+
+def test_send_endpoint_uses_stream_and_falls_back():
+    _, Session = make_database()
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    writer = make_writer(redis, Session, "worker-1")
+    current_writer = {"writer": writer}
+
+    app = make_test_app(Session, (matching.router, "/api/matching"))
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="Wanjiru")
+    app.dependency_overrides[get_chat_hub] = lambda: ChatHub(redis)
+    app.dependency_overrides[get_chat_writer] = lambda: current_writer["writer"]
+
+    with TestClient(app) as client:
+        body = {"provider_id": 1, "message_text": "Queued", "session_id": "s1", "client_msg_id": "m-1"}
+        queued = client.post("/api/matching/chat/send", json=body).json()
+        assert queued["chat_id"] is None and queued["client_msg_id"] == "m-1"
+
+        # Redis down: the message is saved synchronously instead of being lost
+        current_writer["writer"] = make_writer(fakeredis.aioredis.FakeRedis(connected=False), Session, "worker-2")
+        body = {"provider_id": 1, "message_text": "Direct", "session_id": "s1"}
+        direct = client.post("/api/matching/chat/send", json=body).json()
+        assert direct["chat_id"] is not None
+
+    asyncio.run(writer.ensure_group())
+    assert asyncio.run(writer.acquire_lease())
+    asyncio.run(writer.drain_once(block_ms=10))
+    db = Session()
+    assert {r.message_text for r in db.query(ChatMessage)} == {"Queued", "Direct"}
+    db.close()
+    print("✅ HTTP sends are queued on the stream, with a synchronous fallback")
+
+if __name__ == "__main__":
+    test_batches_are_ordered_and_idempotent()
+    test_pending_entries_survive_a_writer_crash()
+    test_a_writer_that_lost_its_lease_does_not_commit()
+    test_poison_entries_are_dead_lettered()
+    test_send_endpoint_uses_stream_and_falls_back()
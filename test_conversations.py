@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test conversation summaries: last message and unread counters follow every
+message insert and read, and inboxes load with a single query.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.conversation import Conversation
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, ChatMessage
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.routers import conversations, matching, provider_dashboard
+from app.services.auth import get_current_user
+from app.services.chat import get_chat_hub, mark_read
+from app.services.conversations import rebuild_conversations
+from conftest import make_test_app, memory_database
+
+class SilentHub:
+    async def publish(self, channel, event):
+        pass
+
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client")
+PROVIDER_USER = User(id=2, email="fix@example.com", name="Otieno", user_type="provider")
+
+def make_client():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client"))
+    db.add(User(id=2, email="fix@example.com", name="Otieno", password_hash="x", user_type="provider"))
+    db.add_all([
+        ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                        county="Nairobi", sub_county="Westlands", ward="Parklands"),
+        ServiceProvider(id=2, name="Spark Electric", email="spark@example.com", phone="0701",
+                        county="Nairobi", sub_county="Langata", ward="Karen"),
+    ])
+    db.commit()
+    db.close()
+
+    current = {"user": CLIENT}
+    app = make_test_app(Session, (matching.router, "/api/matching"), conversations.router, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_chat_hub] = lambda: SilentHub()
+    return TestClient(app), Session, engine, current
+
+def test_summary_follows_messages_and_reads():
+    client, Session, engine, current = make_client()
+
+    for text in ("Hi, is this available?", "Tomorrow morning?"):
+        client.post("/api/matching/chat/send", json={"provider_id": 1, "message_text": text, "session_id": "s1"})
+    client.post("/api/matching/chat/send", json={"provider_id": 2, "message_text": "Need wiring", "session_id": "s1"})
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+    inbox = client.get("/api/conversations").json()
+    assert len(statements) == 1, "inbox is one query"
+    assert [c["provider_name"] for c in inbox] == ["Spark Electric", "Quick Fix"]
+    assert inbox[1]["last_message"] == "Tomorrow morning?" and inbox[1]["unread_count"] == 0
+
+    # The provider sees two unread client messages and replies
+    current["user"] = PROVIDER_USER
+    provider_inbox = client.get("/api/providers/conversations").json()
+    assert len(provider_inbox) == 1
+    assert provider_inbox[0]["customer_name"] == "Wanjiru" and provider_inbox[0]["unread_count"] == 2
+    conversation_id = provider_inbox[0]["id"]
+
+    response = client.post("/api/conversations/send-message",
+                           json={"conversation_id": conversation_id, "message": "Yes, 9am works"})
+    assert response.status_code == 200
+
+    db = Session()
+    assert mark_read(db, "s1", 1, 1, "user", up_to_id=10) == 2
+    conversation = db.get(Conversation, conversation_id)
+    assert conversation.provider_unread == 0 and conversation.client_unread == 1
+    assert conversation.last_message == "Yes, 9am works" and conversation.last_sender_type == "provider"
+    db.close()
+
+    current["user"] = CLIENT
+    detail = client.get(f"/api/conversations/{conversation_id}").json()
+    assert detail["unread_count"] == 1 and detail["provider_name"] == "Quick Fix"
+    messages = client.get(f"/api/conversations/{conversation_id}/messages").json()
+    assert [m["sender_type"] for m in messages] == ["client", "client", "provider"]
+
+    # Someone else's conversation is off limits
+    current["user"] = User(id=99, email="other@example.com", name="Other", user_type="client")
+    assert client.get(f"/api/conversations/{conversation_id}").status_code == 403
+    print("✅ Conversation summaries track messages and reads; inbox is one query")
+
+def test_start_is_idempotent_and_rebuild_backfills():
+    client, Session, _, _ = make_client()
+
+    db = Session()
+    db.add_all([ServiceRequest(id=7, client_id=1, category="electrical"),
+                ServiceRequest(id=8, client_id=99, category="plumbing"),
+                RequestOffer(request_id=7, provider_id=2), RequestOffer(request_id=8, provider_id=2)])
+    db.commit()
+    db.close()
+
+    first = client.post("/api/conversations/start", json={"provider_id": 2, "request_id": 7}).json()
+    again = client.post("/api/conversations/start", json={"provider_id": 2, "request_id": 7}).json()
+    assert first["id"] == again["id"]
+
+    # The request must exist, be the caller's, and have gone to that provider
+    for provider_id, request_id, status in ((2, 404, 404), (2, 8, 403), (1, 7, 403)):
+        response = client.post("/api/conversations/start", json={"provider_id": provider_id, "request_id": request_id})
+        assert response.status_code == status
+
+    # Messages written before conversations existed
+    db = Session()
+    db.add_all([
+        ChatMessage(session_id="old", user_id=1, provider_id=1, sender_type="user", message_text="Old question"),
+        ChatMessage(session_id="old", user_id=1, provider_id=1, sender_type="provider", message_text="Old answer"),
+    ])
+    db.commit()
+    assert rebuild_conversations(db) == 1
+    rebuilt = db.query(Conversation).filter(Conversation.session_id == "old").one()
+    assert rebuilt.last_message == "Old answer"
+    assert rebuilt.client_unread == 1 and rebuilt.provider_unread == 1
+    db.close()
+    print("✅ Starting is checked and idempotent; rebuild backfills old chats")
+
+if __name__ == "__main__":
+    test_summary_follows_messages_and_reads()
+    test_start_is_idempotent_and_rebuild_backfills()
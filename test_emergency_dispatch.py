@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test emergency dispatch: the nearest same-day providers are offered first, in
+waves that expire after a timeout, exactly one provider wins the accept lease,
+and time-to-first-offer is recorded.
+"""
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.models.provider_stats import ProviderStats
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import provider_dashboard
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user
+from app.services.dispatch import Dispatcher, get_dispatcher
+from app.services.provider_stats import reconcile_provider_stats
+from app.services.service_requests import create_request
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+# Client in central Nairobi
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client",
+              county="Nairobi", latitude=-1.2864, longitude=36.8172)
+PROVIDERS = [
+    # (id, email, availability, latitude, longitude)
+    (1, "p1@example.com", "same_day", -1.2900, 36.8200),   # ~0.5 km
+    (2, "p2@example.com", "same_day", -1.3000, 36.8300),   # ~2 km
+    (3, "p3@example.com", "same_day", -1.3200, 36.8500),   # ~5 km
+    (4, "p4@example.com", "within_week", -1.2865, 36.8173),  # Closest, but not same day
+    (5, "p5@example.com", "same_day", -0.1000, 37.5000),   # Beyond the dispatch radius
+]
+
+def provider_user(provider_id: int) -> User:
+    return User(id=100 + provider_id, email=PROVIDERS[provider_id - 1][1], name=f"P{provider_id}", user_type="provider")
+
+def make_session_factory(path):
+    # A file database: the dispatcher works on its own connections from worker threads
+    _, Session = memory_database(create_engine(f"sqlite:///{path}/dispatch.db", connect_args={"check_same_thread": False}))
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client",
+                county="Nairobi", latitude=-1.2864, longitude=36.8172))
+    for provider_id, email, availability, latitude, longitude in PROVIDERS:
+        db.add(ServiceProvider(id=provider_id, name=f"P{provider_id}", email=email, phone="0700",
+                               categories='["plumbing"]', availability=availability, county="Nairobi",
+                               sub_county="Central", ward="Central", latitude=latitude, longitude=longitude))
+    db.commit()
+    db.close()
+    return Session
+
+def make_dispatcher(Session, **options) -> Dispatcher:
+    options = {"wave_size": 2, "wave_timeout": 0.3, "max_waves": 2, "poll_seconds": 0.02, **options}
+    return Dispatcher(redis=fakeredis.aioredis.FakeRedis(decode_responses=True), session_factory=Session,
+                      activity=ActivityLog(session_factory=Session), **options)
+
+def offers(Session, request_id: int):
+    db = Session()
+    rows = db.query(RequestOffer.provider_id, RequestOffer.status).filter(RequestOffer.request_id == request_id)
+    result = dict(rows.all())
+    db.close()
+    return result
+
+def wait_for(check, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_waves_go_to_nearest_available_and_one_accept_wins(tmp_path):
+    Session = make_session_factory(tmp_path)
+    dispatcher = make_dispatcher(Session)
+
+    current = {"user": CLIENT}
+    app = make_test_app(Session, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_unread_counters] = lambda: UnreadCounters(fakeredis.aioredis.FakeRedis())
+    app.dependency_overrides[get_activity_log] = (lambda log: lambda: log)(dispatcher.activity)
+    app.dependency_overrides[get_dispatcher] = (lambda d: lambda: d)(dispatcher)
+
+    with TestClient(app) as client:
+        created = client.post("/api/providers/clients/requests",
+                              json={"category": "plumbing", "urgency": "emergency"}).json()
+        request_id = created["id"]
+
+        # First wave: the two nearest same-day providers
+        wait_for(lambda: offers(Session, request_id) == {1: "new", 2: "new"})
+        # Nobody answers: the wave expires and the next nearest is offered
+        wait_for(lambda: offers(Session, request_id) == {1: "expired", 2: "expired", 3: "new"})
+
+        current["user"] = provider_user(1)
+        assert client.post(f"/api/providers/requests/{request_id}/accept").status_code == 409
+        current["user"] = provider_user(3)
+        assert client.post(f"/api/providers/requests/{request_id}/accept").status_code == 200
+        wait_for(lambda: not dispatcher._tasks)
+
+    db = Session()
+    request = db.get(ServiceRequest, request_id)
+    assert request.status == "accepted" and request.accepted_provider_id == 3
+    assert request.first_offer_ms is not None and request.first_offer_ms < 1000
+    assert all(stats.new_requests == 0 for stats in db.query(ProviderStats))
+    assert reconcile_provider_stats(db, fix=False) == []
+    db.close()
+    print("✅ Emergency waves reach the nearest same-day providers and expire unanswered offers")
+
+def test_only_one_concurrent_claim_wins(tmp_path):
+    dispatcher = make_dispatcher(make_session_factory(tmp_path))
+
+    async def scenario():
+        results = await asyncio.gather(*(dispatcher.claim(7, provider_id) for provider_id in (1, 2, 3)))
+        assert sorted(results) == [False, False, True]
+        winner = (1, 2, 3)[results.index(True)]
+        assert await dispatcher.claim(7, winner), "the holder can retry"
+
+        # A failed accept hands the lease back
+        await dispatcher.release(7, winner + 1)
+        assert not await dispatcher.claim(7, winner + 1)
+        await dispatcher.release(7, winner)
+        assert await dispatcher.claim(7, winner + 1)
+
+    asyncio.run(scenario())
+    print("✅ Exactly one of several simultaneous accepts gets the lease")
+
+def test_exhausted_waves_fall_back_to_every_match(tmp_path):
+    Session = make_session_factory(tmp_path)
+    dispatcher = make_dispatcher(Session, wave_timeout=0.05, max_waves=1)
+    db = Session()
+    request_id = create_request(db, 1, "plumbing", urgency="emergency", county="Nairobi",
+                                latitude=-1.2864, longitude=36.8172).id
+    db.commit()
+    db.close()
+
+    async def scenario():
+        await dispatcher.schedule(request_id)
+        # A second worker finds the request already being dispatched
+        other = make_dispatcher(Session)
+        other.redis = dispatcher.redis
+        await dispatcher.redis.set(f"dispatch:owner:{request_id}", "1")
+        await other.dispatch(request_id, time.monotonic())
+
+    asyncio.run(scenario())
+    assert offers(Session, request_id) == {1: "expired", 2: "expired", 3: "new", 4: "new", 5: "new"}
+    print("✅ After the last wave the request is offered to every matching provider")
+
+if __name__ == "__main__":
+    import tempfile
+    for test in (test_waves_go_to_nearest_available_and_one_accept_wins, test_only_one_concurrent_claim_wins,
+                 test_exhausted_waves_fall_back_to_every_match):
+        with tempfile.TemporaryDirectory() as path:
+            test(path)
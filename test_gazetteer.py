@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the Kenya gazetteer: wards resolve to fixed centroids from the names
+the forms use, hand-typed names are matched leniently, unknown names fall
+back to the sub-county or county, and registration places users with it.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from app.models.user import User
+from app.routers import users
+from app.services.gazetteer import COUNTY, SUB_COUNTY, WARD, gazetteer, normalize, read_administrative_data
+from app.services.passwords import PasswordPool, get_password_pool
+from conftest import make_test_app, memory_database
+
+def test_every_form_ward_has_a_centroid():
+    for county in read_administrative_data()["counties"]:
+        for sub_county in county["subCounties"]:
+            for ward in sub_county["wards"]:
+                place = gazetteer.resolve(county["name"], sub_county["name"], ward["name"])
+                assert place.level == WARD and place.ward == ward["name"], ward["name"]
+                assert -5 < place.latitude < 5 and 33 < place.longitude < 42, "inside Kenya"
+    print("✅ Every ward offered by the forms resolves to a centroid")
+
+def test_lenient_names_and_fallbacks():
+    karen = gazetteer.resolve("Nairobi", "Langata", "Karen")
+    assert gazetteer.resolve("nairobi county", "LANGATA Sub-County", "Karen Ward") == karen
+    assert gazetteer.resolve("Nairobi", "Langata", "Karren") == karen, "typos within the cutoff match"
+    assert gazetteer.resolve("Nairobi", None, "Karen") == karen, "unique ward names place the user"
+    assert gazetteer.resolve("Nairobi", "Westlands", "Highridge").ward == "Parklands/Highridge"
+    assert gazetteer.resolve("Nairobi", "Embakasi West", "Umoja 1").ward == "Umoja I"
+    assert normalize("Ziwa la Ng'ombe") == "ziwa la ngombe"
+
+    # Township is a ward in two Kiambu sub-counties, so only the county is certain
+    assert gazetteer.resolve("Kiambu", None, "Township").level == COUNTY
+    assert gazetteer.resolve("Kiambu", "Thika Town", "Township").ward == "Township"
+    langata = gazetteer.resolve("Nairobi", "Langata", "Somewhere else")
+    assert langata.level == SUB_COUNTY and langata.sub_county == "Langata"
+    assert gazetteer.resolve("Narnia") is None and gazetteer.resolve(None) is None
+
+    # Sub-county centroids are the mean of their wards
+    wards = [gazetteer.resolve("Nairobi", "Langata", name) for name in ("Karen", "Nairobi West", "South C", "Nyayo Highrise")]
+    assert abs(langata.latitude - sum(w.latitude for w in wards) / 4) < 1e-4
+    print("✅ Names are matched leniently and fall back to the enclosing area")
+
+def test_registration_uses_the_gazetteer():
+    engine, Session = memory_database()
+
+    app = make_test_app(Session, (users.router, "/api/users"))
+    app.dependency_overrides[get_password_pool] = (lambda pool: lambda: pool)(PasswordPool(workers=1, rounds=4))
+    client = TestClient(app)
+
+    registered = client.post("/api/users/register", json={
+        "name": "Akinyi", "email": "akinyi@example.com", "password": "s3cret-pass",
+        "county": "Mombasa", "subCounty": "Nyali", "ward": "Kongowea"
+    })
+    assert registered.status_code == 200
+    user = registered.json()["user"]
+    assert (user["latitude"], user["longitude"]) == gazetteer.coordinates("Mombasa", "Nyali", "Kongowea")
+
+    pinned = client.post("/api/users/register", json={
+        "name": "Kamau", "email": "kamau@example.com", "password": "s3cret-pass",
+        "county": "Nairobi", "latitude": -1.3, "longitude": 36.8
+    })
+    assert (pinned.json()["user"]["latitude"], pinned.json()["user"]["longitude"]) == (-1.3, 36.8)
+
+    # A profile update with a map pin still records the place names
+    headers = {"Authorization": f"Bearer {pinned.json()['access_token']}"}
+    updated = client.put("/api/users/me", headers=headers, json={
+        "name": "Kamau", "email": "kamau@example.com", "password": "unused",
+        "county": "Nairobi", "subCounty": "Langata", "ward": "Karen", "latitude": -1.32, "longitude": 36.71
+    })
+    assert updated.status_code == 200
+    assert (updated.json()["latitude"], updated.json()["longitude"]) == (-1.32, 36.71)
+
+    db = Session()
+    assert db.query(User).filter(User.email == "akinyi@example.com").one().ward == "Kongowea"
+    kamau = db.query(User).filter(User.email == "kamau@example.com").one()
+    assert (kamau.county, kamau.sub_county, kamau.ward) == ("Nairobi", "Langata", "Karen")
+    db.close()
+    print("✅ Registration and profile updates place users at their ward's centroid or their pin")
+
+if __name__ == "__main__":
+    test_every_form_ward_has_a_centroid()
+    test_lenient_names_and_fallbacks()
+    test_registration_uses_the_gazetteer()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test offline geocoding: landmarks and estates resolve through the token
+index, answers (and misses) are cached in geocode_cache, and rows without
+coordinates are backfilled from their address text or their ward.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.geocode import GeocodeEntry
+from app.models.service_provider import ServiceProvider
+from app.models.user import User
+from app.services.gazetteer import gazetteer
+from app.services.geocoding import AddressIndex, Geocoder, backfill_coordinates
+from conftest import memory_database
+
+index = AddressIndex(gazetteer)
+
+def test_address_index():
+    galeria = index.search("Opposite Galeria Shopping Mall, Langata Rd")
+    assert (galeria.ward, galeria.level) == ("Kilimani", "area")
+    assert (galeria.latitude, galeria.longitude) == gazetteer.coordinates("Nairobi", "Dagoretti North", "Kilimani")
+
+    assert index.search("house 12, runda estate").matched == "Runda Estate"
+    assert index.search("Lavington Green").matched == "Lavington Green", "the longer name wins"
+    assert index.search("Kileleswa").ward == "Kileleshwa", "misspelt tokens are corrected"
+    assert index.search("Mountain View Estate").ward == "Mountain View", "a ward's own name beats other wards' estates"
+
+    # Kawangware Market is listed under two wards, so only the sub-county is certain
+    market = index.search("Kawangware Market")
+    assert market.level == "sub_county" and market.sub_county == "Dagoretti North"
+
+    # The county (or sub-county) written after a place supports it instead of winning over it
+    assert index.search("Kileleshwa, Nairobi").ward == "Kileleshwa"
+    assert index.search("Karen, Nairobi").ward == "Karen"
+    assert (index.search("Nyali Mombasa").ward, index.search("Nyali Mombasa").level) == ("Nyali", "ward")
+    assert index.search("Galeria Mall, Kilimani, Nairobi").matched == "Galeria Shopping Mall"
+    assert index.search("Westlands Nairobi").sub_county == "Westlands"
+    assert index.search("Nairobi").level == "county"
+
+    assert index.search("Nyali", county="Nairobi") is None, "matches stay inside the row's county"
+    assert index.search("Nyali", county="Mombasa").ward == "Nyali"
+    assert index.search("somewhere unknown") is None and index.search("") is None
+    print("✅ Free-text addresses resolve to estates, wards and sub-counties")
+
+def test_geocoder_cache(database):
+    _, Session = database
+    db = Session()
+    geocoder = Geocoder(index)
+    calls = []
+    search = index.search
+    geocoder.index = type("Counting", (), {
+        "gazetteer": gazetteer, "version": index.version, "search": lambda self, *args: calls.append(args) or search(*args)
+    })()
+
+    first = geocoder.geocode_many(db, [("Galeria Mall", "Nairobi"), ("nowhere at all", None), (None, None)])
+    assert first[0].ward == "Kilimani" and first[1] is None and first[2] is None
+    db.commit()
+    assert len(calls) == 2 and db.query(GeocodeEntry).count() == 2, "misses are cached too"
+
+    again = geocoder.geocode_many(db, [("GALERIA MALL!", "nairobi"), ("Nowhere at all", None)])
+    assert again == first[:2] and len(calls) == 2, "normalized text hits the cache"
+
+    # Answers from an older gazetteer or matcher are recomputed and replaced
+    db.query(GeocodeEntry).update({"version": "old"})
+    db.commit()
+    assert geocoder.geocode(db, "Galeria Mall", "Nairobi") == first[0] and len(calls) == 3
+    db.commit()
+    assert db.query(GeocodeEntry).filter(GeocodeEntry.version == index.version).count() == 1
+    db.close()
+    print("✅ Geocodes are cached per normalized text and gazetteer/matcher version")
+
+def test_backfill(database):
+    _, Session = database
+    db = Session()
+
+    def provider(id, **fields):
+        values = dict(name=f"Provider {id}", email=f"p{id}@example.com", phone="0700",
+                      county="Nairobi", sub_county="Westlands", ward="Kangemi")
+        values.update(fields)
+        return ServiceProvider(id=id, **values)
+
+    db.add_all([
+        provider(1, landmark="Next to Galeria Shopping Mall", sub_county="Dagoretti North", ward="Kilimani"),
+        provider(2, full_address="Plot 7, nowhere in particular"),
+        provider(3, latitude=-1.0, longitude=36.0, landmark="Runda Estate"),
+        provider(4, county="Turkana", sub_county="Loima", ward="Lokiriama"),
+        User(id=1, email="u@example.com", name="U", password_hash="x", county="Mombasa", address="Bamburi Cement")
+    ])
+    db.commit()
+
+    reports = {report.table: report for report in backfill_coordinates(db, Geocoder(index), batch_size=2)}
+    providers = reports["service_providers"]
+    assert (providers.placed, providers.from_text, providers.unplaced) == (2, 1, 1)
+    assert reports["users"].placed == 1 and reports["users"].from_text == 1
+
+    def point(model, id):
+        row = db.get(model, id)
+        db.refresh(row)
+        return row.latitude, row.longitude
+
+    assert point(ServiceProvider, 1) == gazetteer.coordinates("Nairobi", "Dagoretti North", "Kilimani")
+    assert point(ServiceProvider, 2) == gazetteer.coordinates("Nairobi", "Westlands", "Kangemi"), "the form's ward"
+    assert point(ServiceProvider, 3) == (-1.0, 36.0), "rows with coordinates are left alone"
+    assert point(ServiceProvider, 4) == (None, None)
+    assert point(User, 1) == gazetteer.coordinates("Mombasa", "Kisauni", "Bamburi")
+
+    again = backfill_coordinates(db, Geocoder(index))
+    assert [report.placed for report in again] == [0, 0]
+    db.close()
+    print("✅ Rows without coordinates are placed from their address text or ward")
+
+if __name__ == "__main__":
+    test_address_index()
+    test_geocoder_cache(memory_database())
+    test_backfill(memory_database())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test that review and chat listings run a single query per page and paginate
+with before_id/limit.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, Review, ChatMessage
+from app.routers import matching
+from app.services.auth import get_current_user
+from conftest import make_test_app, memory_database
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self)
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+def make_client(review_count=0, message_count=0):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add_all([User(id=i, email=f"user{i}@example.com", name=f"User {i}", password_hash="x")
+                for i in range(1, review_count + 2)])
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.add_all([Review(user_id=i, provider_id=1, rating=1 + i % 5, review_text=f"Review {i}",
+                       service_category="general") for i in range(1, review_count + 1)])
+    db.add_all([ChatMessage(session_id="s1", user_id=1, provider_id=1,
+                            sender_type="user" if i % 2 == 0 else "provider", message_text=f"Message {i}")
+                for i in range(message_count)])
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (matching.router, "/api/matching"))
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="User 1")
+    return TestClient(app), QueryCounter(engine), Session
+
+def test_reviews_page_is_one_query():
+    client, queries, _ = make_client(review_count=500)
+
+    queries.count = 0
+    first_page = client.get("/api/matching/provider/1/reviews", params={"limit": 50}).json()
+    assert queries.count == 1, f"expected 1 query, got {queries.count}"
+    assert len(first_page) == 50
+    assert first_page[0]["id"] == 500 and first_page[0]["user_name"] == "User 500"
+
+    queries.count = 0
+    next_page = client.get("/api/matching/provider/1/reviews",
+                           params={"before_id": first_page[-1]["id"], "limit": 50}).json()
+    assert queries.count == 1
+    assert next_page[0]["id"] == first_page[-1]["id"] - 1
+    print("✅ 500 reviews: each page of 50 costs 1 query")
+
+def test_reviews_page_by_time_then_id():
+    client, _, Session = make_client(review_count=5)
+    db = Session()
+    db.query(Review).filter(Review.id == 2).update({Review.created_at: datetime.utcnow() + timedelta(hours=1)})
+    db.commit()
+    db.close()
+
+    pages, before_id = [], None
+    while True:
+        params = {"limit": 2, **({"before_id": before_id} if before_id else {})}
+        page = [review["id"] for review in client.get("/api/matching/provider/1/reviews", params=params).json()]
+        if not page:
+            break
+        pages.append(page)
+        before_id = page[-1]
+    assert pages == [[2, 5], [4, 3], [1]], "the edited review leads, ties fall back to id"
+    print("✅ Reviews page newest first by created_at, with the id breaking ties")
+
+def test_chat_history_is_one_query():
+    client, queries, _ = make_client(message_count=120)
+
+    queries.count = 0
+    latest = client.get("/api/matching/chat/s1", params={"limit": 50}).json()
+    assert queries.count == 1, f"expected 1 query, got {queries.count}"
+    assert [m["id"] for m in latest] == list(range(71, 121))
+    assert {m["sender_name"] for m in latest} == {"User 1", "Quick Fix"}
+
+    older = client.get("/api/matching/chat/s1", params={"before_id": latest[0]["id"], "limit": 50}).json()
+    assert [m["id"] for m in older] == list(range(21, 71))
+    print("✅ 120 chat messages: each page costs 1 query with sender names joined")
+
+if __name__ == "__main__":
+    test_reviews_page_is_one_query()
+    test_reviews_page_by_time_then_id()
+    test_chat_history_is_one_query()
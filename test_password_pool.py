@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the password pool: bcrypt runs off the event loop, logins past the
+queue limit get 429, and hashes made with an old cost are upgraded on login.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.user import User
+from app.routers import users
+from app.services.passwords import PasswordPool, PasswordPoolBusy, get_password_pool, make_context
+from conftest import make_test_app, memory_database
+
+PASSWORD = "s3cret-pass"
+
+def make_client(pool: PasswordPool):
+    engine, Session = memory_database()
+
+    db = Session()
+    # Stored with a cheaper cost than the pool now uses
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash=make_context(4).hash(PASSWORD)))
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (users.router, "/api/users"))
+    app.dependency_overrides[get_password_pool] = (lambda pool: lambda: pool)(pool)
+    return TestClient(app), Session
+
+def test_login_rehashes_and_register_uses_pool():
+    pool = PasswordPool(workers=2, max_queue=2, rounds=5)
+    client, Session = make_client(pool)
+
+    login = {"email": "client@example.com", "password": PASSWORD}
+    assert client.post("/api/users/login", json={**login, "password": "wrong"}).status_code == 401
+    assert client.post("/api/users/login", json=login).status_code == 200
+    db = Session()
+    assert db.get(User, 1).password_hash.startswith("$2b$05$"), "upgraded to the configured cost"
+    db.close()
+    assert client.post("/api/users/login", json=login).status_code == 200
+
+    registered = client.post("/api/users/register",
+                             json={"name": "Otieno", "email": "new@example.com", "password": PASSWORD})
+    assert registered.status_code == 200
+    db = Session()
+    stored = db.query(User.password_hash).filter(User.email == "new@example.com").scalar()
+    assert stored.startswith("$2b$05$") and pool.context.verify(PASSWORD, stored)
+    db.close()
+    pool.shutdown()
+    print("✅ Logins verify on the pool and upgrade old hashes; registration hashes on the pool")
+
+def test_full_pool_answers_429():
+    pool = PasswordPool(workers=1, max_queue=0, rounds=4)
+    client, _ = make_client(pool)
+
+    # Occupy the only worker
+    gate = threading.Event()
+    holder = threading.Thread(target=asyncio.run, args=(pool._run(gate.wait),))
+    holder.start()
+    deadline = time.monotonic() + 3
+    while pool.depth() < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    busy = client.post("/api/users/login", json={"email": "client@example.com", "password": PASSWORD})
+    assert busy.status_code == 429 and busy.headers["Retry-After"] == "1"
+
+    gate.set()
+    holder.join()
+    assert pool.depth() == 0
+    assert client.post("/api/users/login",
+                       json={"email": "client@example.com", "password": PASSWORD}).status_code == 200
+    pool.shutdown()
+    print("✅ Password work beyond the queue limit is refused with 429")
+
+def test_hashing_does_not_block_the_event_loop():
+    pool = PasswordPool(workers=1, max_queue=4, rounds=12)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await pool.hash(PASSWORD)
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        # The loop kept ticking for most of the hash
+        assert ticks >= (elapsed / 0.005) * 0.3
+
+        with pytest.raises(PasswordPoolBusy):
+            await asyncio.gather(*(pool.hash(PASSWORD) for _ in range(6)))
+
+    asyncio.run(scenario())
+    pool.shutdown()
+    print("✅ The event loop keeps running while bcrypt works")
+
+if __name__ == "__main__":
+    test_login_rehashes_and_register_uses_pool()
+    test_full_pool_answers_429()
+    test_hashing_does_not_block_the_event_loop()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test provider matching on both database backends.
+
+The SQLite path runs everywhere. The PostGIS path runs against the database in
+TEST_POSTGIS_URL (e.g. a local or containerless Postgres with the postgis
+extension) and is skipped when that variable is not set.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base
+from app.database import geo
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.services.matching import ServiceMatchingService
+from conftest import memory_database
+
+NAIROBI_CBD = (-1.2864, 36.8172)
+
+PROVIDERS = [
+    # name, latitude, longitude
+    ("Westlands Plumbing", -1.2676, 36.8108),   # ~1.5 miles
+    ("Karen Plumbing", -1.3197, 36.7073),       # ~8 miles
+    ("Thika Plumbing", -1.0333, 37.0693),       # ~25 miles
+    ("Mombasa Plumbing", -4.0435, 39.6682),     # ~275 miles
+]
+
+def seed(db):
+    user = User(
+        email="client@example.com", name="Client", password_hash="x",
+        latitude=NAIROBI_CBD[0], longitude=NAIROBI_CBD[1], city="Nairobi", state="Starehe"
+    )
+    db.add(user)
+    for i, (name, lat, lon) in enumerate(PROVIDERS):
+        db.add(ServiceProvider(
+            name=name, email=f"provider{i}@example.com", phone="0700000000",
+            county="Nairobi", sub_county="Westlands", ward="Parklands",
+            latitude=lat, longitude=lon, categories='["plumbing"]', is_active=True,
+            average_rating=4.5, total_reviews=10
+        ))
+    db.commit()
+    return user
+
+def test_sqlite_matching_filters_and_sorts_in_python(database):
+    """SQLite keeps the Haversine path."""
+    _, Session = database
+    db = Session()
+
+    user = seed(db)
+    matches = ServiceMatchingService().find_providers(db, user, "plumbing", max_distance=30)
+
+    assert [m.name for m in matches] == ["Westlands Plumbing", "Karen Plumbing", "Thika Plumbing"]
+    assert matches[0].distance_miles < matches[1].distance_miles < matches[2].distance_miles
+    print(f"✅ SQLite matching returned {len(matches)} providers in distance order")
+
+def test_postgis_expressions_compile_to_index_queries():
+    """The push-down helpers render ST_DWithin, ST_Distance and the KNN operator."""
+    table = Table("service_providers", MetaData(), Column("id", Integer), Column("location_geog", geo.Geography()))
+    geog = table.c.location_geog
+
+    statement = (
+        select(table.c.id, geo.distance_miles(geog, *NAIROBI_CBD))
+        .where(geo.within_miles(geog, *NAIROBI_CBD, 10))
+        .order_by(geo.nearest_first(geog, *NAIROBI_CBD))
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "ST_DWithin(service_providers.location_geog" in sql
+    assert "ST_Distance(service_providers.location_geog" in sql
+    assert "service_providers.location_geog <-> CAST(ST_SetSRID(ST_MakePoint(" in sql
+    assert "AS geography(POINT, 4326)" in sql
+    print("✅ PostGIS expressions compile to ST_DWithin / KNN queries")
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGIS_URL"), reason="TEST_POSTGIS_URL not set")
+def test_postgis_matching_matches_python_results():
+    """Run the same search on Postgres; requires the process to start with ENABLE_POSTGIS=true."""
+    from app.database.database import POSTGIS_ENABLED, ensure_schema
+    if not POSTGIS_ENABLED:
+        pytest.skip("Start the test run with DATABASE_URL/ENABLE_POSTGIS pointing at Postgres")
+
+    engine = create_engine(os.environ["TEST_POSTGIS_URL"])
+    Base.metadata.drop_all(bind=engine)
+    ensure_schema(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = seed(db)
+        matches = ServiceMatchingService().find_providers(db, user, "plumbing", max_distance=30)
+        assert [m.name for m in matches] == ["Westlands Plumbing", "Karen Plumbing", "Thika Plumbing"]
+        print(f"✅ PostGIS matching returned {len(matches)} providers in distance order")
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+if __name__ == "__main__":
+    test_sqlite_matching_filters_and_sorts_in_python(memory_database())
+    test_postgis_expressions_compile_to_index_queries()
+    if os.getenv("TEST_POSTGIS_URL"):
+        test_postgis_matching_matches_python_results()
+    else:
+        print("⏭️  Skipping PostGIS test (TEST_POSTGIS_URL not set)")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test cached principal resolution: authenticated requests stop reading the
+users table once the caller is cached, tokens are decoded once, and profile
+updates and provider applications invalidate the cached snapshot.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi import Depends, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.user import User
+from app.routers import providers, users
+from app.services import auth
+from app.services.auth import create_access_token, get_current_user, verify_token
+from app.services.principals import Principal, PrincipalCache, get_principal_cache
+from conftest import make_test_app, memory_database
+
+def make_client(principals: PrincipalCache):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client",
+                city="Nairobi", state="Westlands"))
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (users.router, "/api/users"), providers.router)
+
+    @app.get("/whoami")
+    async def whoami(user: Principal = Depends(get_current_user)):
+        return {"type": user.user_type, "name": user.name}
+
+    app.dependency_overrides[get_principal_cache] = (lambda cache: lambda: cache)(principals)
+    return TestClient(app), engine
+
+def test_cached_principal_and_invalidation():
+    principals = PrincipalCache(use_redis=False)
+    client, engine = make_client(principals)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+
+    user_reads = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 user_reads.append(statement) if "FROM users" in statement else None)
+
+    assert client.get("/whoami", headers=headers).json() == {"type": "client", "name": "Wanjiru"}
+    assert client.get("/whoami", headers=headers).json() == {"type": "client", "name": "Wanjiru"}
+    assert len(user_reads) == 1, "the second request is served from the cache"
+
+    # Profile updates drop the snapshot
+    profile = {"name": "Wanjiru K", "email": "client@example.com", "password": "unused", "city": "Nairobi", "state": "Karen"}
+    assert client.put("/api/users/me", headers=headers, json=profile).status_code == 200
+    assert client.get("/whoami", headers=headers).json()["name"] == "Wanjiru K"
+
+    # So does becoming a provider
+    response = client.post("/api/provider/apply", data={
+        "fullName": "Wanjiru K", "email": "client@example.com", "phone": "0713", "selectedCategories": '["painting"]',
+        "selectedServices": "[]", "responseTime": "same_day", "county": "Nairobi", "subCounty": "Westlands",
+        "ward": "Parklands", "serviceRadius": "10", "minRate": "1000", "maxRate": "2000"
+    })
+    assert response.json()["user_transition"] is True
+    assert client.get("/whoami", headers=headers).json()["type"] == "provider"
+
+    bad = {"Authorization": "Bearer not-a-token"}
+    assert client.get("/whoami", headers=bad).status_code == 401
+    print("✅ Principals are cached and invalidated on profile and provider-type changes")
+
+def test_tokens_are_decoded_once(monkeypatch):
+    principals = PrincipalCache(use_redis=False)
+    token = create_access_token({"sub": "1"})
+    decodes = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or real_decode(*args, **kwargs))
+
+    assert verify_token(token, principals) == verify_token(token, principals) == "1"
+    assert len(decodes) == 1
+
+    # A memoized token still stops working when it expires
+    principals.remember_token(token, "1", 0)
+    assert principals.token_claims(token) is None
+    with pytest.raises(HTTPException):
+        verify_token(create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1)), principals)
+    print("✅ JWT claims are memoized per token and expiry is still enforced")
+
+def test_redis_tier_is_shared_between_workers():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    first, second = PrincipalCache(redis=redis, use_redis=True), PrincipalCache(redis=redis, use_redis=True)
+    principal = Principal(id=7, email="p@example.com", name="P", user_type="provider", latitude=-1.28)
+
+    async def scenario():
+        await first.put(principal)
+        assert await second.get(7) == principal, "found through Redis"
+        await first.invalidate(7)
+        assert await first.get(7) is None
+        second.local.pop(7)
+        assert await second.get(7) is None
+
+    asyncio.run(scenario())
+    print("✅ The Redis tier shares principals between processes and honours invalidation")
+
+if __name__ == "__main__":
+    test_cached_principal_and_invalidation()
+    test_redis_tier_is_shared_between_workers()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test provider availability: the interval tree answers overlap queries like a
+scan would, and find-providers keeps only providers working and unbooked in
+the requested window.
+"""
+
+import os
+import random
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import matching, provider_dashboard
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user
+from app.services.availability import AvailabilityIndex, IntervalTree, get_availability_index
+from conftest import make_test_app, memory_database
+
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client",
+              city="Nairobi", state="Westlands", latitude=-1.2864, longitude=36.8172)
+PROVIDER_EMAILS = ["p1@example.com", "p2@example.com", "p3@example.com"]
+
+# 2030-01-05 is a Saturday
+SATURDAY_10_TO_12 = {"available_from": "2030-01-05T10:00:00", "available_until": "2030-01-05T12:00:00"}
+
+def provider_user(provider_id: int) -> User:
+    return User(id=100 + provider_id, email=PROVIDER_EMAILS[provider_id - 1], name=f"P{provider_id}", user_type="provider")
+
+def test_interval_tree_matches_a_scan():
+    rng = random.Random(7)
+    intervals = []
+    for booking_id in range(500):
+        start = rng.randrange(0, 10000)
+        intervals.append((start, start + rng.randrange(1, 300), (booking_id, booking_id % 40)))
+    tree = IntervalTree(intervals)
+
+    for _ in range(300):
+        start = rng.randrange(0, 10000)
+        end = start + rng.randrange(1, 500)
+        expected = {interval for interval in intervals if interval[0] < end and interval[1] > start}
+        assert set(tree.overlapping(start, end)) == expected
+    assert sorted(tree.intervals()) == sorted(intervals)
+    print("✅ Interval tree overlap queries match a full scan")
+
+def test_find_providers_filters_by_free_window():
+    engine, Session = memory_database()
+
+    db = Session()
+    for provider_id, email in enumerate(PROVIDER_EMAILS, start=1):
+        db.add(ServiceProvider(id=provider_id, name=f"P{provider_id}", email=email, phone="0700",
+                               categories='["plumbing"]', county="Nairobi", sub_county="Westlands", ward="Parklands",
+                               city="Nairobi", state="Westlands", latitude=-1.2900 - provider_id / 1000, longitude=36.8200))
+    db.commit()
+    db.close()
+
+    index = AvailabilityIndex(refresh_seconds=3600)
+    current = {"user": CLIENT}
+    app = make_test_app(Session, (matching.router, "/api/matching"), provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_activity_log] = (lambda log: lambda: log)(ActivityLog(session_factory=Session))
+    app.dependency_overrides[get_availability_index] = (lambda index: lambda: index)(index)
+    client = TestClient(app)
+
+    # P1 works Saturday mornings, P2 all Saturday but is booked 10:30-11:30, P3 has no calendar
+    current["user"] = provider_user(1)
+    assert client.put("/api/providers/availability",
+                      json={"hours": [{"weekday": 5, "start": "09:00", "end": "13:00"}]}).status_code == 200
+    current["user"] = provider_user(2)
+    assert client.put("/api/providers/availability",
+                      json={"hours": [{"weekday": 5, "start": "08:00", "end": "18:00"}]}).status_code == 200
+    booking = client.post("/api/providers/availability/bookings",
+                          json={"start": "2030-01-05T10:30:00", "end": "2030-01-05T11:30:00"})
+    assert booking.status_code == 200
+    assert client.post("/api/providers/availability/bookings",
+                       json={"start": "2030-01-05T11:00:00", "end": "2030-01-05T12:00:00"}).status_code == 409
+    assert client.put("/api/providers/availability",
+                      json={"hours": [{"weekday": 5, "start": "18:00", "end": "08:00"}]}).status_code == 400
+
+    current["user"] = CLIENT
+    everyone = client.post("/api/matching/find-providers", json={"category": "plumbing"}).json()
+    assert [provider["id"] for provider in everyone] == [1, 2, 3]
+
+    free = client.post("/api/matching/find-providers", json={"category": "plumbing", **SATURDAY_10_TO_12}).json()
+    assert [provider["id"] for provider in free] == [1]
+
+    # Once loaded, windows are answered from the index; P1 stops work at 13:00
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+    late = {"available_from": "2030-01-05T12:00:00", "available_until": "2030-01-05T14:00:00"}
+    afternoon = client.post("/api/matching/find-providers", json={"category": "plumbing", **late}).json()
+    assert [provider["id"] for provider in afternoon] == [2]
+    assert not any("provider_bookings" in statement or "provider_hours" in statement for statement in statements)
+    assert client.post("/api/matching/find-providers",
+                       json={"category": "plumbing", "available_from": "2030-01-05T12:00:00"}).status_code == 400
+
+    current["user"] = provider_user(2)
+    assert client.delete(f"/api/providers/availability/bookings/{booking.json()['id']}").status_code == 200
+    current["user"] = CLIENT
+    free = client.post("/api/matching/find-providers", json={"category": "plumbing", **SATURDAY_10_TO_12}).json()
+    assert [provider["id"] for provider in free] == [1, 2]
+
+    # A fresh process loads the same calendar from the database
+    reloaded = AvailabilityIndex()
+    db = Session()
+    window = [datetime.fromisoformat(value) for value in SATURDAY_10_TO_12.values()]
+    assert reloaded.available(db, [1, 2, 3], *window) == {1, 2}
+    db.close()
+    print("✅ find-providers keeps only providers working and unbooked in the window")
+
+if __name__ == "__main__":
+    test_interval_tree_matches_a_scan()
+    test_find_providers_filters_by_free_window()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test the bulk provider import pipeline against an in-memory database.
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import providers
+from app.services.auth import get_current_user
+from app.services.principals import Principal, PrincipalCache, get_principal_cache
+from app.services.provider_import import ProviderImporter, iter_rows
+from conftest import make_test_app, memory_database
+
+HEADER = "fullName,email,phone,selectedCategories,selectedServices,responseTime,county,subCounty,ward,serviceRadius,minRate,maxRate\n"
+
+def make_row(i, email=None, min_rate="500", max_rate="1500"):
+    return (f'Provider {i},{email or f"p{i}@agency.co.ke"},07000000{i:02d},"[""plumbing""]",'
+            f'"[""plumbing:leak_repair""]",same_day,Nairobi,Westlands,Parklands,20,{min_rate},{max_rate}\n')
+
+def test_import_batches_dedupes_and_validates(database):
+    engine, Session = database
+    db = Session()
+    db.add(ServiceProvider(name="Existing", email="p3@agency.co.ke", phone="0700", county="Nairobi",
+                           sub_county="Westlands", ward="Parklands"))
+    db.add(User(email="p5@agency.co.ke", name="Client", password_hash="x", user_type="client"))
+    db.commit()
+
+    csv_text = HEADER + "".join(make_row(i) for i in range(10))
+    csv_text += make_row(10, email="p1@agency.co.ke")         # duplicate inside the file
+    csv_text += make_row(11, min_rate="900", max_rate="100")  # invalid rate range
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+
+    hook_calls = []
+    importer = ProviderImporter(db, batch_size=4, hooks=[lambda rows, promoted: hook_calls.append((rows, promoted))])
+    report = importer.run(iter_rows(io.StringIO(csv_text), "csv"))
+
+    assert report.inserted == 9
+    assert report.duplicates == 2
+    assert [error["error"] for error in report.errors] == ["Maximum rate must be higher than minimum rate"]
+    assert report.batches == 3
+    assert sum(len(rows) for rows, _ in hook_calls) == 9 and len(hook_calls) == 3
+    promoted_id = db.query(User.id).filter(User.email == "p5@agency.co.ke").scalar()
+    assert [promoted for _, promoted in hook_calls] == [[], [promoted_id], []], "promotions reported with their batch"
+
+    inserts = [s for s in statements if s.startswith("INSERT INTO service_providers")]
+    assert len(inserts) == 3, "one multi-row INSERT per batch"
+
+    imported = db.query(ServiceProvider).filter(ServiceProvider.email == "p0@agency.co.ke").one()
+    assert json.loads(imported.services) == ["plumbing", "leak_repair"]
+    assert imported.location == "Parklands, Westlands, Nairobi"
+    assert db.query(User).filter(User.email == "p5@agency.co.ke").one().user_type == "provider"
+    print(f"✅ Imported {report.inserted} providers in {report.batches} batches with {len(inserts)} INSERTs")
+
+def test_import_endpoint_accepts_ndjson_upload(database, monkeypatch):
+    engine, Session = database
+    db = Session()
+    db.add(User(id=7, email="amina@agency.co.ke", name="Amina", password_hash="x", user_type="client"))
+    db.commit()
+    db.close()
+
+    principals = PrincipalCache(use_redis=False)
+    asyncio.run(principals.put(Principal(id=7, email="amina@agency.co.ke", name="Amina", user_type="client")))
+
+    current = {"user": Principal(id=1, email="someone@example.com", name="Someone", user_type="client")}
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["Ops@Example.com"])
+    app = make_test_app(Session, providers.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_principal_cache] = lambda: principals
+    client = TestClient(app)
+
+    rows = [
+        {"fullName": "Amina", "email": "amina@agency.co.ke", "phone": "0711", "selectedCategories": ["electrical"],
+         "selectedServices": [], "responseTime": "same_day", "county": "Nairobi", "subCounty": "Langata",
+         "ward": "Karen", "serviceRadius": "15", "minRate": 800, "maxRate": 2000},
+        {"fullName": "No Email", "phone": "0712"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+    upload = {"file": ("partners.ndjson", body, "application/x-ndjson")}
+    assert client.post("/api/provider/import", files=upload).status_code == 403, "admins only"
+
+    current["user"] = Principal(id=2, email="ops@example.com", name="Ops", user_type="client")
+    response = client.post("/api/provider/import", files=upload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 1 and result["failed"] == 2
+    assert asyncio.run(principals.get(7)) is None, "the promoted account's cached snapshot is dropped"
+
+    # Single applications still go through the same validation
+    response = client.post("/api/provider/apply", data={
+        "fullName": "Solo", "email": "solo@example.com", "phone": "0713", "selectedCategories": '["painting"]',
+        "selectedServices": "[]", "responseTime": "same_day", "county": "Nairobi", "subCounty": "Westlands",
+        "ward": "Parklands", "serviceRadius": "10", "minRate": "2000", "maxRate": "1000"
+    })
+    assert response.status_code == 400
+    print("✅ Import endpoint streams NDJSON and reports row errors")
+
+if __name__ == "__main__":
+    test_import_batches_dedupes_and_validates(memory_database())
+    import pytest
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_import_endpoint_accepts_ndjson_upload(memory_database(), monkeypatch)
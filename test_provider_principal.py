@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test provider principal resolution: provider tokens carry the provider id,
+dashboard calls stop querying service_providers once the provider is cached,
+and provider rows are linked to their accounts by user_id instead of email.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event
+
+from app.models.service_provider import ServiceProvider
+from app.models.user import User
+from app.routers import provider_dashboard
+from app.services.auth import ALGORITHM, SECRET_KEY, access_token_for, create_access_token, link_provider_accounts
+from app.services.principals import PrincipalCache, get_principal_cache
+from conftest import make_test_app, memory_database
+
+def make_client(principals: PrincipalCache):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add_all([
+        User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client"),
+        User(id=2, email="fix@example.com", name="Otieno", password_hash="x", user_type="provider"),
+        User(id=3, email="paint@example.com", name="Achieng", password_hash="x", user_type="provider"),
+        User(id=4, email="orphan@example.com", name="Kamau", password_hash="x", user_type="provider")
+    ])
+    # Both rows predate the user_id link
+    db.add_all([
+        ServiceProvider(id=10, name="Quick Fix", email="fix@example.com", phone="0700", county="Nairobi",
+                        sub_county="Westlands", ward="Parklands", latitude=-1.26, longitude=36.80),
+        ServiceProvider(id=11, name="Bright Paint", email="paint@example.com", phone="0701", county="Nairobi",
+                        sub_county="Kilimani", ward="Kilimani")
+    ])
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, provider_dashboard.router)
+    app.dependency_overrides[get_principal_cache] = (lambda cache: lambda: cache)(principals)
+    return TestClient(app), Session, engine
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+def test_backfill_and_pid_claim():
+    client, Session, engine = make_client(PrincipalCache(use_redis=False))
+
+    assert link_provider_accounts(engine) == 2
+    assert link_provider_accounts(engine) == 0, "already linked rows are left alone"
+
+    db = Session()
+    assert db.get(ServiceProvider, 10).user_id == 2
+    claims = jwt.decode(access_token_for(db, db.get(User, 2)), SECRET_KEY, algorithms=[ALGORITHM])
+    assert claims["sub"] == "2" and claims["pid"] == 10
+    assert "pid" not in jwt.decode(access_token_for(db, db.get(User, 1)), SECRET_KEY, algorithms=[ALGORITHM])
+    db.close()
+    print("✅ Provider rows are linked to their accounts and provider tokens carry the provider id")
+
+def test_dashboard_calls_skip_provider_lookups():
+    principals = PrincipalCache(use_redis=False)
+    client, Session, engine = make_client(principals)
+    link_provider_accounts(engine)
+    db = Session()
+    token = access_token_for(db, db.get(User, 2))
+    db.close()
+
+    lookups = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 lookups.append(statement) if "FROM service_providers" in statement or "FROM users" in statement else None)
+
+    assert client.get("/api/providers/conversations", headers=bearer(token)).status_code == 200
+    assert not any("WHERE service_providers.email" in statement for statement in lookups)
+    lookups.clear()
+    assert client.get("/api/providers/conversations", headers=bearer(token)).status_code == 200
+    assert client.get("/api/providers/availability", headers=bearer(token)).status_code == 200
+    assert lookups == [], "user and provider come from the cache"
+
+    # Renaming the business drops the cached snapshot
+    response = client.put("/api/providers/profile", headers=bearer(token), json={"fullName": "Quick Fix Ltd"})
+    assert response.status_code == 200
+    assert principals.providers.get(10) is None
+    print("✅ Warm provider calls read neither users nor service_providers")
+
+def test_tokens_without_pid_resolve_through_the_link():
+    principals = PrincipalCache(use_redis=False)
+    client, Session, engine = make_client(principals)
+    lookups = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 lookups.append(statement) if "FROM service_providers" in statement else None)
+
+    # Issued before the claim existed, for a row not linked yet: matched by email once and linked
+    token = create_access_token({"sub": "3"})
+    assert client.get("/api/providers/conversations", headers=bearer(token)).status_code == 200
+    assert principals.token_provider_id(token) == 11
+    db = Session()
+    assert db.get(ServiceProvider, 11).user_id == 3
+    db.close()
+    lookups.clear()
+    assert client.get("/api/providers/conversations", headers=bearer(token)).status_code == 200
+    assert lookups == []
+
+    client_token = create_access_token({"sub": "1"})
+    assert client.get("/api/providers/conversations", headers=bearer(client_token)).status_code == 403
+    orphan_token = create_access_token({"sub": "4"})
+    assert client.get("/api/providers/conversations", headers=bearer(orphan_token)).status_code == 404
+    print("✅ Older tokens are resolved through service_providers.user_id and memoized")
+
+if __name__ == "__main__":
+    test_backfill_and_pid_claim()
+    test_dashboard_calls_skip_provider_lookups()
+    test_tokens_without_pid_resolve_through_the_link()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test materialized provider dashboard stats: hooks on messages and requests keep
+them current, the dashboard reads them by primary key, reconciliation repairs drift.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.provider_stats import ProviderStats
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import conversations, matching, provider_dashboard
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user
+from app.services.chat import get_chat_hub
+from app.services.chat_writer import get_chat_writer
+from app.services.provider_stats import reconcile_provider_stats
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+class SilentHub:
+    async def publish(self, channel, event):
+        pass
+
+CLIENTS = [User(id=i, email=f"client{i}@example.com", name=f"Client {i}", user_type="client") for i in (1, 2)]
+PROVIDER_USER = User(id=3, email="fix@example.com", name="Otieno", user_type="provider")
+
+def make_client():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add_all([User(id=u.id, email=u.email, name=u.name, password_hash="x", user_type=u.user_type)
+                for u in CLIENTS + [PROVIDER_USER]])
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700", categories='["plumbing"]',
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.commit()
+    db.close()
+
+    current = {"user": CLIENTS[0]}
+    app = make_test_app(Session, (matching.router, "/api/matching"), conversations.router, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_chat_hub] = lambda: SilentHub()
+    app.dependency_overrides[get_chat_writer] = lambda: None
+    app.dependency_overrides[get_unread_counters] = lambda: UnreadCounters(fakeredis.aioredis.FakeRedis(decode_responses=True))
+    app.dependency_overrides[get_activity_log] = (lambda log: lambda: log)(ActivityLog(session_factory=Session))
+    return TestClient(app), Session, engine, current
+
+def test_stats_follow_messages_and_requests():
+    client, Session, engine, current = make_client()
+
+    # Two clients write; one writes twice (still one active chat)
+    for user, text in ((CLIENTS[0], "Hi"), (CLIENTS[0], "Are you there?"), (CLIENTS[1], "Leaking tap")):
+        current["user"] = user
+        client.post("/api/matching/chat/send", json={"provider_id": 1, "message_text": text, "session_id": "s1"})
+
+    current["user"] = PROVIDER_USER
+    inbox = client.get("/api/providers/conversations").json()
+    reply_to = next(c for c in inbox if c["client_id"] == 1)["id"]
+    client.post("/api/conversations/send-message", json={"conversation_id": reply_to, "message": "On my way"})
+
+    # Two requests are offered; one is accepted and completed
+    current["user"] = CLIENTS[0]
+    request_ids = [client.post("/api/providers/clients/requests", json={"category": "plumbing"}).json()["id"]
+                   for _ in range(2)]
+    current["user"] = PROVIDER_USER
+    assert client.get("/api/providers/dashboard/stats").json()["newRequests"] == 2
+    client.post(f"/api/providers/requests/{request_ids[0]}/accept")
+    client.post(f"/api/providers/requests/{request_ids[0]}/complete")
+
+    # Reviews feed the rating, not the job count
+    current["user"] = CLIENTS[0]
+    for rating in (4, 5):
+        client.post("/api/matching/review", json={"provider_id": 1, "rating": rating, "comment": "Good"})
+
+    current["user"] = PROVIDER_USER
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+    stats = client.get("/api/providers/dashboard/stats").json()
+    assert stats["activeChats"] == 1 and stats["completedJobs"] == 1 and stats["newRequests"] == 1
+    assert stats["averageRating"] == 5.0
+    stats_reads = [s for s in statements if "provider_stats" in s]
+    assert len(stats_reads) == 1 and "WHERE provider_stats.provider_id = ?" in stats_reads[0]
+    assert not any("FROM chat_messages" in s or "FROM reviews" in s for s in statements), "no aggregates on load"
+
+    db = Session()
+    assert reconcile_provider_stats(db) == []
+    db.close()
+    print("✅ Dashboard stats follow chats and requests and load with one primary-key read")
+
+def test_reconcile_repairs_drift():
+    client, Session, _, current = make_client()
+    client.post("/api/matching/chat/send", json={"provider_id": 1, "message_text": "Hello", "session_id": "s1"})
+
+    db = Session()
+    stats = db.get(ProviderStats, 1)
+    stats.active_chats, stats.completed_jobs = 7, 3
+    db.commit()
+
+    drifted = reconcile_provider_stats(db, fix=False)
+    assert {(d.field, d.stored, d.expected) for d in drifted} == {("active_chats", 7, 1), ("completed_jobs", 3, 0)}
+    reconcile_provider_stats(db)
+    db.expire_all()
+    stats = db.get(ProviderStats, 1)
+    assert (stats.active_chats, stats.completed_jobs) == (1, 0) and stats.reconciled_at is not None
+    db.close()
+    print("✅ Reconciliation reports and repairs drifted counters")
+
+if __name__ == "__main__":
+    test_stats_follow_messages_and_requests()
+    test_reconcile_repairs_drift()
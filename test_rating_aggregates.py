@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test incremental provider rating aggregates and the nightly reconciliation.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, Review
+from app.routers import matching
+from app.services.auth import get_current_user
+from app.services.ratings import backfill_rating_aggregates, reconcile_rating_aggregates
+from conftest import make_test_app, memory_database
+
+def make_app():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add_all([User(id=i, email=f"user{i}@example.com", name=f"User {i}", password_hash="x") for i in (1, 2, 3)])
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (matching.router, "/api/matching"))
+    return app, engine, Session
+
+def review_as(app, user_id, rating):
+    app.dependency_overrides[get_current_user] = lambda: User(id=user_id, name=f"User {user_id}")
+    return TestClient(app).post("/api/matching/review", json={"provider_id": 1, "rating": rating})
+
+def test_reviews_update_aggregates_without_rescanning():
+    app, engine, Session = make_app()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+
+    assert review_as(app, 1, 5).status_code == 200
+    assert review_as(app, 2, 4).status_code == 200
+    assert review_as(app, 3, 2).status_code == 200
+    assert review_as(app, 3, 5).status_code == 200  # user 3 edits their review
+    assert review_as(app, 1, 9).status_code == 400
+
+    rescans = [s for s in statements if s.startswith("SELECT") and "FROM reviews" in s and "reviews.user_id" not in s]
+    assert rescans == [], "review writes must not reload all reviews"
+
+    provider = Session().get(ServiceProvider, 1)
+    assert provider.total_reviews == 3
+    assert provider.rating_sum == 14
+    assert (provider.rating_1, provider.rating_2, provider.rating_3, provider.rating_4, provider.rating_5) == (0, 0, 0, 1, 2)
+    assert provider.average_rating == 4.7
+    print("✅ Aggregates updated incrementally: 3 reviews, average 4.7")
+
+def test_reconciliation_repairs_drift():
+    app, engine, Session = make_app()
+    review_as(app, 1, 4)
+    review_as(app, 2, 2)
+
+    db = Session()
+    assert reconcile_rating_aggregates(db) == []
+
+    # Simulate drift, e.g. a review deleted by hand in the database
+    db.query(Review).filter(Review.user_id == 2).delete()
+    db.commit()
+
+    drifted = reconcile_rating_aggregates(db)
+    assert [(d.provider_id, d.stored_count, d.expected_count) for d in drifted] == [(1, 2, 1)]
+
+    provider = db.get(ServiceProvider, 1)
+    db.refresh(provider)
+    assert (provider.total_reviews, provider.rating_sum, provider.rating_2, provider.average_rating) == (1, 4, 0, 4.0)
+    assert reconcile_rating_aggregates(db) == []
+    print("✅ Reconciliation detected and repaired drift")
+
+def test_backfill_gives_existing_providers_a_consistent_sum():
+    app, engine, Session = make_app()
+    review_as(app, 1, 4)
+    review_as(app, 2, 2)
+
+    db = Session()
+    # Rows as they look right after ensure_schema() adds the columns with default 0:
+    # provider 1 has review rows, provider 2 only a count and an average
+    db.add(ServiceProvider(id=2, name="Pipe Pros", email="pipes@example.com", phone="0701", county="Nairobi",
+                           sub_county="Westlands", ward="Parklands",
+                           average_rating=4.8, total_reviews=234))
+    db.query(ServiceProvider).update({ServiceProvider.rating_sum: 0, ServiceProvider.rating_4: 0,
+                                      ServiceProvider.rating_2: 0})
+    db.commit()
+
+    assert backfill_rating_aggregates(engine) == 2
+    assert backfill_rating_aggregates(engine) == 0, "only stale rows are touched"
+    db.expire_all()
+    reviewed, seeded = db.get(ServiceProvider, 1), db.get(ServiceProvider, 2)
+    assert (reviewed.rating_sum, reviewed.rating_2, reviewed.rating_4) == (6, 1, 1)
+    assert (seeded.rating_sum, seeded.total_reviews) == (1123, 234)
+    db.close()
+
+    # The next review moves the seeded average instead of resetting it
+    app.dependency_overrides[get_current_user] = lambda: User(id=3, name="User 3")
+    assert TestClient(app).post("/api/matching/review", json={"provider_id": 2, "rating": 5}).status_code == 200
+    db = Session()
+    assert db.get(ServiceProvider, 2).average_rating == 4.8
+    db.close()
+    print("✅ Providers that predate rating_sum are backfilled at startup")
+
+if __name__ == "__main__":
+    test_reviews_update_aggregates_without_rescanning()
+    test_reconciliation_repairs_drift()
+    test_backfill_gives_existing_providers_a_consistent_sum()
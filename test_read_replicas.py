@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test read-replica routing with two local SQLite files standing in for a
+primary and a replica that has not caught up yet.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import database
+from app.database.database import Base, ReplicaRouter, build_engine, get_db
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import matching
+from app.services.auth import get_current_user
+
+def make_database(path):
+    engine = build_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Client", password_hash="x"))
+    db.add(ServiceProvider(
+        id=1, name="Quick Fix", email="fix@example.com", phone="0700000000",
+        county="Nairobi", sub_county="Westlands", ward="Parklands"
+    ))
+    db.commit()
+    db.close()
+    return Session
+
+def test_reads_use_replica_until_client_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        primary_path = os.path.join(tmp, "primary.db")
+        replica_path = os.path.join(tmp, "replica.db")
+        PrimarySession = make_database(primary_path)
+        make_database(replica_path)
+
+        original_router = database.db_router
+        database.db_router = ReplicaRouter(PrimarySession, [f"sqlite:///{replica_path}"], stickiness_seconds=30)
+        try:
+            app = FastAPI()
+            app.include_router(matching.router, prefix="/api/matching")
+
+            def primary_db():
+                db = PrimarySession()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = primary_db
+            app.dependency_overrides[get_current_user] = lambda: User(id=1, name="Client", email="client@example.com")
+
+            # Another visitor reads from the replica, which has not replicated the review yet
+            review = {"provider_id": 1, "rating": 5, "comment": "Great work"}
+            writer = TestClient(app)
+            response = writer.post("/api/matching/review", json=review)
+            assert response.status_code == 200
+            assert ReplicaRouter.STICKY_COOKIE in response.cookies
+
+            reader = TestClient(app)
+            assert reader.get("/api/matching/provider/1/reviews").json() == []
+            print("✅ Anonymous reads are served by the replica")
+
+            # The writer carries the sticky cookie and reads its own review from the primary
+            reviews = writer.get("/api/matching/provider/1/reviews").json()
+            assert [r["comment"] for r in reviews] == ["Great work"]
+            print("✅ Writer reads its own review from the primary")
+        finally:
+            for replica_engine in database.db_router.replica_engines:
+                replica_engine.dispose()
+            database.db_router = original_router
+
+def test_round_robin_across_replicas():
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = [f"sqlite:///{os.path.join(tmp, f'replica{i}.db')}" for i in range(3)]
+        router = ReplicaRouter(sessionmaker(), urls)
+        binds = [str(router.read_session().get_bind().url) for _ in range(6)]
+        assert binds == urls + urls
+        for replica_engine in router.replica_engines:
+            replica_engine.dispose()
+        print("✅ Read sessions rotate across replicas")
+
+def test_no_replicas_reads_from_primary():
+    primary_session = object()
+    router = ReplicaRouter(lambda: primary_session, [])
+    assert router.read_session() is primary_session
+    print("✅ Without replicas, reads use the primary")
+
+if __name__ == "__main__":
+    test_reads_use_replica_until_client_writes()
+    test_round_robin_across_replicas()
+    test_no_replicas_reads_from_primary()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test graceful degradation when Redis misbehaves: the circuit breaker fails
+calls fast once Redis keeps erroring and recovers through a probe, sessions
+fall back to process memory during an outage, and health checks stay bounded
+against a Redis that never answers.
+"""
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError
+
+from app.core.redis_client import CircuitBreaker, GuardedRedis, RedisUnavailable, ping_redis, pool_stats
+from app.services.sessions import SessionStore
+
+def guarded_fake(failures=3, reset_seconds=0.2):
+    server = fakeredis.FakeServer()
+    fake = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    client = GuardedRedis(connection_pool=fake.connection_pool, breaker=CircuitBreaker(failures, reset_seconds))
+    return server, client
+
+def test_breaker_opens_and_recovers():
+    server, client = guarded_fake()
+    breaker = client.breaker
+
+    async def scenario():
+        await client.set("k", "v")
+        server.connected = False
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await client.get("k")
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Redis is back, but the circuit is still open: calls fail without trying it
+        server.connected = True
+        with pytest.raises(RedisUnavailable):
+            await client.get("k")
+        pipe = client.pipeline()
+        pipe.get("k")
+        with pytest.raises(RedisUnavailable):
+            await pipe.execute()
+
+        # After the reset period one probe goes through and closes the circuit
+        await asyncio.sleep(0.25)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert await client.get("k") == "v"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        # A failed probe reopens it straight away
+        server.connected = False
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await client.get("k")
+        await asyncio.sleep(0.25)
+        with pytest.raises(ConnectionError):
+            await client.get("k")
+        assert breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(scenario())
+    print("✅ The breaker opens after repeated failures and closes after a good probe")
+
+def test_sessions_survive_an_outage():
+    server, client = guarded_fake(failures=1, reset_seconds=0.1)
+    store = SessionStore(redis=client, ttl_seconds=600, cache_ttl_seconds=0)
+
+    async def scenario():
+        server.connected = False
+        await store.create("s1", {"final_category": "plumbing", "status": "ready_for_matching"})
+        assert (await store.get("s1"))["final_category"] == "plumbing"
+        await store.update("s1", status="survey_completed")
+        assert (await store.get("s1"))["status"] == "survey_completed"
+        assert await store.get("unknown") is None
+
+        # Once Redis is reachable again the session is written back on its next read
+        server.connected = True
+        await asyncio.sleep(0.15)
+        assert (await store.get("s1"))["status"] == "survey_completed"
+        assert await client.hget("session:s1", "final_category") == '"plumbing"'
+        assert store.fallback.get("s1") is None
+
+    asyncio.run(scenario())
+    print("✅ Sessions are kept in memory while Redis is down and written back afterwards")
+
+def test_health_check_is_bounded_against_a_stuck_redis():
+    async def scenario():
+        # Accepts connections and never replies
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = redis.Redis(host="127.0.0.1", port=port, socket_timeout=5)
+
+        started = time.perf_counter()
+        assert await ping_redis(client, timeout=0.2) is False
+        assert time.perf_counter() - started < 1.0
+
+        stats = pool_stats(client)
+        assert set(stats) == {"max_connections", "in_use", "idle", "utilization"}
+        await client.aclose()
+        server.close()
+
+    asyncio.run(scenario())
+    print("✅ Pinging a stuck Redis gives up after the timeout")
+
+if __name__ == "__main__":
+    test_breaker_opens_and_recovers()
+    test_sessions_survive_an_outage()
+    test_health_check_is_bounded_against_a_stuck_redis()
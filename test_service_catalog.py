@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the single service catalog: lookups come from the data file, legacy
+category ids resolve to catalog categories, providers are matched on their
+category bitmask, and the browser bundle is generated from the same data.
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+
+import generate_service_catalog_js
+from app.models.service_provider import ServiceProvider
+from app.services.catalog import CATALOG_PATH, catalog, service_catalog
+from app.services.matching import backfill_category_masks
+from app.services.problem_detector import ServiceCategory
+from conftest import memory_database
+
+def test_lookups():
+    service = catalog.service("plumbing_001")
+    assert service.category == "plumbing" and service in catalog.by_category["plumbing"]
+    assert catalog.service("missing") is None
+    assert len(catalog.by_id) == len(catalog.services)
+
+    # The detector's categories all land on a catalog category (or match by text)
+    assert catalog.canonical_category("house_cleaning") == "cleaning"
+    assert catalog.category_bit("washing_machine_repair") == catalog.category_bit("appliance_repair")
+    assert catalog.category_bit("construction") == 0
+    for category in ServiceCategory:
+        canonical = catalog.canonical_category(category.value)
+        assert canonical in catalog.categories or catalog.category_bit(canonical) == 0
+
+    # Category and service ids fold into the same mask
+    assert catalog.mask(["plumbing", "house_cleaning", service.id, "unknown"]) == (
+        catalog.category_bits["plumbing"] | catalog.category_bits["cleaning"]
+    )
+    assert json.loads(service_catalog.body)["categories"]["cleaning"] == catalog.categories["cleaning"]["name"]
+    print("✅ Catalog lookups resolve services, categories and legacy ids")
+
+def test_mask_matching(database):
+    engine, Session = database
+    db = Session()
+
+    def provider(id, **fields):
+        return ServiceProvider(id=id, name=f"Provider {id}", email=f"p{id}@example.com", phone="0700",
+                               county="Nairobi", sub_county="Westlands", ward="Parklands", **fields)
+
+    db.add_all([
+        provider(1, categories='["cleaning"]'),
+        provider(2, categories='["house_cleaning"]'),
+        provider(3, services='["plumbing_001"]'),  # Applications store services, not categories
+        provider(4, categories='["construction"]'),
+        provider(5, categories='["electrical"]')
+    ])
+    db.commit()
+
+    def offering(category):
+        return sorted(id for id, in db.query(ServiceProvider.id).filter(ServiceProvider.offers(category)))
+
+    assert offering("house_cleaning") == [1, 2]
+    assert offering("cleaning") == [1, 2]
+    assert offering("plumbing") == [3]
+    assert offering("construction") == [4], "categories outside the catalog match by text"
+
+    # Edits keep the mask current
+    moved = db.get(ServiceProvider, 5)
+    moved.categories = '["plumbing"]'
+    db.commit()
+    assert offering("plumbing") == [3, 5] and offering("electrical") == []
+
+    # Rows written before the column existed are filled in at startup
+    with engine.begin() as conn:
+        conn.execute(insert(ServiceProvider.__table__).values(
+            id=6, name="Old", email="old@example.com", phone="0700", county="Nairobi",
+            sub_county="Westlands", ward="Parklands", categories='["electrical"]'
+        ))
+    assert offering("electrical") == []
+    assert backfill_category_masks(engine) == 1
+    assert offering("electrical") == [6]
+    assert backfill_category_masks(engine) == 0
+    db.close()
+    print("✅ Providers are matched on their catalog category bits")
+
+def test_generated_js_is_current():
+    with open(CATALOG_PATH, encoding="utf-8") as f:
+        expected = generate_service_catalog_js.render(json.load(f))
+    with open(generate_service_catalog_js.JS_PATH, encoding="utf-8") as f:
+        assert f.read() == expected, "run generate_service_catalog_js.py"
+    print("✅ static/js/service-catalog.js is generated from the catalog data")
+
+if __name__ == "__main__":
+    test_lookups()
+    test_mask_matching(memory_database())
+    test_generated_js_is_current()
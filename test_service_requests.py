@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test the service request lifecycle: set-based offering to matching providers,
+indexed provider queues, compare-and-set accept so one provider wins, decline,
+complete and cancel.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.conversation import Conversation
+from app.models.provider_stats import ProviderStats
+from app.models.service_request import RequestOffer, ServiceRequest
+from app.models.user import User
+from app.models.service_provider import ServiceProvider
+from app.routers import provider_dashboard
+from app.services.activity import ActivityLog, get_activity_log
+from app.services.auth import get_current_user
+from app.services.dispatch import Dispatcher, get_dispatcher
+from app.services.provider_stats import reconcile_provider_stats
+from app.services.service_requests import RequestStateError, accept_offer, create_request, offer_request
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client", county="Nairobi")
+PROVIDERS = [
+    # (id, name, email, categories, county)
+    (1, "Quick Fix", "fix@example.com", '["plumbing"]', "Nairobi"),
+    (2, "Pipe Pros", "pipes@example.com", '["plumbing", "hvac"]', "Nairobi"),
+    (3, "Coast Plumbing", "coast@example.com", '["plumbing"]', "Mombasa"),
+    (4, "Spark Electric", "spark@example.com", '["electrical"]', "Nairobi"),
+]
+
+def provider_user(provider_id: int) -> User:
+    _, name, email, _, _ = PROVIDERS[provider_id - 1]
+    return User(id=100 + provider_id, email=email, name=name, user_type="provider")
+
+def make_client():
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client", county="Nairobi"))
+    for provider_id, name, email, categories, county in PROVIDERS:
+        db.add(ServiceProvider(id=provider_id, name=name, email=email, phone="0700", categories=categories,
+                               county=county, sub_county="Central", ward="Central"))
+    db.commit()
+    db.close()
+
+    activity = ActivityLog(session_factory=Session)
+    current = {"user": CLIENT}
+    app = make_test_app(Session, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_unread_counters] = lambda: UnreadCounters(fakeredis.aioredis.FakeRedis())
+    app.dependency_overrides[get_activity_log] = (lambda log: lambda: log)(activity)
+    return TestClient(app), Session, engine, current, activity
+
+def test_offer_accept_and_complete():
+    client, Session, engine, current, activity = make_client()
+
+    offer_inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany:
+                 offer_inserts.append(statement) if statement.startswith("INSERT INTO request_offers") else None)
+    created = client.post("/api/providers/clients/requests",
+                          json={"category": "plumbing", "description": "Kitchen sink leaking"}).json()
+    # Plumbers covering Nairobi only, offered with one INSERT ... SELECT
+    assert created["provider_count"] == 2 and created["status"] == "active"
+    assert len(offer_inserts) == 1 and "SELECT" in offer_inserts[0]
+    request_id = created["id"]
+
+    current["user"] = provider_user(1)
+    queue = client.get("/api/providers/requests").json()
+    assert [(r["id"], r["status"], r["customer_name"]) for r in queue] == [(request_id, "new", "Wanjiru")]
+    assert client.get("/api/providers/dashboard/stats").json()["newRequests"] == 1
+    current["user"] = provider_user(3)
+    assert client.get("/api/providers/requests").json() == []
+
+    # First accept wins; the other provider's offer is withdrawn
+    current["user"] = provider_user(1)
+    accepted = client.post(f"/api/providers/requests/{request_id}/accept")
+    assert accepted.status_code == 200
+    current["user"] = provider_user(2)
+    assert client.post(f"/api/providers/requests/{request_id}/accept").status_code == 409
+    assert client.get("/api/providers/requests").json() == []
+    assert client.get("/api/providers/dashboard/stats").json()["newRequests"] == 0
+
+    db = Session()
+    conversation = db.get(Conversation, accepted.json()["conversation_id"])
+    assert (conversation.session_id, conversation.provider_id) == (f"request-{request_id}", 1)
+    db.close()
+
+    # Only the accepted provider can complete
+    assert client.post(f"/api/providers/requests/{request_id}/complete").status_code == 409
+    current["user"] = provider_user(1)
+    assert client.post(f"/api/providers/requests/{request_id}/complete").status_code == 200
+    assert client.get("/api/providers/dashboard/stats").json()["completedJobs"] == 1
+
+    current["user"] = CLIENT
+    mine = client.get("/api/providers/clients/requests").json()
+    assert mine[0]["status"] == "completed" and mine[0]["accepted_provider_id"] == 1
+    stats = client.get("/api/providers/clients/dashboard/stats").json()
+    assert stats["activeRequests"] == 0 and stats["completed"] == 1
+    assert stats["activeChats"] == 0, "the completed request's conversation is no longer active"
+    db = Session()
+    db.add(Conversation(session_id="chat", client_id=1, provider_id=2))
+    db.commit()
+    db.close()
+    assert client.get("/api/providers/clients/dashboard/stats").json()["activeChats"] == 1, "chats without a request"
+
+    activity.flush()
+    db = Session()
+    assert reconcile_provider_stats(db, fix=False) == []
+    db.close()
+    print("✅ Requests are offered set-based, accepted by exactly one provider and completed")
+
+def test_decline_reopens_and_cancel_withdraws():
+    client, Session, _, current, _ = make_client()
+
+    first = client.post("/api/providers/clients/requests", json={"category": "plumbing"}).json()["id"]
+    second = client.post("/api/providers/clients/requests", json={"category": "plumbing"}).json()["id"]
+
+    for provider_id in (1, 2):
+        current["user"] = provider_user(provider_id)
+        assert client.post(f"/api/providers/requests/{first}/decline").status_code == 200
+    assert client.post(f"/api/providers/requests/{first}/decline").status_code == 409
+
+    current["user"] = CLIENT
+    assert client.post(f"/api/providers/clients/requests/{second}/cancel").status_code == 200
+    assert client.post(f"/api/providers/clients/requests/{second}/cancel").status_code == 409
+
+    # Cancelling after a provider accepted takes the job out of their queue too
+    third = client.post("/api/providers/clients/requests", json={"category": "plumbing"}).json()["id"]
+    current["user"] = provider_user(1)
+    assert client.post(f"/api/providers/requests/{third}/accept").status_code == 200
+    assert [r["id"] for r in client.get("/api/providers/requests").json()] == [third]
+    current["user"] = CLIENT
+    assert client.get("/api/providers/clients/dashboard/stats").json()["activeChats"] == 1
+    assert client.post(f"/api/providers/clients/requests/{third}/cancel").status_code == 200
+    assert client.get("/api/providers/clients/dashboard/stats").json()["activeChats"] == 0
+    current["user"] = provider_user(1)
+    assert client.get("/api/providers/requests").json() == []
+
+    db = Session()
+    assert db.get(ServiceRequest, first).status == "open", "declined by everyone: back to open"
+    assert db.get(ServiceRequest, second).status == "cancelled"
+    for cancelled in (second, third):
+        assert {o.status for o in db.query(RequestOffer).filter(RequestOffer.request_id == cancelled)} == {"withdrawn"}
+    assert all(stats.new_requests == 0 for stats in db.query(ProviderStats))
+    db.close()
+    print("✅ Declines reopen a request; cancelling withdraws its offers, accepted ones included")
+
+def test_failed_accept_releases_the_lease(monkeypatch):
+    client, _, _, current, _ = make_client()
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    client.app.dependency_overrides[get_dispatcher] = lambda: Dispatcher(redis=redis)
+    request_id = client.post("/api/providers/clients/requests", json={"category": "plumbing"}).json()["id"]
+
+    def broken_accept(db, request_id, provider_id):
+        raise RuntimeError("database went away")
+    monkeypatch.setattr(provider_dashboard, "accept_offer", broken_accept)
+
+    current["user"] = provider_user(1)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/providers/requests/{request_id}/accept")
+    monkeypatch.undo()
+
+    # The lease went back, so another provider can still take the request
+    current["user"] = provider_user(2)
+    assert client.post(f"/api/providers/requests/{request_id}/accept").status_code == 200
+    print("✅ An accept that fails for any reason gives the dispatch lease back")
+
+def test_waves_offer_only_new_providers_and_accept_needs_an_offer():
+    _, Session, _, _, _ = make_client()
+    db = Session()
+    request = create_request(db, 1, "plumbing", county="Nairobi")
+    assert offer_request(db, request, provider_ids=[2]) == [2]
+    assert offer_request(db, request) == [1], "providers already offered are skipped"
+    with pytest.raises(RequestStateError):
+        accept_offer(db, request.id, 3)
+    db.rollback()
+    db.close()
+    print("✅ Offers can go out in waves; providers without an offer cannot accept")
+
+def test_waves_racing_a_cancel_leave_no_offers():
+    _, Session, engine, _, _ = make_client()
+    db = Session()
+    first = create_request(db, 1, "plumbing", county="Nairobi")
+    second = create_request(db, 1, "plumbing", county="Nairobi")
+    db.commit()
+    dispatcher = Dispatcher(redis=fakeredis.aioredis.FakeRedis(decode_responses=True), session_factory=Session,
+                            activity=ActivityLog(session_factory=Session))
+
+    # Cancelled after the caller loaded it: the INSERT ... SELECT re-reads the status
+    stale = db.get(ServiceRequest, first.id)
+    db.query(ServiceRequest).filter(ServiceRequest.id == first.id).update({ServiceRequest.status: "cancelled"})
+    assert offer_request(db, stale) == []
+    db.rollback()
+
+    # Cancelled between the offer INSERT and the status update: the wave is dropped
+    def cancel_mid_wave(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("INSERT INTO request_offers"):
+            conn.connection.cursor().execute("UPDATE service_requests SET status = 'cancelled' WHERE id = ?", (second.id,))
+    event.listen(engine, "after_cursor_execute", cancel_mid_wave)
+    assert dispatcher._offer_wave(second.id, 0.0, everyone=True) is None
+    event.remove(engine, "after_cursor_execute", cancel_mid_wave)
+
+    assert db.query(RequestOffer).count() == 0
+    assert all(stats.new_requests == 0 for stats in db.query(ProviderStats))
+    db.close()
+    print("✅ Offers are not left behind on requests cancelled while a wave goes out")
+
+if __name__ == "__main__":
+    test_offer_accept_and_complete()
+    test_decline_reopens_and_cancel_withdraws()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_failed_accept_releases_the_lease(monkeypatch)
+    test_waves_offer_only_new_providers_and_accept_needs_an_offer()
+    test_waves_racing_a_cancel_leave_no_offers()
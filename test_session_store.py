@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the session store: sessions are Redis hashes with per-field updates,
+reads refresh the expiry in the same round trip, several sessions are read
+in one pipeline, and old JSON-string sessions keep working.
+"""
+
+import asyncio
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import problems, surveys
+from app.services.sessions import SessionStore, get_session_store
+
+SESSION = {
+    "problem_description": "Kitchen sink is leaking",
+    "final_category": "plumbing",
+    "urgency_level": "high",
+    "confidence": 0.8,
+    "user_id": None,
+    "status": "ready_for_matching"
+}
+
+class CountingRedis(fakeredis.aioredis.FakeRedis):
+    """Counts pipelines and single commands sent to Redis"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    async def execute_command(self, *args, **kwargs):
+        self.round_trips += 1
+        return await super().execute_command(*args, **kwargs)
+
+    def pipeline(self, *args, **kwargs):
+        pipe = super().pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted(*a, **kw):
+            self.round_trips += 1
+            return await execute(*a, **kw)
+
+        pipe.execute = counted
+        return pipe
+
+def test_hash_sessions_and_partial_updates():
+    redis = CountingRedis(decode_responses=True)
+    store = SessionStore(redis=redis, ttl_seconds=600, cache_ttl_seconds=0)
+
+    async def scenario():
+        await store.create("s1", SESSION)
+        assert await redis.type("session:s1") == "hash"
+        assert await store.get("s1") == SESSION
+
+        # Only the named fields come back
+        assert await store.get("s1", fields=("final_category", "missing")) == {"final_category": "plumbing"}
+
+        # Updates write just the changed fields; the rest is untouched
+        await store.update("s1", status="survey_completed", survey_responses={"leak": "constant"})
+        assert await redis.hget("session:s1", "problem_description") == json.dumps(SESSION["problem_description"])
+        stored = await store.get("s1")
+        assert stored["status"] == "survey_completed" and stored["survey_responses"] == {"leak": "constant"}
+        assert stored["confidence"] == 0.8
+
+        # Reads slide the expiry forward
+        await redis.expire("session:s1", 5)
+        await store.get("s1")
+        assert await redis.ttl("session:s1") > 500
+
+        # Several sessions, one round trip
+        await store.create("s2", {"final_category": "electrical"})
+        redis.round_trips = 0
+        many = await store.get_many(["s1", "s2", "gone"])
+        assert redis.round_trips == 1
+        assert many[1] == {"final_category": "electrical"} and many[2] is None
+        assert await store.get("gone") is None
+
+    asyncio.run(scenario())
+    print("✅ Sessions are hashes with per-field updates, sliding expiry and pipelined reads")
+
+def test_local_cache_and_legacy_sessions():
+    redis = CountingRedis(decode_responses=True)
+    store = SessionStore(redis=redis, ttl_seconds=600, cache_ttl_seconds=60)
+
+    async def scenario():
+        await store.create("s1", SESSION)
+        redis.round_trips = 0
+        assert (await store.get("s1"))["final_category"] == "plumbing"
+        await store.update("s1", status="survey_completed")
+        assert (await store.get("s1"))["status"] == "survey_completed", "writes keep the local copy current"
+        assert redis.round_trips == 1, "only the update went to Redis"
+
+        # Written by the previous version as one JSON string
+        await redis.setex("session:old", 600, json.dumps(SESSION))
+        assert (await store.get("old"))["urgency_level"] == "high"
+        await store.update("old", status="survey_completed")
+        assert await redis.type("session:old") == "hash"
+        assert (await SessionStore(redis=redis, cache_ttl_seconds=0).get("old"))["status"] == "survey_completed"
+
+    asyncio.run(scenario())
+    print("✅ Hot sessions are read locally and old JSON-string sessions are migrated on write")
+
+def test_detect_and_submit_survey():
+    store = SessionStore(redis=fakeredis.aioredis.FakeRedis(decode_responses=True), cache_ttl_seconds=0)
+    app = FastAPI()
+    app.include_router(problems.router, prefix="/api/problems")
+    app.include_router(surveys.router, prefix="/api/surveys")
+    app.dependency_overrides[get_session_store] = lambda: store
+    client = TestClient(app)
+
+    detected = client.post("/api/problems/detect", json={"description": "Water leaking under the kitchen sink"})
+    assert detected.status_code == 200
+    session_id = detected.json()["session_id"]
+    assert client.get(f"/api/problems/session/{session_id}").json()["status"] == "ready_for_matching"
+
+    submitted = client.post("/api/surveys/submit", json={"session_id": session_id, "answers": {"leak": "constant"}})
+    assert submitted.status_code == 200 and submitted.json()["success"] is True
+    session = client.get(f"/api/problems/session/{session_id}").json()
+    assert session["status"] == "survey_completed" and session["survey_responses"] == {"leak": "constant"}
+
+    assert client.get("/api/problems/session/unknown").status_code == 404
+    assert client.post("/api/surveys/submit", json={"session_id": "unknown", "answers": {}}).status_code == 404
+    print("✅ Detection and survey endpoints go through the session store")
+
+if __name__ == "__main__":
+    test_hash_sessions_and_partial_updates()
+    test_local_cache_and_legacy_sessions()
+    test_detect_and_submit_survey()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test streamed and compressed list responses: list endpoints stream a JSON
+array (or NDJSON on request) encoded item by item off the event loop, gzip
+and Brotli flush every streamed chunk, and already-compressed bodies are
+passed through.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+import zlib
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core import responses
+from app.core.responses import NDJSON, CompressionMiddleware, json_array_chunks, ndjson_chunks, stream_list
+from app.models.service_provider import Review, ServiceProvider
+from app.models.user import User
+from app.routers import matching
+from app.services.catalog import service_catalog
+from conftest import make_test_app, memory_database
+
+def make_client(review_count=300):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add_all([User(id=i, email=f"user{i}@example.com", name=f"User {i}", password_hash="x")
+                for i in range(1, review_count + 1)])
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.add_all([Review(user_id=i, provider_id=1, rating=1 + i % 5, review_text=f"Review {i}",
+                       service_category="general") for i in range(1, review_count + 1)])
+    db.commit()
+    db.close()
+
+    app = make_test_app(Session, (matching.router, "/api/matching"))
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+def test_lists_stream_as_json_or_ndjson():
+    client = TestClient(make_client())
+
+    reviews = client.get("/api/matching/provider/1/reviews", params={"limit": 100})
+    assert reviews.status_code == 200 and reviews.headers["content-type"] == "application/json"
+    body = reviews.json()
+    assert len(body) == 100 and body[0]["id"] == 300 and body[0]["user_name"] == "User 300"
+    assert set(body[0]) == {"id", "rating", "comment", "created_at", "user_name"}
+
+    lines = client.get("/api/matching/provider/1/reviews", params={"limit": 100}, headers={"Accept": NDJSON})
+    assert lines.headers["content-type"] == NDJSON
+    assert [json.loads(line) for line in lines.text.splitlines()] == body
+
+    # Pieces are cut at about STREAM_CHUNK_BYTES, and an empty list is still valid JSON
+    items = [{"id": i} for i in range(100)]
+    chunks = list(json_array_chunks(items, chunk_bytes=64))
+    assert len(chunks) > 1 and json.loads(b"".join(chunks)) == items
+    assert list(json_array_chunks([])) == [b"[]"]
+    assert b"".join(ndjson_chunks(items[:2])) == b'{"id":0}\n{"id":1}\n'
+    print("✅ List endpoints stream a JSON array, or NDJSON when asked")
+
+def test_compression():
+    client = TestClient(make_client())
+
+    compressed = client.get("/api/matching/provider/1/reviews", params={"limit": 100},
+                            headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip" and "Accept-Encoding" in compressed.headers["vary"]
+    assert len(compressed.json()) == 100
+
+    plain = client.get("/api/matching/provider/1/reviews", params={"limit": 100},
+                       headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.json() == compressed.json()
+
+    small = client.get("/api/matching/provider/1/reviews", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers, "bodies under the minimum size are sent as they are"
+
+    only_br = client.get("/api/matching/provider/1/reviews", params={"limit": 100}, headers={"Accept-Encoding": "br"})
+    if responses.brotli is None:
+        assert "content-encoding" not in only_br.headers, "no brotli package: nothing the client accepts"
+    else:
+        assert only_br.headers["content-encoding"] == "br" and only_br.json() == compressed.json()
+    print("✅ Responses are compressed with what the client accepts")
+
+def make_streaming_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+    app.state.encoding_threads = set()
+
+    def items():
+        for i in range(5000):
+            app.state.encoding_threads.add(threading.current_thread())
+            yield {"id": i, "text": "x" * 50}
+
+    @app.get("/items")
+    async def list_items(request: Request):
+        return await stream_list(request, items())
+
+    @app.get("/catalog")
+    def catalog(request: Request):
+        return service_catalog.response(request)
+
+    return app
+
+def body_messages(app, path, encoding="gzip"):
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": [(b"accept-encoding", encoding.encode())], "http_version": "1.1", "scheme": "http",
+             "server": ("test", 80), "client": ("test", 1), "root_path": "",
+             "asgi": {"version": "3.0", "spec_version": "2.4"}}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+def test_gzip_flushes_streamed_chunks_and_skips_encoded_bodies():
+    app = make_streaming_app()
+
+    sent = body_messages(app, "/items")
+    chunks = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    assert len(chunks) > 2
+    # The first chunk decodes on its own: the compressor did not hold it back
+    first = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks[0])
+    assert first.startswith(b'[{"id":0,') and len(first) > 1000
+    assert len(json.loads(gzip.decompress(b"".join(chunks)))) == 5000
+    assert threading.main_thread() not in app.state.encoding_threads, "items are encoded off the event loop"
+
+    catalog_body = [m for m in body_messages(app, "/catalog") if m["type"] == "http.response.body"]
+    assert b"".join(m["body"] for m in catalog_body) == service_catalog.gzip_body, "not compressed twice"
+    print("✅ Streamed gzip is flushed per chunk and precompressed bodies pass through")
+
+def test_brotli_flushes_streamed_chunks():
+    brotli = pytest.importorskip("brotli")
+    sent = body_messages(make_streaming_app(), "/items", encoding="br")
+    assert sent[0]["type"] == "http.response.start" and (b"content-encoding", b"br") in sent[0]["headers"]
+    chunks = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    assert len(chunks) > 2
+
+    decompressor = brotli.Decompressor()
+    first = decompressor.process(chunks[0])
+    assert first.startswith(b'[{"id":0,') and len(first) > 1000, "the first chunk decodes on its own"
+    rest = b"".join(decompressor.process(chunk) for chunk in chunks[1:])
+    assert len(json.loads(first + rest)) == 5000
+    print("✅ Streamed Brotli is flushed per chunk")
+
+if __name__ == "__main__":
+    test_lists_stream_as_json_or_ndjson()
+    test_compression()
+    test_gzip_flushes_streamed_chunks_and_skips_encoded_bodies()
+    test_brotli_flushes_streamed_chunks()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test unread counters: SQL totals and the Redis mirror follow sends and reads,
+the badge is read without counting messages, and bulk mark-read clears them.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.conversation import Conversation, UnreadTotal
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, ChatMessage
+from app.routers import conversations, matching, provider_dashboard
+from app.services.auth import get_current_user
+from app.services.chat import get_chat_hub
+from app.services.chat_writer import ChatWriter, get_chat_writer
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+class SilentHub:
+    async def publish(self, channel, event):
+        pass
+
+CLIENT = User(id=1, email="client@example.com", name="Wanjiru", user_type="client")
+PROVIDER_USER = User(id=2, email="fix@example.com", name="Otieno", user_type="provider")
+
+def make_client(counters):
+    engine, Session = memory_database()
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client"))
+    db.add(User(id=2, email="fix@example.com", name="Otieno", password_hash="x", user_type="provider"))
+    db.add_all([
+        ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                        county="Nairobi", sub_county="Westlands", ward="Parklands"),
+        ServiceProvider(id=2, name="Spark Electric", email="spark@example.com", phone="0701",
+                        county="Nairobi", sub_county="Langata", ward="Karen"),
+    ])
+    db.commit()
+    db.close()
+
+    current = {"user": CLIENT}
+    app = make_test_app(Session, (matching.router, "/api/matching"), conversations.router, provider_dashboard.router)
+    app.dependency_overrides[get_current_user] = lambda: current["user"]
+    app.dependency_overrides[get_chat_hub] = lambda: SilentHub()
+    app.dependency_overrides[get_chat_writer] = lambda: None
+    app.dependency_overrides[get_unread_counters] = (lambda counters: lambda: counters)(counters)
+    return app, Session, engine, current
+
+def send(client, provider_id, text, session_id="s1"):
+    response = client.post("/api/matching/chat/send",
+                           json={"provider_id": provider_id, "message_text": text, "session_id": session_id})
+    assert response.status_code == 200
+
+def test_badge_follows_sends_and_bulk_mark_read():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    app, Session, engine, current = make_client(UnreadCounters(redis))
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, executemany: statements.append(statement))
+
+    with TestClient(app) as client:
+        for text in ("Hi", "Are you free?", "Tomorrow?"):
+            send(client, 1, text)
+        send(client, 1, "Another job", session_id="s2")
+        send(client, 2, "Need wiring")
+
+        current["user"] = PROVIDER_USER
+        # First read loads the hash from SQL; later reads are one HMGET
+        assert client.get("/api/conversations/unread-count").json() == {"unread": 4}
+        statements.clear()
+        assert client.get("/api/conversations/unread-count").json() == {"unread": 4}
+        assert not any("chat_messages" in s or "conversations" in s for s in statements), "badge never counts"
+
+        # Sends after the load invalidate the cached hash
+        current["user"] = CLIENT
+        send(client, 1, "Hello?", session_id="s2")
+        current["user"] = PROVIDER_USER
+        detail = client.get("/api/conversations/unread-count", params={"per_conversation": True}).json()
+        assert detail["unread"] == 5 and sorted(detail["conversations"].values()) == [2, 3]
+        assert client.get("/api/providers/dashboard/stats").json()["unreadMessages"] == 5
+
+        # Bulk mark-read of one conversation, then everything
+        first_id = int(min(detail["conversations"], key=lambda c: detail["conversations"][c]))
+        result = client.post("/api/conversations/mark-read", json={"conversation_ids": [first_id]}).json()
+        assert result["marked_read"] == 2 and result["unread"] == 3
+        result = client.post("/api/conversations/mark-read", json={}).json()
+        assert result["marked_read"] == 3 and result["unread"] == 0
+
+    db = Session()
+    assert db.query(ChatMessage).filter(ChatMessage.provider_id == 1, ChatMessage.is_read.isnot(True)).count() == 0
+    assert all(c.provider_unread == 0 for c in db.query(Conversation).filter(Conversation.provider_id == 1))
+    assert db.get(UnreadTotal, ("provider", 1)).unread == 0
+    assert db.get(UnreadTotal, ("provider", 2)).unread == 1
+    db.close()
+    print("✅ Badge follows sends, reads come from the cache, bulk mark-read clears counters")
+
+def test_counters_fall_back_to_sql_and_follow_write_behind():
+    down = UnreadCounters(fakeredis.aioredis.FakeRedis(connected=False))
+    app, Session, _, current = make_client(down)
+
+    with TestClient(app) as client:
+        send(client, 1, "Hi")
+        send(client, 1, "Anyone there?")
+        current["user"] = PROVIDER_USER
+        # Redis is down: the badge is the SQL total
+        assert client.get("/api/conversations/unread-count").json() == {"unread": 2}
+        current["user"] = CLIENT
+        assert client.get("/api/providers/clients/dashboard/stats").json()["unreadMessages"] == 0
+
+    # Messages stored by the write-behind writer update the mirror after their commit
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    counters = UnreadCounters(redis)
+    writer = ChatWriter(redis=redis, session_factory=Session, stream="test:chat", consumer="worker-1")
+
+    async def scenario():
+        db = Session()
+        try:
+            assert await counters.badge(db, "provider", 1) == 2
+            await writer.ensure_group()
+            assert await writer.acquire_lease()
+            await writer.append("s1", 1, 1, "user", "Queued", "Wanjiru")
+            await writer.drain_once(block_ms=10)
+            return await counters.badge(db, "provider", 1)
+        finally:
+            db.close()
+
+    assert asyncio.run(scenario()) == 3
+    print("✅ Badge falls back to SQL without Redis and follows write-behind batches")
+
+def test_load_starts_over_when_a_commit_races_it():
+    server = fakeredis.FakeServer()
+    counters = UnreadCounters(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    mirror = fakeredis.FakeRedis(server=server, decode_responses=True)
+    _, Session, _, _ = make_client(counters)
+
+    db = Session()
+    db.add(UnreadTotal(owner_type="provider", owner_id=1, unread=2))
+    db.commit()
+
+    def commit_elsewhere():
+        # Another worker commits a message and applies its delta, with its own connection
+        other_db = Session()
+        other_db.query(UnreadTotal).update({"unread": UnreadTotal.unread + 1})
+        other_db.commit()
+        other_db.close()
+        other = UnreadCounters(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+        thread = threading.Thread(target=asyncio.run, args=(other.apply([("provider", 1, 1, 1)]),))
+        thread.start()
+        thread.join()
+
+    read_sql = counters.read_sql
+    def racing_read(db, owner_type, owner_id):
+        counts = read_sql(db, owner_type, owner_id)
+        if not racing_read.raced:
+            racing_read.raced = True
+            commit_elsewhere()  # Between this read and the hash write, with no hash cached yet
+        return counts
+    racing_read.raced = False
+    counters.read_sql = racing_read
+
+    assert asyncio.run(counters.badge(db, "provider", 1)) == 3
+    assert mirror.hget(counters.key("provider", 1), "total") == "3"
+
+    # A load that already read a commit whose apply() has not run yet is not counted twice
+    db.query(UnreadTotal).update({"unread": UnreadTotal.unread + 1})
+    db.commit()
+    assert asyncio.run(counters.load(db, "provider", 1))["total"] == 4
+    asyncio.run(counters.apply([("provider", 1, 1, 1)]))
+    assert asyncio.run(counters.badge(db, "provider", 1)) == 4
+    db.close()
+    print("✅ A load raced by a commit reads SQL again, and a late apply() is not counted twice")
+
+if __name__ == "__main__":
+    test_badge_follows_sends_and_bulk_mark_read()
+    test_counters_fall_back_to_sql_and_follow_write_behind()
+    test_load_starts_over_when_a_commit_races_it()
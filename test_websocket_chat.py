@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test WebSocket chat: messages are persisted, fanned out through Redis pub/sub
+(fakeredis) and acknowledged with delivery and read receipts.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.models.conversation import Conversation
+from app.models.user import User
+from app.models.service_provider import ServiceProvider, ChatMessage
+from app.routers import matching
+from app.services.auth import create_access_token, get_current_user
+from app.services.chat import ChatHub, channel_for
+from app.services.unread import UnreadCounters, get_unread_counters
+from conftest import make_test_app, memory_database
+
+def make_app(engine=None):
+    engine, Session = memory_database(engine)
+
+    db = Session()
+    db.add(User(id=1, email="client@example.com", name="Wanjiru", password_hash="x", user_type="client"))
+    db.add(User(id=2, email="fix@example.com", name="Otieno", password_hash="x", user_type="provider"))
+    db.add(User(id=3, email="other@example.com", name="Achieng", password_hash="x", user_type="client"))
+    db.add(ServiceProvider(id=1, name="Quick Fix", email="fix@example.com", phone="0700",
+                           county="Nairobi", sub_county="Westlands", ward="Parklands"))
+    db.commit()
+    db.close()
+
+    # Two hubs on one fake server stand in for two uvicorn workers
+    server = fakeredis.FakeServer()
+    hubs = [ChatHub(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)) for _ in range(2)]
+    counters = UnreadCounters(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+
+    apps = []
+    for hub in hubs:
+        app = make_test_app(Session, (matching.router, "/api/matching"))
+        app.dependency_overrides[matching.get_chat_hub] = (lambda hub: lambda: hub)(hub)
+        app.dependency_overrides[get_unread_counters] = lambda: counters
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, name="Wanjiru")
+        apps.append(app)
+    apps[0].state.redis_server = server
+    return apps, Session
+
+def receive_until(socket, kind):
+    while True:
+        frame = socket.receive_json()
+        if frame["type"] == kind:
+            return frame
+
+def test_messages_and_receipts_cross_workers():
+    (worker_a, worker_b), Session = make_app()
+    client_token = create_access_token({"sub": "1"})
+    provider_token = create_access_token({"sub": "2"})
+
+    with TestClient(worker_a) as client_a, TestClient(worker_b) as client_b:
+        # Providers join threads that exist, so the client opens it over HTTP first
+        response = client_a.post("/api/matching/chat/send",
+                                 json={"provider_id": 1, "message_text": "Hello?", "session_id": "s1"})
+        assert response.status_code == 200
+
+        with client_a.websocket_connect(f"/api/matching/chat/ws/s1?provider_id=1&token={client_token}") as user_ws, \
+             client_b.websocket_connect(f"/api/matching/chat/ws/s1?provider_id=1&token={provider_token}") as provider_ws:
+
+            user_ws.send_json({"type": "message", "text": "Is the plumber free today?", "client_msg_id": "c-1"})
+            ack = receive_until(user_ws, "ack")
+            assert ack["client_msg_id"] == "c-1"
+
+            # Fanned out through Redis to the socket held by the other worker
+            message = receive_until(provider_ws, "message")
+            assert message["id"] == ack["id"]
+            assert message["sender_name"] == "Wanjiru" and message["sender_type"] == "user"
+
+            delivered = receive_until(user_ws, "delivered")
+            assert delivered == {"type": "delivered", "id": ack["id"], "by": "provider"}
+
+            # Socket sends and reads go through the configured unread counters
+            mirror = fakeredis.FakeRedis(server=worker_a.state.redis_server, decode_responses=True)
+            mirror.hset("unread:provider:1", mapping={"total": 1, "loaded": 1})
+            provider_ws.send_json({"type": "read", "up_to_id": ack["id"]})
+            read = receive_until(user_ws, "read")
+            assert read == {"type": "read", "up_to_id": ack["id"], "by": "provider"}
+            assert not mirror.hget("unread:provider:1", "loaded"), "the read invalidated the cached counts"
+
+            provider_ws.send_json({"type": "message", "text": "Yes, after 2pm"})
+            reply = receive_until(user_ws, "message")
+            assert reply["sender_type"] == "provider" and reply["sender_name"] == "Quick Fix"
+
+    db = Session()
+    messages = db.query(ChatMessage).order_by(ChatMessage.id).all()
+    assert [m.sender_type for m in messages] == ["user", "user", "provider"]
+    assert all(m.user_id == 1 for m in messages)
+    assert messages[1].is_read and messages[1].delivered_at is not None
+    print("✅ Message, delivery and read receipts crossed workers through Redis pub/sub")
+
+def test_socket_rejects_bad_token_and_unknown_thread():
+    (worker_a, _), _ = make_app()
+    provider_token = create_access_token({"sub": "2"})
+
+    with TestClient(worker_a) as client:
+        for url in ("/api/matching/chat/ws/s1?provider_id=1&token=garbage",
+                    f"/api/matching/chat/ws/empty?provider_id=1&token={provider_token}"):
+            with pytest.raises(WebSocketDisconnect):
+                with client.websocket_connect(url) as ws:
+                    ws.receive_json()
+    print("✅ Sockets with bad tokens or no thread are closed with 1008")
+
+def test_sockets_only_join_their_own_thread():
+    (worker_a, _), Session = make_app()
+    other_token = create_access_token({"sub": "3"})
+    provider_token = create_access_token({"sub": "2"})
+
+    db = Session()
+    db.add_all([Conversation(session_id="s1", client_id=1, provider_id=1),
+                Conversation(session_id="shared", client_id=1, provider_id=1),
+                Conversation(session_id="shared", client_id=3, provider_id=1)])
+    # The profile is linked to its account; its contact email is a client's login
+    db.get(ServiceProvider, 1).user_id = 2
+    db.get(ServiceProvider, 1).email = "other@example.com"
+    db.commit()
+    db.close()
+
+    with TestClient(worker_a) as client:
+        # Another client's session, and a provider thread with two clients but none chosen
+        for url in (f"/api/matching/chat/ws/s1?provider_id=1&token={other_token}",
+                    f"/api/matching/chat/ws/shared?provider_id=1&token={provider_token}"):
+            with pytest.raises(WebSocketDisconnect):
+                with client.websocket_connect(url) as ws:
+                    ws.receive_json()
+
+        with client.websocket_connect(f"/api/matching/chat/ws/shared?provider_id=1&client_id=3&token={provider_token}") as ws:
+            ws.send_json({"type": "message", "text": "Hello Achieng", "client_msg_id": "p-1"})
+            assert receive_until(ws, "message")["message_text"] == "Hello Achieng"
+        # The client sharing the profile's email is still the client in their own thread
+        with client.websocket_connect(f"/api/matching/chat/ws/s3?provider_id=1&token={other_token}") as ws:
+            ws.send_json({"type": "message", "text": "Hello Otieno", "client_msg_id": "c-1"})
+            assert receive_until(ws, "message")["sender_type"] == "user"
+
+    db = Session()
+    messages = db.query(ChatMessage.session_id, ChatMessage.user_id, ChatMessage.sender_type).filter(ChatMessage.user_id == 3)
+    assert messages.order_by(ChatMessage.id).all() == [("shared", 3, "provider"), ("s3", 3, "user")]
+    db.close()
+    assert channel_for("s1", 1, 1) != channel_for("s1", 3, 1), "each client's thread has its own channel"
+    print("✅ Sockets are authorized against the conversation they join and the linked provider account")
+
+def test_idle_socket_returns_its_connection(tmp_path):
+    # A file database gets a real connection pool, so checked-out connections can be counted
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}", connect_args={"check_same_thread": False})
+    (worker_a, _), _ = make_app(engine)
+    client_token = create_access_token({"sub": "1"})
+
+    with TestClient(worker_a) as client:
+        with client.websocket_connect(f"/api/matching/chat/ws/s1?provider_id=1&token={client_token}") as ws:
+            ws.send_json({"type": "message", "text": "Anyone there?", "client_msg_id": "c-1"})
+            receive_until(ws, "ack")
+            assert engine.pool.checkedout() == 0, "an open socket must not hold a pooled connection"
+    engine.dispose()
+    print("✅ Idle chat sockets hold no database connection")
+
+if __name__ == "__main__":
+    test_messages_and_receipts_cross_workers()
+    test_socket_rejects_bad_token_and_unknown_thread()
+    test_sockets_only_join_their_own_thread()
+    import tempfile, pathlib
+    with tempfile.TemporaryDirectory() as tmp:
+        test_idle_socket_returns_its_connection(pathlib.Path(tmp))